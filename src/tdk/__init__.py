@@ -12,10 +12,12 @@ Güncel Türkçe Sözlük (Updated Turkish Dictionary).
 
 Each function comes with a synchronous and an asynchronous version.
 An async function `foo` has a synchronous counterpart `foo_sync`.
-Each function can optionally take an `http_session` parameter to use
+Each function can optionally take a `client` parameter to use a
+[](tdk.client.TDKClient), or an `http_session` parameter to use
 an existing [](aiohttp.ClientSession) for the HTTP requests.
-If not provided, a new session is created and managed by the function using
-[](<#session_maker>).
+If neither is provided, the default client of the running event loop is used,
+so that consecutive calls share one pool of connections.
+See {py:mod}`tdk.client`.
 
 The following subpackages and submodules are available as aliases in the
 top-level package:
@@ -25,6 +27,7 @@ top-level package:
 
 tdk.dictionaries
 tdk.alphabet
+tdk.client
 tdk.enums
 tdk.home
 tdk.tools
@@ -59,12 +62,14 @@ search_spelling_sync("kedi")  # [SpellingEntry(...)]
 from . import (
     dictionaries,
     alphabet,
+    client,
     enums,
     home,
     tools,
 )
 from .dictionaries import *
 from .alphabet import *
+from .client import *
 from .enums import *
 from .home import *
 from .tools import *
@@ -0,0 +1,149 @@
+"""
+The command line interface of tdk-py.
+
+```console
+$ python -m tdk serve --help
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Sequence
+
+from aiohttp import web
+
+from tdk.client import (
+    ConditionalCache,
+    ResponseCache,
+    SharedMemoryCacheBackend,
+    SQLiteCacheBackend,
+    StaleCache,
+)
+from tdk.internal.cache import CacheBackend
+from tdk.internal.gateway import make_app
+from tdk.internal.redis_cache import RedisCacheBackend
+
+
+def make_parser() -> argparse.ArgumentParser:
+    """Make the parser of the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m tdk",
+        description="Tools for the dictionaries of the TDK.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser(
+        "serve",
+        help="serve the dictionaries as a JSON HTTP API",
+        description="Serve the dictionaries as a JSON HTTP API, "
+        "with one shared client for every caller. "
+        "See tdk.internal.gateway.",
+    )
+    serve.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="the host to listen on (default: 127.0.0.1)",
+    )
+    serve.add_argument(
+        "--port",
+        type=int,
+        default=8080,
+        help="the port to listen on (default: 8080)",
+    )
+    serve.add_argument(
+        "--rate-limit",
+        type=float,
+        default=10.0,
+        help="requests per second sent to the TDK servers (default: 10)",
+    )
+    serve.add_argument(
+        "--burst",
+        type=int,
+        default=10,
+        help="requests that may be sent at once after a pause (default: 10)",
+    )
+    serve.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=20,
+        help="requests to the TDK servers in flight at once (default: 20)",
+    )
+    serve.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="seconds a call may take in total (default: 30)",
+    )
+    serve.add_argument(
+        "--base-url",
+        action="append",
+        metavar="URL",
+        help="send the requests to this origin instead of the TDK servers; "
+        "repeat to balance them over several",
+    )
+    caches = serve.add_mutually_exclusive_group()
+    caches.add_argument(
+        "--redis",
+        metavar="URL",
+        help="cache the responses in Redis, as redis://host:port/db",
+    )
+    caches.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        help="cache the responses in an SQLite database",
+    )
+    caches.add_argument(
+        "--shared-memory",
+        action="store_true",
+        help="cache the responses in the shared memory of the host",
+    )
+    return parser
+
+
+def make_backend(args: argparse.Namespace) -> CacheBackend | None:
+    """Make the cache backend chosen on the command line, if any."""
+    if args.redis is not None:
+        return RedisCacheBackend(args.redis)
+    if args.sqlite is not None:
+        return SQLiteCacheBackend(args.sqlite)
+    if args.shared_memory:
+        return SharedMemoryCacheBackend()
+    return None
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the gateway until it is interrupted."""
+    backend = make_backend(args)
+    base_url = args.base_url
+    if base_url is not None and len(base_url) == 1:
+        base_url = base_url[0]
+    app = make_app(
+        max_concurrency=args.max_concurrency,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        timeout=args.timeout,
+        base_url=base_url,
+        cache=ResponseCache(backend),
+        # The few responses served stale are kept apart, in memory.
+        stale_cache=StaleCache(),
+        conditional_cache=ConditionalCache(backend, prefix="conditional:"),
+    )
+
+    async def close_backend(app: web.Application) -> None:
+        if isinstance(backend, RedisCacheBackend):
+            await backend.close()
+        elif isinstance(backend, SQLiteCacheBackend):
+            backend.close()
+
+    app.on_cleanup.append(close_backend)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = make_parser().parse_args(argv)
+    if args.command == "serve":
+        serve(args)
+
+
+if __name__ == "__main__":
+    main()
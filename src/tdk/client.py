@@ -0,0 +1,1136 @@
+"""
+This module provides the client that performs requests to the TDK servers.
+
+A [](TDKClient) owns a single pool of connections, so consecutive requests
+reuse the same connections instead of opening a new one for every lookup.
+Every dictionary function is also available as a method of the client.
+
+```python
+import tdk
+
+async with tdk.TDKClient() as client:
+    entries = await client.search_gts("kedi")
+    names = await client.search_names(
+        "deniz", according_to="name", gender="either"
+    )
+```
+
+The module-level functions, such as [](tdk.dictionaries.gts.search_gts),
+use the default client of the running event loop unless they are given a
+`client` or an `http_session`.
+See [](get_default_client).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import time
+from collections.abc import (
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Mapping,
+    Sequence,
+)
+from contextvars import ContextVar
+from typing import Any, Literal, TypeVar
+
+from aiohttp import ClientSession
+from pydantic import ValidationError
+
+from tdk import home
+from tdk.dictionaries import (
+    ads,
+    bati,
+    bst,
+    derleme,
+    etms,
+    gts,
+    kisi,
+    lehce,
+    sks,
+    syyd,
+    ts,
+    yazim,
+    ysk,
+)
+from tdk.dictionaries.lehce import search_lehce
+from tdk.internal.balancing import BalancedTransport, BalancingPolicy
+from tdk.internal.cache import (
+    CacheBackend,
+    ConditionalCache,
+    MemoryCacheBackend,
+    ResponseCache,
+    SharedMemoryCacheBackend,
+    SQLiteCacheBackend,
+    StaleCache,
+    get_endpoint,
+    make_cache_key,
+)
+from tdk.internal.coalescing import SingleFlight, make_call_key
+from tdk.internal.deadlines import (
+    DeadlineExceededError,
+    deadline,
+    get_deadline,
+    run_with_deadline,
+)
+from tdk.internal.hedging import Hedger, HedgingPolicy
+from tdk.internal.http import (
+    AiohttpTransport,
+    RecordingTransport,
+    ReplayTransport,
+    Transport,
+    TransportResponse,
+    make_request_key,
+    make_response_error,
+)
+from tdk.internal.metrics import (
+    ClientMetrics,
+    Histogram,
+    HistogramSnapshot,
+    MetricsRegistry,
+    default_registry,
+)
+from tdk.internal.profiling import (
+    Profiler,
+    end_call,
+    get_current_call,
+    start_call,
+)
+from tdk.internal.redis_cache import RedisCacheBackend
+from tdk.internal.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    call_with_retries,
+)
+from tdk.internal.scheduling import (
+    AIMDPolicy,
+    Priority,
+    Scheduler,
+    get_priority,
+    priority,
+)
+from tdk.internal.slow_log import RequestTrace, SlowRequest, SlowRequestLog
+from tdk.internal.tracing import LatencyRecorder
+from tdk.internal.utils import NOT_FOUND, media_base_url
+
+
+__all__ = [
+    "TDKClient",
+    "ClientDrainingError",
+    "get_default_client",
+    "close_default_client",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "HedgingPolicy",
+    "deadline",
+    "DeadlineExceededError",
+    "AIMDPolicy",
+    "Priority",
+    "priority",
+    "ResponseCache",
+    "ConditionalCache",
+    "StaleCache",
+    "MemoryCacheBackend",
+    "SharedMemoryCacheBackend",
+    "SQLiteCacheBackend",
+    "RedisCacheBackend",
+    "CacheBackend",
+    "Transport",
+    "AiohttpTransport",
+    "RecordingTransport",
+    "ReplayTransport",
+    "BalancedTransport",
+    "BalancingPolicy",
+    "LatencyRecorder",
+    "Histogram",
+    "HistogramSnapshot",
+    "MetricsRegistry",
+    "default_registry",
+    "Profiler",
+    "SlowRequestLog",
+    "SlowRequest",
+]
+
+_T = TypeVar("_T")
+
+_current_dictionary: ContextVar[str | None] = ContextVar(
+    "_current_dictionary", default=None
+)
+"""The dictionary whose function is being called, such as `gts`."""
+
+
+def _decode(body: bytes, /) -> Any:
+    """Decode a JSON document, timing it for the active profiler."""
+    call = get_current_call()
+    if call is None:
+        return json.loads(body)
+    start = time.perf_counter()
+    try:
+        return json.loads(body)
+    finally:
+        call.decode += time.perf_counter() - start
+
+
+class ClientDrainingError(RuntimeError):
+    """The client is draining, so it does not accept new calls.
+
+    See [](TDKClient.drain).
+    """
+
+
+class TDKClient:
+    """A client for the TDK servers that keeps its connections alive.
+
+    The client creates its [](aiohttp.ClientSession) lazily, on the first
+    request, and it must only be used from the event loop that made that
+    request.
+    Requests are performed by a transport, which can be replaced to record
+    responses or serve recorded ones.
+    Close the client with [](TDKClient.close) or use it as an async context
+    manager, or let the calls in flight finish first with
+    [](TDKClient.drain).
+
+    :param http_session:
+        An existing session to use.
+        The client does not close sessions it did not create.
+        The connector arguments are ignored if this or `transport` is given.
+    :param limit: The maximum number of open connections.
+    :param limit_per_host: The maximum number of open connections to a host.
+    :param keepalive_timeout:
+        Number of seconds an idle connection is kept open for reuse.
+    :param ttl_dns_cache:
+        Number of seconds DNS lookups are cached for,
+        or [](None) to cache them forever.
+    :param max_concurrency:
+        Maximum number of requests in flight at once.
+        Defaults to `limit_per_host` for every origin the requests are sent
+        to, so that requests wait for their turn by [](Priority) rather
+        than for a connection in the order they were made;
+        see [](tdk.internal.scheduling.priority).
+    :param rate_limit:
+        Maximum number of requests started per second,
+        or [](None) for no limit.
+    :param burst:
+        Number of requests that can be started at once under the rate limit.
+    :param adaptive_concurrency:
+        How to adapt the number of requests in flight to the health of the
+        TDK servers, or [](None) to not adapt it.
+        See [](tdk.internal.scheduling.AdaptiveLimiter).
+    :param reserved_slots:
+        Number of the `max_concurrency` slots that only interactive requests
+        can use, so that they have connections even while bulk requests are
+        using all others.
+    :param retry:
+        How requests that failed for a transient reason are retried,
+        or [](None) to not retry them.
+    :param circuit_breaker:
+        A circuit breaker that stops requests while the TDK servers are
+        failing, or [](None) to always make requests.
+    :param hedging:
+        When to send a duplicate of a slow request and use whichever
+        response arrives first,
+        or [](None) to never send duplicates.
+        The duplicate shares the scheduler slot of the original request.
+        See [](tdk.internal.hedging).
+    :param coalesce:
+        Whether concurrent calls to the same function with equal arguments
+        and the same [](Priority) share one request and one validation.
+        :::{important}
+        Coalesced calls return the same objects.
+        Copy them before modifying them.
+        :::
+    :param cache:
+        A cache for the responses of the TDK servers,
+        or [](None) to always make requests.
+    :param stale_cache:
+        A cache that keeps the last good responses of the resources that
+        change rarely, such as the homepage, to answer with them at once
+        while they are refreshed in the background,
+        or [](None) to always wait for the TDK servers.
+    :param conditional_cache:
+        A cache that keeps the large indices with their validators,
+        so that they are only downloaded again when they change,
+        or [](None) to always download them.
+    :param transport:
+        The transport that performs the requests, such as a
+        [](tdk.internal.http.ReplayTransport).
+        Defaults to an [](tdk.internal.http.AiohttpTransport) that uses
+        `http_session` and the connector arguments.
+        The client closes the transport when it is closed.
+    :param base_url:
+        The origin to send the requests to instead of the TDK servers,
+        such as a caching reverse proxy, or several of them to spread the
+        requests over with a [](tdk.internal.balancing.BalancedTransport).
+        Ignored if `transport` is given.
+    :param balancing:
+        How the upstreams are judged when `base_url` gives several of them.
+    :param media_base_url:
+        The origin of the sound and image URLs in the results,
+        if not the TDK servers.
+        See [](tdk.internal.utils.media_base_url).
+    :param metrics:
+        The registry to record the metrics of the client in,
+        or [](None) to not record them.
+        See [](tdk.internal.metrics.ClientMetrics).
+    :param slow_log:
+        A log of the requests that take too long,
+        or [](None) to not check their durations.
+    :param timeout:
+        Number of seconds every call may take in total,
+        including its retries and all of its requests,
+        or [](None) for no limit.
+        Calls that take longer raise
+        [](tdk.internal.deadlines.DeadlineExceededError).
+        Each dictionary method also takes a `timeout` of its own,
+        which shortens this one for that call.
+        See [](tdk.internal.deadlines).
+    """
+
+    def __init__(
+        self,
+        *,
+        http_session: ClientSession | None = None,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 30.0,
+        ttl_dns_cache: int | None = 300,
+        max_concurrency: int | None = None,
+        rate_limit: float | None = None,
+        burst: int = 1,
+        adaptive_concurrency: AIMDPolicy | None = None,
+        reserved_slots: int = 0,
+        retry: RetryPolicy | None = RetryPolicy(),
+        circuit_breaker: CircuitBreaker | None = None,
+        hedging: HedgingPolicy | None = None,
+        coalesce: bool = True,
+        cache: ResponseCache | None = None,
+        stale_cache: StaleCache | None = None,
+        conditional_cache: ConditionalCache | None = None,
+        transport: Transport | None = None,
+        base_url: str | Sequence[str] | None = None,
+        balancing: BalancingPolicy = BalancingPolicy(),
+        media_base_url: str | None = None,
+        metrics: MetricsRegistry | None = default_registry,
+        slow_log: SlowRequestLog | None = None,
+        timeout: float | None = None,
+    ):
+        if transport is None:
+            transport = AiohttpTransport(
+                http_session=http_session,
+                connector_options={
+                    "limit": limit,
+                    "limit_per_host": limit_per_host,
+                    "keepalive_timeout": keepalive_timeout,
+                    "ttl_dns_cache": ttl_dns_cache,
+                },
+                base_url=base_url if isinstance(base_url, str) else None,
+            )
+            if base_url is not None and not isinstance(base_url, str):
+                transport = BalancedTransport(
+                    transport, base_url, **balancing.model_dump()
+                )
+        self._transport = transport
+        self._media_base_url = media_base_url
+        self._metrics = ClientMetrics(metrics) if metrics is not None else None
+        self._slow_log = slow_log
+        if max_concurrency is None and limit_per_host:
+            # The connector would queue the requests in arrival order.
+            origins = 1
+            if base_url is not None and not isinstance(base_url, str):
+                origins = max(len(base_url), 1)
+            max_concurrency = limit_per_host * origins
+        self._scheduler = Scheduler(
+            max_concurrency=max_concurrency,
+            rate_limit=rate_limit,
+            burst=burst,
+            adaptive=adaptive_concurrency,
+            reserved=reserved_slots,
+        )
+        self._retry = retry
+        self._circuit_breaker = circuit_breaker
+        self._hedger = Hedger(hedging) if hedging is not None else None
+        self._single_flight = SingleFlight() if coalesce else None
+        self._cache = cache
+        self._conditional_cache = conditional_cache
+        self._stale_cache = stale_cache
+        self._revalidations: dict[str, asyncio.Task] = {}
+        self._timeout = timeout
+        self._calls: dict[asyncio.Task | None, int] = {}
+        self._idle: asyncio.Event | None = None
+        self._draining = False
+        self._closed = False
+
+    @property
+    def transport(self) -> Transport:
+        """The transport that performs the requests of the client."""
+        return self._transport
+
+    @property
+    def metrics(self) -> MetricsRegistry | None:
+        """The registry the client records its metrics in, if any."""
+        return self._metrics.registry if self._metrics is not None else None
+
+    @property
+    def slow_log(self) -> SlowRequestLog | None:
+        """The log of the slow requests of the client, if it has one."""
+        return self._slow_log
+
+    @property
+    def latencies(self) -> LatencyRecorder | None:
+        """The durations of the phases of the requests, per endpoint,
+        if the transport of the client records them.
+
+        See [](tdk.internal.tracing).
+
+        ```pycon
+        >>> client.latencies.snapshot()["gts"]["queue"].p99
+        0.0
+        ```
+        """
+        return getattr(self._transport, "latencies", None)
+
+    @property
+    def http_session(self) -> ClientSession:
+        """The session used by the client, created on first access.
+
+        :raises RuntimeError: If the client is closed.
+        :raises TypeError:
+            If the transport of the client is not an
+            [](tdk.internal.http.AiohttpTransport).
+        """
+        if self._closed:
+            raise RuntimeError("The client is closed")
+        transport = self._transport
+        if isinstance(transport, BalancedTransport):
+            transport = transport.inner
+        if not isinstance(transport, AiohttpTransport):
+            raise TypeError("The transport of the client has no session")
+        return transport.http_session
+
+    @property
+    def scheduler(self) -> Scheduler:
+        """The scheduler that paces the requests of the client.
+
+        Use [](tdk.internal.scheduling.Scheduler.stats) to see the queue depth
+        and wait times.
+        """
+        return self._scheduler
+
+    @property
+    def hedger(self) -> Hedger | None:
+        """The hedger of the client, if hedging is enabled."""
+        return self._hedger
+
+    @property
+    def single_flight(self) -> SingleFlight | None:
+        """The coalescer of the client, if coalescing is enabled."""
+        return self._single_flight
+
+    @property
+    def cache(self) -> ResponseCache | None:
+        """The response cache of the client, if it has one."""
+        return self._cache
+
+    @property
+    def stale_cache(self) -> StaleCache | None:
+        """The stale cache of the client, if it has one."""
+        return self._stale_cache
+
+    @property
+    def conditional_cache(self) -> ConditionalCache | None:
+        """The conditional cache of the client, if it has one."""
+        return self._conditional_cache
+
+    @property
+    def closed(self) -> bool:
+        """Whether [](TDKClient.close) has been called."""
+        return self._closed
+
+    @property
+    def draining(self) -> bool:
+        """Whether [](TDKClient.drain) has been called."""
+        return self._draining
+
+    @property
+    def calls_in_flight(self) -> int:
+        """Number of calls that the client has accepted and not finished."""
+        return sum(self._calls.values())
+
+    async def close(self) -> None:
+        """Close the client and its transport.
+
+        Calls in flight fail. See [](TDKClient.drain).
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for task in self._revalidations.values():
+            task.cancel()
+        await self._transport.close()
+
+    async def drain(self, timeout: float | None = 30.0) -> bool:
+        """Stop accepting calls, wait for the calls in flight, then close.
+
+        New calls raise [](ClientDrainingError), while the calls in flight
+        finish their requests, retries and cache writes.
+        The tasks of the calls that are still running after `timeout`
+        seconds are cancelled.
+
+        ```python
+        loop.add_signal_handler(
+            signal.SIGTERM, lambda: asyncio.create_task(client.drain(10))
+        )
+        ```
+
+        :param timeout:
+            Number of seconds to wait for the calls in flight,
+            or [](None) to wait for as long as they take.
+        :returns: Whether every call finished in time.
+        """
+        self._draining = True
+        finished = True
+        if self._calls:
+            self._idle = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                finished = False
+                current = asyncio.current_task()
+                for task in self._calls:
+                    if task is not None and task is not current:
+                        task.cancel()
+                # Let the cancellations be delivered before closing.
+                await asyncio.sleep(0)
+        await self.close()
+        return finished
+
+    def _accept(self) -> asyncio.Task | None:
+        """Count a new call, unless the client is draining or closed."""
+        if self._closed:
+            raise RuntimeError("The client is closed")
+        if self._draining:
+            raise ClientDrainingError("The client is draining")
+        task = asyncio.current_task()
+        self._calls[task] = self._calls.get(task, 0) + 1
+        return task
+
+    def _finish(self, task: asyncio.Task | None, /) -> None:
+        """Uncount a call counted by [](TDKClient._accept)."""
+        count = self._calls.pop(task) - 1
+        if count:
+            self._calls[task] = count
+        elif not self._calls and self._idle is not None:
+            self._idle.set()
+
+    async def __aenter__(self) -> TDKClient:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _call(
+        self, func: Callable[..., Awaitable[_T]], /, *args, **kwargs
+    ) -> _T:
+        """Call a dictionary function with this client, under the current
+        deadline and the timeout of the client.
+
+        :raises ClientDrainingError: If the client is draining.
+        """
+        task = self._accept()
+        try:
+            if self._single_flight is not None:
+                key = make_call_key(func, args, kwargs)
+                if key is not None:
+                    # The shared call runs at the priority of its first
+                    # caller, so only calls of the same priority share it.
+                    return await run_with_deadline(
+                        self._single_flight.do(
+                            (get_priority(), key),
+                            lambda: self._run(func, args, kwargs),
+                        ),
+                        self._timeout,
+                    )
+            return await run_with_deadline(
+                self._run(func, args, kwargs), self._timeout
+            )
+        finally:
+            self._finish(task)
+
+    async def _run(
+        self,
+        func: Callable[..., Awaitable[_T]],
+        args: tuple,
+        kwargs: dict[str, Any],
+        /,
+    ) -> _T:
+        """Run a dictionary function, recording which one is running."""
+        dictionary = func.__module__.rpartition(".")[2]
+        token = _current_dictionary.set(dictionary)
+        media_token = (
+            media_base_url.set(self._media_base_url)
+            if self._media_base_url is not None
+            else None
+        )
+        profiled = start_call()
+        try:
+            return await func(*args, client=self, **kwargs)
+        except ValidationError:
+            if self._metrics is not None:
+                self._metrics.validation_failures.labels(
+                    dictionary=dictionary
+                ).inc()
+            raise
+        finally:
+            _current_dictionary.reset(token)
+            if media_token is not None:
+                media_base_url.reset(media_token)
+            if profiled is not None:
+                end_call(f"{dictionary}.{func.__name__}", profiled)
+
+    async def get_json(
+        self,
+        url: str,
+        /,
+        *,
+        params: dict[str, Any] | None = None,
+        conditional: bool = False,
+        stale_while_revalidate: bool = False,
+    ) -> Any:
+        """Perform a GET request and decode the JSON response.
+
+        Responses are served from the cache of the client when possible.
+        Failed requests are retried as the retry policy of the client allows.
+
+        :param url: The URL to request.
+        :param params: The query parameters of the request.
+        :param conditional:
+            Whether to make a conditional request using the copy kept by the
+            conditional cache of the client, if it has one.
+            Meant for large resources that rarely change.
+        :param stale_while_revalidate:
+            Whether to answer with the last good response kept by the stale
+            cache of the client, if it has one, and refresh it in the
+            background when it is stale.
+            Meant for resources that change rarely and must answer fast.
+            See [](tdk.internal.cache.StaleCache).
+
+        :raises aiohttp.ClientResponseError:
+            If the server responded with an error status that is retried,
+            or a `5xx` status, and no retries are left.
+        :raises tdk.internal.resilience.CircuitOpenError:
+            If the circuit breaker of the client does not allow requests.
+        :raises tdk.internal.deadlines.DeadlineExceededError:
+            If the deadline of the call or the timeout of the client passes.
+        :raises ClientDrainingError:
+            If the client is draining, unless the request is made by a
+            dictionary function that was called before.
+        :raises RuntimeError: If the client is closed.
+        """
+        if self._closed:
+            raise RuntimeError("The client is closed")
+        stale_cache = self._stale_cache if stale_while_revalidate else None
+        dictionary = _current_dictionary.get()
+        if dictionary is not None:
+            return await self._get_json_traced(
+                url, params, conditional, stale_cache, dictionary
+            )
+        # Called directly, rather than by a dictionary function.
+        task = self._accept()
+        try:
+            return await run_with_deadline(
+                self._get_json_traced(
+                    url, params, conditional, stale_cache, get_endpoint(url)
+                ),
+                self._timeout,
+            )
+        finally:
+            self._finish(task)
+
+    async def _get_json_traced(
+        self,
+        url: str,
+        params: dict[str, Any] | None,
+        conditional: bool,
+        stale_cache: StaleCache | None,
+        dictionary: str,
+        /,
+    ) -> Any:
+        """Get a JSON document, recording the time spent for the profiler
+        and the slow-request log."""
+        trace = RequestTrace("off" if self._cache is None else "miss")
+        call = get_current_call()
+        decode_before = call.decode if call is not None else 0.0
+        error = None
+        start = time.perf_counter()
+        try:
+            if stale_cache is not None:
+                return await self._get_json_stale(
+                    stale_cache, url, params, conditional, dictionary, trace
+                )
+            _, data = await self._get_json(
+                url, params, conditional, dictionary, trace
+            )
+            return data
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            if call is not None:
+                # Everything but decoding is attributed to the transport.
+                call.transport += duration - (call.decode - decode_before)
+            if self._slow_log is not None and self._slow_log.should_record(
+                duration
+            ):
+                self._slow_log.record(
+                    SlowRequest(
+                        dictionary=dictionary,
+                        request=make_request_key(url, params),
+                        duration=duration,
+                        cache=trace.cache,
+                        retries=trace.retries,
+                        response_size=trace.response_size,
+                        phases=trace.phases,
+                        error=repr(error) if error is not None else None,
+                    )
+                )
+
+    async def _get_json_stale(
+        self,
+        stale_cache: StaleCache,
+        url: str,
+        params: dict[str, Any] | None,
+        conditional: bool,
+        dictionary: str,
+        trace: RequestTrace,
+        /,
+    ) -> Any:
+        """Get a JSON document from the stale cache, refreshing it in the
+        background if it is stale, or get it and keep it if it is missing."""
+        cache_key = make_cache_key(url, params)
+        kept = await stale_cache.get(cache_key)
+        if kept is None:
+            return await self._refresh_stale(
+                stale_cache, url, params, conditional, dictionary, trace
+            )
+        body, fresh = kept
+        if fresh:
+            trace.cache = "hit"
+        else:
+            trace.cache = "stale"
+            self._revalidate(
+                stale_cache, url, params, conditional, dictionary, cache_key
+            )
+        if self._metrics is not None:
+            self._metrics.cache_hits.labels(dictionary=dictionary).inc()
+        return _decode(body)
+
+    async def _refresh_stale(
+        self,
+        stale_cache: StaleCache,
+        url: str,
+        params: dict[str, Any] | None,
+        conditional: bool,
+        dictionary: str,
+        trace: RequestTrace,
+        /,
+        *,
+        use_cache: bool = True,
+    ) -> Any:
+        """Get a JSON document and keep it in the stale cache if it is
+        good."""
+        body, data = await self._get_json(
+            url, params, conditional, dictionary, trace, use_cache=use_cache
+        )
+        if data != NOT_FOUND:
+            await stale_cache.set(make_cache_key(url, params), body)
+        return data
+
+    def _revalidate(
+        self,
+        stale_cache: StaleCache,
+        url: str,
+        params: dict[str, Any] | None,
+        conditional: bool,
+        dictionary: str,
+        cache_key: str,
+        /,
+    ) -> None:
+        """Refresh a stale document in a background task, unless it is
+        being refreshed already or the client is draining."""
+        if cache_key in self._revalidations or self._draining:
+            return
+
+        async def revalidate() -> None:
+            # Refreshes are not urgent, and nobody waits for them.
+            with priority(Priority.BULK):
+                try:
+                    # The response cache would answer with the same
+                    # document, so it is only updated.
+                    await self._refresh_stale(
+                        stale_cache,
+                        url,
+                        params,
+                        conditional,
+                        dictionary,
+                        RequestTrace("off"),
+                        use_cache=False,
+                    )
+                except Exception:
+                    # The stale document keeps being served.
+                    stale_cache.failed_revalidations += 1
+
+        # Started in an empty context, so that the refresh is not bound by
+        # the deadline or recorded by the profiler of the call.
+        task = contextvars.Context().run(
+            asyncio.get_running_loop().create_task, revalidate()
+        )
+        self._revalidations[cache_key] = task
+        # Counted as a call, so that draining waits for it.
+        self._calls[task] = 1
+
+        def done(_: asyncio.Task) -> None:
+            del self._revalidations[cache_key]
+            self._finish(task)
+
+        task.add_done_callback(done)
+
+    async def _get_json(
+        self,
+        url: str,
+        params: dict[str, Any] | None,
+        conditional: bool,
+        dictionary: str,
+        trace: RequestTrace,
+        /,
+        *,
+        use_cache: bool = True,
+    ) -> tuple[bytes, Any]:
+        """Get a JSON document and its raw bytes, from the response cache or
+        the TDK servers.
+
+        If `use_cache` is false, the response cache is updated but not read.
+        """
+        metrics = self._metrics
+        cache_key = make_cache_key(url, params)
+        if self._cache is not None and use_cache:
+            cached = await self._cache.get(cache_key)
+            if cached is not None:
+                trace.cache = "hit"
+                if metrics is not None:
+                    metrics.cache_hits.labels(dictionary=dictionary).inc()
+                return cached, _decode(cached)
+            if metrics is not None:
+                metrics.cache_misses.labels(dictionary=dictionary).inc()
+
+        conditional_cache = self._conditional_cache if conditional else None
+        validators: Mapping[str, str] | None = None
+        kept_body: bytes | None = None
+        if conditional_cache is not None:
+            kept_copy = await conditional_cache.get(cache_key)
+            if kept_copy is not None:
+                validators, kept_body = kept_copy
+
+        def send() -> Awaitable[TransportResponse]:
+            return self._send(url, params, validators, dictionary)
+
+        async def attempt() -> tuple[bytes, Any, Mapping[str, str] | None]:
+            async with self._scheduler.slot():
+                if self._hedger is not None:
+                    response = await self._hedger.run(get_endpoint(url), send)
+                else:
+                    response = await send()
+                trace.response_size = len(response.body)
+                trace.phases = dict(response.timings or {})
+                # Raised in the slot, so that the scheduler sees the error.
+                if response.status >= 500 or (
+                    self._retry is not None
+                    and response.status in self._retry.retry_statuses
+                ):
+                    raise make_response_error(url, response)
+            if (
+                response.status == 304
+                and conditional_cache is not None
+                and kept_body is not None
+            ):
+                trace.cache = "not_modified"
+                conditional_cache.not_modified += 1
+                return kept_body, _decode(kept_body), None
+            if not 200 <= response.status < 300:
+                # Not retried, and not decoded, as error pages are not JSON.
+                raise make_response_error(url, response)
+            # The TDK servers label their JSON documents inconsistently,
+            # so the content type is not checked.
+            return response.body, _decode(response.body), response.headers
+
+        def on_retry(error: BaseException) -> None:
+            trace.retries += 1
+            if metrics is not None:
+                metrics.retries.labels(dictionary=dictionary).inc()
+
+        body, data, headers = await call_with_retries(
+            attempt,
+            policy=self._retry,
+            breaker=self._circuit_breaker,
+            on_retry=on_retry,
+        )
+        if self._cache is not None:
+            await self._cache.set(
+                cache_key,
+                body,
+                endpoint=get_endpoint(url),
+                not_found=data == NOT_FOUND,
+                dictionary=dictionary,
+            )
+        if conditional_cache is not None and headers is not None:
+            await conditional_cache.set(cache_key, body, headers=headers)
+        return body, data
+
+    async def _send(
+        self,
+        url: str,
+        params: dict[str, Any] | None,
+        headers: Mapping[str, str] | None,
+        dictionary: str,
+        /,
+    ) -> TransportResponse:
+        """Send one request with the transport, recording its metrics."""
+        metrics = self._metrics
+        if metrics is None:
+            return await self._transport.get(
+                url, params=params, headers=headers
+            )
+        metrics.in_flight.labels().inc()
+        try:
+            response = await self._transport.get(
+                url, params=params, headers=headers
+            )
+        except Exception:
+            metrics.requests.labels(dictionary=dictionary, status="error").inc()
+            raise
+        finally:
+            metrics.in_flight.labels().dec()
+        metrics.requests.labels(
+            dictionary=dictionary, status=str(response.status)
+        ).inc()
+        metrics.response_bytes.labels(dictionary=dictionary).inc(
+            len(response.body)
+        )
+        return response
+
+    # Dictionaries:
+
+    async def search_saying(
+        self, query: str, *, timeout: float | None = None
+    ) -> list[ads.SayingEntry]:
+        """Same as [](tdk.dictionaries.ads.search_saying)."""
+        return await ads.search_saying(query, client=self, timeout=timeout)
+
+    async def search_western(
+        self, query: str, *, timeout: float | None = None
+    ) -> list[bati.WesternEntry]:
+        """Same as [](tdk.dictionaries.bati.search_western)."""
+        return await bati.search_western(query, client=self, timeout=timeout)
+
+    async def get_terms_dictionaries(
+        self, *, timeout: float | None = None
+    ) -> list[bst.TermsDictionary]:
+        """Same as [](tdk.dictionaries.bst.get_terms_dictionaries)."""
+        return await bst.get_terms_dictionaries(client=self, timeout=timeout)
+
+    async def search_terms(
+        self,
+        dictionaries: Iterable[bst.TermsDictionary | bst.TermDictionaryName],
+        query: str,
+        *,
+        timeout: float | None = None,
+    ) -> list[bst.TermsEntry]:
+        """Same as [](tdk.dictionaries.bst.search_terms)."""
+        return await bst.search_terms(
+            dictionaries, query, client=self, timeout=timeout
+        )
+
+    async def search_derleme(
+        self, query: str, /, *, timeout: float | None = None
+    ) -> list[derleme.DerlemeEntry]:
+        """Same as [](tdk.dictionaries.derleme.search_derleme)."""
+        return await derleme.search_derleme(query, client=self, timeout=timeout)
+
+    async def get_etms_index(
+        self, *, timeout: float | None = None
+    ) -> list[str]:
+        """Same as [](tdk.dictionaries.etms.get_etms_index)."""
+        return await etms.get_etms_index(client=self, timeout=timeout)
+
+    async def search_etms(
+        self, query: str, /, *, timeout: float | None = None
+    ) -> list[etms.ETMSEntry]:
+        """Same as [](tdk.dictionaries.etms.search_etms)."""
+        return await etms.search_etms(query, client=self, timeout=timeout)
+
+    async def get_gts_index(self, *, timeout: float | None = None) -> list[str]:
+        """Same as [](tdk.dictionaries.gts.get_gts_index)."""
+        return await gts.get_gts_index(client=self, timeout=timeout)
+
+    async def get_gts_circumflex_index(
+        self, *, timeout: float | None = None
+    ) -> dict[str, str]:
+        """Same as [](tdk.dictionaries.gts.get_gts_circumflex_index)."""
+        return await gts.get_gts_circumflex_index(client=self, timeout=timeout)
+
+    async def search_gts(
+        self, query: str, /, *, timeout: float | None = None
+    ) -> list[gts.GTSEntry]:
+        """Same as [](tdk.dictionaries.gts.search_gts)."""
+        return await gts.search_gts(query, client=self, timeout=timeout)
+
+    async def search_gts_proverbs_and_phrases(
+        self, query: str, /, *, timeout: float | None = None
+    ) -> list[gts.GTSEntry]:
+        """Same as [](tdk.dictionaries.gts.search_gts_proverbs_and_phrases)."""
+        return await gts.search_gts_proverbs_and_phrases(
+            query, client=self, timeout=timeout
+        )
+
+    async def get_gts_suggestions(
+        self, query: str, /, *, timeout: float | None = None
+    ) -> list[str]:
+        """Same as [](tdk.dictionaries.gts.get_gts_suggestions)."""
+        return await gts.get_gts_suggestions(
+            query, client=self, timeout=timeout
+        )
+
+    async def search_names(
+        self,
+        query: str,
+        *,
+        according_to: kisi.NameSearchField | Literal["name", "meaning"],
+        gender: (
+            kisi.NameSearchGender
+            | Literal["female", "male", "unisex", "either"]
+        ),
+        timeout: float | None = None,
+    ) -> list[kisi.NameEntry]:
+        """Same as [](tdk.dictionaries.kisi.search_names)."""
+        return await kisi.search_names(
+            query,
+            according_to=according_to,
+            gender=gender,
+            client=self,
+            timeout=timeout,
+        )
+
+    async def search_lehce(
+        self, lehce: lehce.Lehce, query: str, *, timeout: float | None = None
+    ) -> list[lehce.LehceEntry]:
+        """Same as [](tdk.dictionaries.lehce.search_lehce)."""
+        # The parameter shadows the module, as in the module-level function.
+        return await search_lehce(lehce, query, client=self, timeout=timeout)
+
+    async def search_sks(
+        self, query: str, /, *, timeout: float | None = None
+    ) -> list[sks.SKSEntry]:
+        """Same as [](tdk.dictionaries.sks.search_sks)."""
+        return await sks.search_sks(query, client=self, timeout=timeout)
+
+    async def search_syyd(
+        self, query: str, /, *, timeout: float | None = None
+    ) -> list[syyd.SYYDEntry]:
+        """Same as [](tdk.dictionaries.syyd.search_syyd)."""
+        return await syyd.search_syyd(query, client=self, timeout=timeout)
+
+    async def search_tarama(
+        self, query: str, /, *, timeout: float | None = None
+    ) -> list[ts.TaramaEntry]:
+        """Same as [](tdk.dictionaries.ts.search_tarama)."""
+        return await ts.search_tarama(query, client=self, timeout=timeout)
+
+    async def get_tarama_scans(
+        self, tdk_id: int, /, *, timeout: float | None = None
+    ) -> list[ts.TaramaScan]:
+        """Same as [](tdk.dictionaries.ts.get_tarama_scans)."""
+        return await ts.get_tarama_scans(tdk_id, client=self, timeout=timeout)
+
+    async def search_spelling(
+        self, query: str, /, *, timeout: float | None = None
+    ) -> list[yazim.SpellingEntry]:
+        """Same as [](tdk.dictionaries.yazim.search_spelling)."""
+        return await yazim.search_spelling(query, client=self, timeout=timeout)
+
+    async def search_loanwords(
+        self, query: str, *, timeout: float | None = None
+    ) -> list[ysk.LoanwordEntry]:
+        """Same as [](tdk.dictionaries.ysk.search_loanwords)."""
+        return await ysk.search_loanwords(query, client=self, timeout=timeout)
+
+    async def get_homepage_content(
+        self, *, timeout: float | None = None
+    ) -> home.HomepageContent:
+        """Same as [](tdk.home.get_homepage_content)."""
+        return await home.get_homepage_content(client=self, timeout=timeout)
+
+
+_default_clients: dict[
+    asyncio.AbstractEventLoop, tuple[TDKClient, AsyncGenerator[None, None]]
+] = {}
+
+
+async def _close_at_shutdown(
+    loop: asyncio.AbstractEventLoop, client: TDKClient
+) -> AsyncGenerator[None, None]:
+    """Close the default client of `loop` when the loop shuts down its
+    asynchronous generators, as [](asyncio.run) does before closing it."""
+    try:
+        yield
+    finally:
+        if _default_clients.get(loop, (None,))[0] is client:
+            del _default_clients[loop]
+        await client.close()
+
+
+def get_default_client() -> TDKClient:
+    """Get the default client of the running event loop.
+
+    The client is created on first use and reused by every module-level
+    function that is not given a client or a session, so that they share
+    one pool of connections.
+
+    The client is closed when the loop shuts down its asynchronous
+    generators, which [](asyncio.run) does before closing the loop.
+    Loops that are run and closed by hand should call
+    [](asyncio.AbstractEventLoop.shutdown_asyncgens) or
+    [](close_default_client) before they are closed.
+    The synchronous functions run on a background loop whose default client
+    is closed when the interpreter exits.
+    See [](tdk.internal.utils.get_background_loop).
+
+    :raises RuntimeError: If there is no running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client, _ = _default_clients.get(loop, (None, None))
+    if client is None or client.closed:
+        for stale_loop in [l for l in _default_clients if l.is_closed()]:
+            del _default_clients[stale_loop]
+        client = TDKClient()
+        closer = _close_at_shutdown(loop, client)
+        # Run the generator up to its yield. Its first step registers it
+        # with the loop, which only keeps a weak reference to it.
+        try:
+            closer.asend(None).send(None)
+        except StopIteration:
+            pass
+        _default_clients[loop] = client, closer
+    return client
+
+
+async def close_default_client() -> None:
+    """Close the default client of the running event loop, if it exists."""
+    client, _ = _default_clients.pop(asyncio.get_running_loop(), (None, None))
+    if client is not None:
+        await client.close()
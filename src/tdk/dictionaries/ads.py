@@ -3,12 +3,16 @@ Proverbs and Phrases Dictionary
 """
 
 from enum import Enum
+from typing import TYPE_CHECKING
 
 from pydantic import BaseModel, AliasChoices, Field, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "SayingType",
@@ -36,16 +40,18 @@ class SayingEntry(BaseModel):
 saying_entry_adapter = TypeAdapter(list[SayingEntry])
 
 
-@make_http_session_optional
-async def search_saying(query: str, *, http_session) -> list[SayingEntry]:
-    async with http_session.get(
-        "https://sozluk.gov.tr/atasozu", params={"ara": query}
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if isinstance(res_data, list):
-            return saying_entry_adapter.validate_python(res_data)
-        assert_not_found(res_data)
-        return []
+@make_client_optional
+async def search_saying(
+    query: str, *, client: "TDKClient"
+) -> list[SayingEntry]:
+    res_data = await client.get_json(
+        "https://sozluk.gov.tr/atasozu",
+        params={"ara": query},
+    )
+    if isinstance(res_data, list):
+        return saying_entry_adapter.validate_python(res_data)
+    assert_not_found(res_data)
+    return []
 
 
 @make_sync(search_saying)
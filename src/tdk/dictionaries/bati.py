@@ -2,11 +2,16 @@
 Words of Western Origin Dictionary
 """
 
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel, Field, AliasChoices, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "WesternEntry",
@@ -30,16 +35,18 @@ class WesternEntry(BaseModel):
 western_entry_list_adapter = TypeAdapter(list[WesternEntry])
 
 
-@make_http_session_optional
-async def search_western(query: str, *, http_session) -> list[WesternEntry]:
-    async with http_session.get(
-        "https://sozluk.gov.tr/bati", params={"ara": query}
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if isinstance(res_data, list):
-            return western_entry_list_adapter.validate_python(res_data)
-        assert_not_found(res_data)
-        return []
+@make_client_optional
+async def search_western(
+    query: str, *, client: "TDKClient"
+) -> list[WesternEntry]:
+    res_data = await client.get_json(
+        "https://sozluk.gov.tr/bati",
+        params={"ara": query},
+    )
+    if isinstance(res_data, list):
+        return western_entry_list_adapter.validate_python(res_data)
+    assert_not_found(res_data)
+    return []
 
 
 @make_sync(search_western)
@@ -3,14 +3,16 @@ Science and Art Terms Dictionary
 """
 
 from collections.abc import Iterable
-from typing import NewType
+from typing import NewType, TYPE_CHECKING
 
-from aiohttp import ClientSession
 from pydantic import BaseModel, Field, AliasChoices, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import IntOrNone, make_sync, StrOrNone, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 TermDictionaryName = NewType("TermDictionaryName", str)
 
 
@@ -34,14 +36,16 @@ class TermsDictionary(BaseModel):
     )
 
 
-@make_http_session_optional
+@make_client_optional
 async def get_terms_dictionaries(
-    *, http_session: ClientSession
+    *, client: "TDKClient"
 ) -> list[TermsDictionary]:
-    async with http_session.get("https://sozluk.gov.tr/terim?terim") as res:
-        return TypeAdapter(list[TermsDictionary]).validate_python(
-            await res.json(content_type="text/html; charset=utf-8")
+    return TypeAdapter(list[TermsDictionary]).validate_python(
+        await client.get_json(
+            "https://sozluk.gov.tr/terim?terim",
+            stale_while_revalidate=True,
         )
+    )
 
 
 @make_sync(get_terms_dictionaries)
@@ -89,12 +93,12 @@ HTS = "Hemşirelik Terimleri Sözlüğü"
 UMS = "Uluslararası Metroloji Sözlüğü"
 
 
-@make_http_session_optional
+@make_client_optional
 async def search_terms(
     dictionaries: Iterable[TermsDictionary | TermDictionaryName],
     query: str,
     *,
-    http_session: ClientSession
+    client: "TDKClient"
 ) -> list[TermsEntry]:
     # Doesn't search pharmaceutics and nursing dictionaries.
     dictionary_names: tuple[str, ...] = tuple(
@@ -102,50 +106,49 @@ async def search_terms(
     )
     terms: list[TermsEntry] = []
     if IETS in dictionary_names:
-        async with http_session.get(
-            "https://sozluk.gov.tr/eczacilik", params={"ara": query}
-        ) as res:
-            res_data = await res.json(content_type="text/html; charset=utf-8")
-            if isinstance(res_data, list):
-                for term in res_data:
-                    term["dictionary_name"] = IETS
-                terms.extend(term_list_adapter.validate_python(res_data))
-            else:
-                assert_not_found(res_data)
+        res_data = await client.get_json(
+            "https://sozluk.gov.tr/eczacilik",
+            params={"ara": query},
+        )
+        if isinstance(res_data, list):
+            for term in res_data:
+                term["dictionary_name"] = IETS
+            terms.extend(term_list_adapter.validate_python(res_data))
+        else:
+            assert_not_found(res_data)
     if HTS in dictionary_names:
-        async with http_session.get(
-            "https://sozluk.gov.tr/hemsirelik", params={"ara": query}
-        ) as res:
-            res_data = await res.json(content_type="text/html; charset=utf-8")
-            if isinstance(res_data, list):
-                for term in res_data:
-                    term["dictionary_name"] = HTS
-                terms.extend(term_list_adapter.validate_python(res_data))
-            else:
-                assert_not_found(res_data)
+        res_data = await client.get_json(
+            "https://sozluk.gov.tr/hemsirelik",
+            params={"ara": query},
+        )
+        if isinstance(res_data, list):
+            for term in res_data:
+                term["dictionary_name"] = HTS
+            terms.extend(term_list_adapter.validate_python(res_data))
+        else:
+            assert_not_found(res_data)
     if UMS in dictionary_names:
-        async with http_session.get(
-            "https://sozluk.gov.tr/metroloji", params={"ara": query}
-        ) as res:
-            res_data = await res.json(content_type="text/html; charset=utf-8")
-            if isinstance(res_data, list):
-                for term in res_data:
-                    term["dictionary_name"] = UMS
-                terms.extend(term_list_adapter.validate_python(res_data))
-            else:
-                assert_not_found(res_data)
-    async with http_session.get(
+        res_data = await client.get_json(
+            "https://sozluk.gov.tr/metroloji",
+            params={"ara": query},
+        )
+        if isinstance(res_data, list):
+            for term in res_data:
+                term["dictionary_name"] = UMS
+            terms.extend(term_list_adapter.validate_python(res_data))
+        else:
+            assert_not_found(res_data)
+    res_data = await client.get_json(
         "https://sozluk.gov.tr/terim",
         params={
             "eser_ad": "@".join(dictionary_names),
             "ara": query,
         },
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if isinstance(res_data, list):
-            terms.extend(term_list_adapter.validate_python(res_data))
-        else:
-            assert_not_found(res_data)
+    )
+    if isinstance(res_data, list):
+        terms.extend(term_list_adapter.validate_python(res_data))
+    else:
+        assert_not_found(res_data)
     return term_list_adapter.validate_python(terms)
 
 
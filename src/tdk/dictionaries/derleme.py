@@ -2,12 +2,16 @@
 Compilation Dictionary (Turkish Dialects Dictionary)
 """
 
-from aiohttp import ClientSession
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel, Field, AliasChoices, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import StrOrNone, make_sync, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "DerlemeEntry",
@@ -62,18 +66,18 @@ class DerlemeEntry(BaseModel):
 derleme_entry_list_adapter = TypeAdapter(list[DerlemeEntry])
 
 
-@make_http_session_optional
+@make_client_optional
 async def search_derleme(
-    query: str, /, *, http_session: ClientSession
+    query: str, /, *, client: "TDKClient"
 ) -> list[DerlemeEntry]:
-    async with http_session.get(
-        "https://sozluk.gov.tr/derleme", params={"ara": query}
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if isinstance(res_data, list):
-            return derleme_entry_list_adapter.validate_python(res_data)
-        assert_not_found(res_data)
-        return []
+    res_data = await client.get_json(
+        "https://sozluk.gov.tr/derleme",
+        params={"ara": query},
+    )
+    if isinstance(res_data, list):
+        return derleme_entry_list_adapter.validate_python(res_data)
+    assert_not_found(res_data)
+    return []
 
 
 @make_sync(search_derleme)
@@ -2,13 +2,17 @@
 Etymology Dictionary
 """
 
-from aiohttp import ClientSession
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel, Field, AliasChoices, TypeAdapter
 
 from tdk.tools import dictionary_order
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync, StrOrNone, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "ETMSEntry",
@@ -19,15 +23,12 @@ __all__ = [
 ]
 
 
-@make_http_session_optional
-async def get_etms_index(*, http_session: ClientSession) -> list[str]:
-    async with http_session.get(
-            "https://sozluk.gov.tr/etmsAutoComp.json"
-    ) as response:
-        return sorted(
-            [entry["madde"] for entry in await response.json()],
-            key=dictionary_order,
-        )
+@make_client_optional
+async def get_etms_index(*, client: "TDKClient") -> list[str]:
+    index = await client.get_json(
+        "https://sozluk.gov.tr/etmsAutoComp.json", conditional=True
+    )
+    return sorted([entry["madde"] for entry in index], key=dictionary_order)
 
 
 @make_sync(get_etms_index)
@@ -77,18 +78,18 @@ class ETMSEntry(BaseModel):
 etms_entry_list_adapter = TypeAdapter(list[ETMSEntry])
 
 
-@make_http_session_optional
+@make_client_optional
 async def search_etms(
-    query: str, /, *, http_session: ClientSession
+    query: str, /, *, client: "TDKClient"
 ) -> list[ETMSEntry]:
-    async with http_session.get(
-        "https://sozluk.gov.tr/etms", params={"ara": query}
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if isinstance(res_data, list):
-            return etms_entry_list_adapter.validate_python(res_data)
-        assert_not_found(res_data)
-        return []
+    res_data = await client.get_json(
+        "https://sozluk.gov.tr/etms",
+        params={"ara": query},
+    )
+    if isinstance(res_data, list):
+        return etms_entry_list_adapter.validate_python(res_data)
+    assert_not_found(res_data)
+    return []
 
 
 @make_sync(search_etms)
@@ -3,15 +3,18 @@ Updated Turkish Dictionary
 """
 
 from json import JSONDecodeError
+from typing import TYPE_CHECKING
 
-from aiohttp import ClientSession
 from pydantic import TypeAdapter, BaseModel, Field, AliasChoices
 
 from tdk.enums import OriginLanguage
 from tdk.tools import lowercase, dictionary_order
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync, assert_not_found, ValidatedProperty
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "GTSEntry",
@@ -112,96 +115,89 @@ class GTSEntry(BaseModel):
 entry_list_adapter = TypeAdapter(list[GTSEntry])
 
 
-@make_http_session_optional
-async def get_gts_index(*, http_session: ClientSession) -> list[str]:
-    async with http_session.get(
-        "https://sozluk.gov.tr/autocomplete.json"
-    ) as response:
-        return sorted(
-            [entry["madde"] for entry in await response.json()],
-            key=dictionary_order,
-        )
+@make_client_optional
+async def get_gts_index(*, client: "TDKClient") -> list[str]:
+    index = await client.get_json(
+        "https://sozluk.gov.tr/autocomplete.json", conditional=True
+    )
+    return sorted([entry["madde"] for entry in index], key=dictionary_order)
 
 
 @make_sync(get_gts_index)
 def get_gts_index_sync(): ...
 
 
-@make_http_session_optional
-async def get_gts_circumflex_index(
-    *, http_session: ClientSession
-) -> dict[str, str]:
+@make_client_optional
+async def get_gts_circumflex_index(*, client: "TDKClient") -> dict[str, str]:
     """Get the circumflex index.
 
     :returns: A dictionary where the keys are entries without circumflex,
               and the values are the entries with.
     """
-    async with http_session.get(
-        "https://sozluk.gov.tr/assets/js/autocompleteSapka.json"
-    ) as response:
-        return await response.json()
+    return await client.get_json(
+        "https://sozluk.gov.tr/assets/js/autocompleteSapka.json",
+        conditional=True,
+    )
 
 
 @make_sync(get_gts_circumflex_index)
 def get_gts_circumflex_index_sync(): ...
 
 
-@make_http_session_optional
-async def search_gts(query: str, /, *, http_session: ClientSession) -> list[GTSEntry]:
+@make_client_optional
+async def search_gts(query: str, /, *, client: "TDKClient") -> list[GTSEntry]:
     query = lowercase(query, keep_nonletters=False)
-    async with http_session.get(
-        "https://sozluk.gov.tr/gts", params={"ara": query}
-    ) as response:
-        words = await response.json(content_type="text/html; charset=utf-8")
-        if isinstance(words, list):
-            return entry_list_adapter.validate_python(words)
-        assert_not_found(words)
-        return []
+    words = await client.get_json(
+        "https://sozluk.gov.tr/gts",
+        params={"ara": query},
+    )
+    if isinstance(words, list):
+        return entry_list_adapter.validate_python(words)
+    assert_not_found(words)
+    return []
 
 
 @make_sync(search_gts)
 def search_gts_sync(): ...
 
 
-@make_http_session_optional
+@make_client_optional
 async def search_gts_proverbs_and_phrases(
-    query: str, /, *, http_session: ClientSession
+    query: str, /, *, client: "TDKClient"
 ) -> list[GTSEntry]:
     query = lowercase(query, keep_nonletters=False)
-    async with http_session.get(
-        "https://sozluk.gov.tr/gtsAtasozDeyim", params={"ara": query}
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if isinstance(res_data, list):
-            return entry_list_adapter.validate_python(res_data)
-        assert_not_found(res_data)
-        return []
+    res_data = await client.get_json(
+        "https://sozluk.gov.tr/gtsAtasozDeyim",
+        params={"ara": query},
+    )
+    if isinstance(res_data, list):
+        return entry_list_adapter.validate_python(res_data)
+    assert_not_found(res_data)
+    return []
 
 
 @make_sync(search_gts_proverbs_and_phrases)
 def search_gts_proverbs_and_phrases_sync(): ...
 
 
-@make_http_session_optional
+@make_client_optional
 async def get_gts_suggestions(
-    query: str, /, *, http_session: ClientSession
+    query: str, /, *, client: "TDKClient"
 ) -> list[str]:
-    async with http_session.get(
-        "https://sozluk.gov.tr/oneri", params={"soz": query}
-    ) as response:
-        try:
-            return [
-                entry["madde"]
-                for entry in await response.json(
-                    content_type="text/html; charset=utf-8"
-                )
-            ]
-        except JSONDecodeError as e:
-            raise RuntimeError(
-                "The server returned an invalid response: "
-                "https://github.com/emreozcan/tdk-py/issues/2"
-                "#issuecomment-1153257967"
-            ) from e
+    try:
+        return [
+            entry["madde"]
+            for entry in await client.get_json(
+                "https://sozluk.gov.tr/oneri",
+                params={"soz": query},
+            )
+        ]
+    except JSONDecodeError as e:
+        raise RuntimeError(
+            "The server returned an invalid response: "
+            "https://github.com/emreozcan/tdk-py/issues/2"
+            "#issuecomment-1153257967"
+        ) from e
 
 
 @make_sync(get_gts_suggestions)
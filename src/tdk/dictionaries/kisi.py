@@ -3,14 +3,16 @@ Person Name Dictionary
 """
 
 from enum import IntEnum
-from typing import Literal
+from typing import Literal, TYPE_CHECKING
 
-from aiohttp import ClientSession
 from pydantic import BaseModel, Field, AliasChoices, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync, adapt_input_to_enum, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "NameSearchGender",
@@ -51,7 +53,7 @@ class NameEntry(BaseModel):
 name_list_adapter = TypeAdapter(list[NameEntry])
 
 
-@make_http_session_optional
+@make_client_optional
 async def search_names(
     query: str,
     *,
@@ -60,21 +62,20 @@ async def search_names(
             NameSearchGender
             | Literal["female", "male", "unisex", "either"]
     ),
-    http_session: ClientSession,
+    client: "TDKClient",
 ) -> list[NameEntry]:
-    async with http_session.get(
+    res_data = await client.get_json(
         "https://sozluk.gov.tr/adlar",
         params={
             "ara": query,
             "gore": adapt_input_to_enum(according_to, NameSearchField),
             "cins": adapt_input_to_enum(gender, NameSearchGender),
         },
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if not isinstance(res_data, list):
-            assert_not_found(res_data)
-            return []
-        return name_list_adapter.validate_python(res_data)
+    )
+    if not isinstance(res_data, list):
+        assert_not_found(res_data)
+        return []
+    return name_list_adapter.validate_python(res_data)
 
 
 @make_sync(search_names)
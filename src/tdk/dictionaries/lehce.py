@@ -3,13 +3,16 @@ Turkic Languages Dictionary
 """
 
 from enum import IntEnum
+from typing import TYPE_CHECKING
 
-from aiohttp import ClientSession
 from pydantic import BaseModel, Field, AliasChoices, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "Lehce",
@@ -110,18 +113,17 @@ class LehceEntry(BaseModel):
 lehce_entry_list_adapter = TypeAdapter(list[LehceEntry])
 
 
-@make_http_session_optional
+@make_client_optional
 async def search_lehce(
-    lehce: Lehce, query: str, *, http_session: ClientSession
+    lehce: Lehce, query: str, *, client: "TDKClient"
 ) -> list[LehceEntry]:
-    async with http_session.get(
-        f"https://sozluk.gov.tr/lehce?lehce={lehce}&ara={query}"
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if isinstance(res_data, list):
-            return lehce_entry_list_adapter.validate_python(res_data)
-        assert_not_found(res_data)
-        return []
+    res_data = await client.get_json(
+        f"https://sozluk.gov.tr/lehce?lehce={lehce}&ara={query}",
+    )
+    if isinstance(res_data, list):
+        return lehce_entry_list_adapter.validate_python(res_data)
+    assert_not_found(res_data)
+    return []
 
 
 @make_sync(search_lehce)
@@ -2,12 +2,16 @@
 Frequently Confused Words Guide
 """
 
-from aiohttp import ClientSession
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import SoundURL, make_sync, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "SKSWord",
@@ -31,37 +35,34 @@ class SKSEntry(BaseModel):
     search: str
 
 
-@make_http_session_optional
-async def search_sks(
-    query: str, /, *, http_session: ClientSession
-) -> list[SKSEntry]:
-    async with http_session.get(
+@make_client_optional
+async def search_sks(query: str, /, *, client: "TDKClient") -> list[SKSEntry]:
+    resp_data = await client.get_json(
         "https://sozluk.gov.tr/kilavuz",
         params={"prm": "sks", "ara": query},
-    ) as resp:
-        resp_data = await resp.json()
-        if not isinstance(resp_data, dict):
-            assert_not_found(resp_data)
-            return []
-        return [
-            SKSEntry(
-                tdk_id=f["id"],
-                word_1=SKSWord(
-                    word=f["kelime1"],
-                    # eskelime=f["eskelime1"],
-                    meaning_html=f["anlam1"],
-                    sound_url=f["ses1"],
-                ),
-                word_2=SKSWord(
-                    word=f["kelime2"],
-                    # eskelime=f["eskelime2"],
-                    meaning_html=f["anlam2"],
-                    sound_url=f["ses2"],
-                ),
-                search=f["arama"],
-            )
-            for f in resp_data
-        ]
+    )
+    if not isinstance(resp_data, list):
+        assert_not_found(resp_data)
+        return []
+    return [
+        SKSEntry(
+            tdk_id=f["id"],
+            word_1=SKSWord(
+                word=f["kelime1"],
+                # eskelime=f["eskelime1"],
+                meaning_html=f["anlam1"],
+                sound_url=f["ses1"],
+            ),
+            word_2=SKSWord(
+                word=f["kelime2"],
+                # eskelime=f["eskelime2"],
+                meaning_html=f["anlam2"],
+                sound_url=f["ses2"],
+            ),
+            search=f["arama"],
+        )
+        for f in resp_data
+    ]
 
 
 @make_sync(search_sks)
@@ -2,11 +2,16 @@
 Frequently Made Mistakes Guide
 """
 
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel, AliasChoices, Field, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import SoundURL, make_sync
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "SYYDEntry",
@@ -36,17 +41,16 @@ class SYYDEntry(BaseModel):
 syyd_entry_list_adapter = TypeAdapter(list[SYYDEntry])
 
 
-@make_http_session_optional
-async def search_syyd(query: str, /, *, http_session) -> list[SYYDEntry]:
-    async with http_session.get(
+@make_client_optional
+async def search_syyd(query: str, /, *, client: "TDKClient") -> list[SYYDEntry]:
+    res_data = await client.get_json(
         "https://sozluk.gov.tr/kilavuz",
         params={"prm": "syyd", "ara": query},
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if isinstance(res_data, list):
-            return syyd_entry_list_adapter.validate_python(res_data)
-        assert res_data == {"error": "Sonuç bulunamadı"}
-        return []
+    )
+    if isinstance(res_data, list):
+        return syyd_entry_list_adapter.validate_python(res_data)
+    assert res_data == {"error": "Sonuç bulunamadı"}
+    return []
 
 
 @make_sync(search_syyd)
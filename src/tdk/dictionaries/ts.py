@@ -2,12 +2,16 @@
 Scans Dictionary
 """
 
-from aiohttp import ClientSession
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel, Field, AliasChoices, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "TaramaScan",
@@ -42,38 +46,36 @@ class TaramaEntry(BaseModel):
 tarama_entry_list_adapter = TypeAdapter(list[TaramaEntry])
 
 
-@make_http_session_optional
+@make_client_optional
 async def search_tarama(
-    query: str, /, *, http_session: ClientSession
+    query: str, /, *, client: "TDKClient"
 ) -> list[TaramaEntry]:
-    async with http_session.get(
+    resp_data = await client.get_json(
         "https://sozluk.gov.tr/tarama",
         params={"ara": query},
-    ) as resp:
-        resp_data = await resp.json()
-        if not isinstance(resp_data, list):
-            assert resp_data == {"error": "Sonuç bulunamadı"}
-            return []
-        return tarama_entry_list_adapter.validate_python(resp_data)
+    )
+    if not isinstance(resp_data, list):
+        assert resp_data == {"error": "Sonuç bulunamadı"}
+        return []
+    return tarama_entry_list_adapter.validate_python(resp_data)
 
 
 @make_sync(search_tarama)
 def search_tarama_sync(): ...
 
 
-@make_http_session_optional
+@make_client_optional
 async def get_tarama_scans(
-    tdk_id: int, /, *, http_session: ClientSession
+    tdk_id: int, /, *, client: "TDKClient"
 ) -> list[TaramaScan]:
-    async with http_session.get(
+    resp_data = await client.get_json(
         "https://sozluk.gov.tr/taramaId",
         params={"id": tdk_id},
-    ) as resp:
-        resp_data = await resp.json()
-        if not isinstance(resp_data, list):
-            assert_not_found(resp_data)
-            return []
-        return tarama_scan_list_adapter.validate_python(resp_data)
+    )
+    if not isinstance(resp_data, list):
+        assert_not_found(resp_data)
+        return []
+    return tarama_scan_list_adapter.validate_python(resp_data)
 
 
 @make_sync(get_tarama_scans)
@@ -4,12 +4,16 @@ Spelling Guide
 Not accessible from TDK's website.
 """
 
-from aiohttp import ClientSession
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel, Field, AliasChoices, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync, SoundURL, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "SpellingEntry",
@@ -30,19 +34,18 @@ class SpellingEntry(BaseModel):
 spelling_entry_list_adapter = TypeAdapter(list[SpellingEntry])
 
 
-@make_http_session_optional
+@make_client_optional
 async def search_spelling(
-    query: str, /, *, http_session: ClientSession
+    query: str, /, *, client: "TDKClient"
 ) -> list[SpellingEntry]:
-    async with http_session.get(
+    res_data = await client.get_json(
         "https://sozluk.gov.tr/yazim",
         params={"ara": query},
-    ) as res:
-        res_data = await res.json(content_type="text/html; charset=utf-8")
-        if not isinstance(res_data, list):
-            assert_not_found(res_data)
-            return []
-        return spelling_entry_list_adapter.validate_python(res_data)
+    )
+    if not isinstance(res_data, list):
+        assert_not_found(res_data)
+        return []
+    return spelling_entry_list_adapter.validate_python(res_data)
 
 
 @make_sync(search_spelling)
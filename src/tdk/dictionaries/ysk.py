@@ -2,12 +2,16 @@
 Equivalents for Foreign Words Guide
 """
 
-from aiohttp import ClientSession
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel, Field, AliasChoices, TypeAdapter
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync, assert_not_found
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "LoanwordEntry",
@@ -30,18 +34,17 @@ loanword_entry_list_adapter = TypeAdapter(list[LoanwordEntry])
 
 
 # query: abone
-@make_http_session_optional
-async def search_loanwords(query: str, *, http_session: ClientSession) \
+@make_client_optional
+async def search_loanwords(query: str, *, client: "TDKClient") \
         -> list[LoanwordEntry]:
-    async with http_session.get(
+    res_data = await client.get_json(
         "https://sozluk.gov.tr/kilavuz",
         params={"prm": "ysk", "ara": query},
-    ) as res:
-        res_data = await res.json()
-        if not isinstance(res_data, list):
-            assert_not_found(res_data)
-            return []
-        return loanword_entry_list_adapter.validate_python(res_data)
+    )
+    if not isinstance(res_data, list):
+        assert_not_found(res_data)
+        return []
+    return loanword_entry_list_adapter.validate_python(res_data)
 
 
 @make_sync(search_loanwords)
@@ -1,12 +1,14 @@
-from typing import Annotated
+from typing import Annotated, TYPE_CHECKING
 
-from aiohttp import ClientSession
 from pydantic import BaseModel, Field, AliasChoices, BeforeValidator
 
-from tdk.internal.http import make_http_session_optional
+from tdk.internal.http import make_client_optional
 from tdk.internal.utils import make_sync
 from tdk.dictionaries.ysk import LoanwordEntry
 
+if TYPE_CHECKING:
+    from tdk.client import TDKClient
+
 
 __all__ = [
     "HomepageMixup",
@@ -85,14 +87,14 @@ class HomepageContent(BaseModel):
     )
 
 
-@make_http_session_optional
-async def get_homepage_content(
-    *, http_session: ClientSession
-) -> HomepageContent:
-    async with http_session.get("https://sozluk.gov.tr/icerik") as response:
-        return HomepageContent.model_validate(
-            await response.json(content_type="text/html; charset=utf-8")
+@make_client_optional
+async def get_homepage_content(*, client: "TDKClient") -> HomepageContent:
+    return HomepageContent.model_validate(
+        await client.get_json(
+            "https://sozluk.gov.tr/icerik",
+            stale_while_revalidate=True,
         )
+    )
 
 
 @make_sync(get_homepage_content)
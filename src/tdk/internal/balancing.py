@@ -0,0 +1,285 @@
+"""
+This module provides the spreading of requests over several upstreams,
+such as caching reverse proxies in front of the TDK servers.
+
+A [](BalancedTransport) sends every request to the healthy upstream with the
+fewest requests in flight, so a slow upstream gets fewer requests, and
+moves a request to another upstream if the one it was sent to fails.
+
+```python
+from tdk.client import BalancingPolicy, TDKClient
+
+client = TDKClient(
+    base_url=["http://proxy-1.internal:8080", "http://proxy-2.internal:8080"],
+    balancing=BalancingPolicy(health_check_interval=5.0),
+)
+```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from aiohttp import ClientConnectionError
+from pydantic import BaseModel, ConfigDict, Field
+
+from tdk.internal.http import Transport, TransportResponse, rebase_url
+from tdk.internal.tracing import LatencyRecorder
+
+
+__all__ = [
+    "BalancingPolicy",
+    "UpstreamStats",
+    "BalancedTransport",
+]
+
+_logger = logging.getLogger(__name__)
+
+
+class BalancingPolicy(BaseModel):
+    """How a [](BalancedTransport) judges its upstreams.
+
+    The fields are the keyword arguments of [](BalancedTransport).
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    max_failures: int = Field(default=3, ge=1)
+    """Number of consecutive failures after which an upstream is ejected."""
+    ejection_time: float = Field(default=10.0, ge=0)
+    """Number of seconds an upstream is ejected for."""
+    health_check_interval: float | None = Field(default=None, gt=0)
+    """Number of seconds between active health checks, or [](None) to only
+    judge upstreams by the requests sent to them."""
+    health_check_path: str = "/"
+    """The path and query that are requested to check an upstream."""
+
+
+class UpstreamStats(BaseModel):
+    """A snapshot of the state of an upstream of a [](BalancedTransport)."""
+
+    url: str
+    """The origin of the upstream."""
+    healthy: bool
+    """Whether the upstream receives requests."""
+    outstanding: int
+    """Number of requests in flight to the upstream."""
+    requests: int
+    """Number of requests sent to the upstream."""
+    failures: int
+    """Number of requests to the upstream that failed."""
+
+
+class _Upstream:
+    """An upstream, and how it has been answering."""
+
+    __slots__ = (
+        "url",
+        "outstanding",
+        "requests",
+        "failures",
+        "consecutive_failures",
+        "ejected_until",
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+
+def _is_upstream_failure(error: BaseException, /) -> bool:
+    return isinstance(error, (ClientConnectionError, asyncio.TimeoutError))
+
+
+class BalancedTransport:
+    """Spreads the requests of another transport over several upstreams.
+
+    Each request goes to the healthy upstream with the fewest requests in
+    flight ("least outstanding requests").
+    A request that fails to connect, times out or gets a `5xx` response is
+    sent to another upstream, until every upstream has been tried.
+    An upstream that fails `max_failures` times in a row is ejected for
+    `ejection_time` seconds, and it is ejected again as soon as it fails
+    after coming back.
+    If every upstream is ejected, the one that comes back first is used.
+
+    :param inner:
+        The transport that performs the requests,
+        without a base URL of its own.
+    :param upstreams: The origins of the upstreams. See [](rebase_url).
+    :param max_failures:
+        Number of consecutive failures after which an upstream is ejected.
+    :param ejection_time: Number of seconds an upstream is ejected for.
+    :param health_check_interval:
+        Number of seconds between active health checks, or [](None) to
+        only judge upstreams by the requests sent to them.
+        See [](BalancedTransport.check_health).
+        Checks that fail for another reason than an upstream failure are
+        logged, and checked again after the next interval.
+    :param health_check_path:
+        The path and query that are requested to check an upstream.
+
+    :raises ValueError: If no upstreams are given.
+    """
+
+    def __init__(
+        self,
+        inner: Transport,
+        upstreams: Sequence[str],
+        *,
+        max_failures: int = 3,
+        ejection_time: float = 10.0,
+        health_check_interval: float | None = None,
+        health_check_path: str = "/",
+    ):
+        if not upstreams:
+            raise ValueError("At least one upstream is required")
+        self.inner = inner
+        self._upstreams = [_Upstream(url) for url in upstreams]
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.health_check_interval = health_check_interval
+        self.health_check_path = health_check_path
+        self._turns = itertools.count()
+        self._health_checks: asyncio.Task | None = None
+
+    @property
+    def latencies(self) -> LatencyRecorder | None:
+        """The latencies recorded by the inner transport, if any."""
+        return getattr(self.inner, "latencies", None)
+
+    def stats(self) -> list[UpstreamStats]:
+        """Get a snapshot of the state of every upstream."""
+        now = time.monotonic()
+        return [
+            UpstreamStats(
+                url=upstream.url,
+                healthy=upstream.is_healthy(now),
+                outstanding=upstream.outstanding,
+                requests=upstream.requests,
+                failures=upstream.failures,
+            )
+            for upstream in self._upstreams
+        ]
+
+    def _choose(self, tried: set[_Upstream]) -> _Upstream:
+        untried = [u for u in self._upstreams if u not in tried]
+        # Rotate the upstreams so that ties are broken in turn.
+        turn = next(self._turns) % len(untried)
+        untried = untried[turn:] + untried[:turn]
+        now = time.monotonic()
+        healthy = [u for u in untried if u.is_healthy(now)]
+        if not healthy:
+            return min(untried, key=lambda u: u.ejected_until)
+        return min(healthy, key=lambda u: u.outstanding)
+
+    def _record_failure(self, upstream: _Upstream) -> None:
+        upstream.failures += 1
+        upstream.consecutive_failures += 1
+        if upstream.consecutive_failures >= self.max_failures:
+            upstream.ejected_until = time.monotonic() + self.ejection_time
+
+    @staticmethod
+    def _record_success(upstream: _Upstream) -> None:
+        upstream.consecutive_failures = 0
+        upstream.ejected_until = 0.0
+
+    async def get(
+        self,
+        url: str,
+        /,
+        *,
+        params: Mapping[str, Any] | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> TransportResponse:
+        self._start_health_checks()
+        tried: set[_Upstream] = set()
+        while True:
+            upstream = self._choose(tried)
+            tried.add(upstream)
+            last = len(tried) == len(self._upstreams)
+            upstream.outstanding += 1
+            upstream.requests += 1
+            try:
+                response = await self.inner.get(
+                    rebase_url(url, upstream.url),
+                    params=params,
+                    headers=headers,
+                )
+            except Exception as e:
+                if not _is_upstream_failure(e):
+                    raise
+                self._record_failure(upstream)
+                if last:
+                    raise
+                continue
+            finally:
+                upstream.outstanding -= 1
+            if response.status >= 500:
+                self._record_failure(upstream)
+                if not last:
+                    continue
+            else:
+                self._record_success(upstream)
+            return response
+
+    async def check_health(self) -> None:
+        """Request `health_check_path` from every upstream, and eject the
+        ones that fail, or bring them back if they answer."""
+
+        async def check(upstream: _Upstream) -> None:
+            try:
+                response = await self.inner.get(
+                    rebase_url(self.health_check_path, upstream.url)
+                )
+            except Exception as e:
+                if not _is_upstream_failure(e):
+                    raise
+                healthy = False
+            else:
+                healthy = response.status < 500
+            if healthy:
+                self._record_success(upstream)
+            else:
+                upstream.failures += 1
+                upstream.consecutive_failures += 1
+                upstream.ejected_until = time.monotonic() + self.ejection_time
+
+        await asyncio.gather(*(check(u) for u in self._upstreams))
+
+    def _start_health_checks(self) -> None:
+        if self.health_check_interval is None:
+            return
+        if self._health_checks is not None and not self._health_checks.done():
+            return
+        self._health_checks = asyncio.ensure_future(
+            self._check_health(self.health_check_interval)
+        )
+
+    async def _check_health(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check_health()
+            except Exception:
+                _logger.exception("The health checks of the upstreams failed")
+
+    async def close(self) -> None:
+        if self._health_checks is not None:
+            self._health_checks.cancel()
+            # Errors of the checks are not errors of the transport.
+            await asyncio.gather(self._health_checks, return_exceptions=True)
+            self._health_checks = None
+        await self.inner.close()
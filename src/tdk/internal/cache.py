@@ -0,0 +1,828 @@
+"""
+This module provides the cache of raw responses of the TDK servers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import stat
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from contextlib import closing
+from typing import Any, Protocol
+
+from pydantic import BaseModel
+from yarl import URL
+
+from tdk.tools import lowercase
+
+
+default_cache_ttls: dict[str, float] = {
+    "autocomplete.json": 24 * 60 * 60,
+    "autocompleteSapka.json": 24 * 60 * 60,
+    "etmsAutoComp.json": 24 * 60 * 60,
+}
+"""Default time to live of the responses of some endpoints, in seconds.
+
+The indices are large and change rarely, so they are kept for a day.
+"""
+
+
+def get_endpoint(url: str, /) -> str:
+    """Get the name of the endpoint of a URL, such as `gts` or `kilavuz`."""
+    return URL(url).name
+
+
+def make_cache_key(url: str, params: Mapping[str, Any] | None, /) -> str:
+    """Make the cache key of a request.
+
+    The key is made of the path and the sorted query parameters of the
+    request. Parameter values are lowercased with [](tdk.tools.lowercase),
+    so that `KEDİ`, `Kedi` and `kedi` share one key.
+
+    ```pycon
+    >>> make_cache_key("https://sozluk.gov.tr/gts", {"ara": "KEDİ"})
+    '/gts?ara=kedi'
+    ```
+    """
+    parsed = URL(url)
+    query = {**parsed.query, **(params or {})}
+    return str(
+        URL.build(
+            path=parsed.path,
+            query=sorted(
+                (
+                    name,
+                    lowercase(
+                        f"{value}", keep_nonletters=True, remove_hats=False
+                    ),
+                )
+                for name, value in query.items()
+            ),
+        )
+    )
+
+
+class CacheBackend(Protocol):
+    """Keeps the values of a cache, such as a [](ResponseCache).
+
+    Values are bytes, kept for a number of seconds given when they are set.
+    The backends of the library are [](MemoryCacheBackend),
+    [](SharedMemoryCacheBackend), [](SQLiteCacheBackend) and
+    [](tdk.internal.redis_cache.RedisCacheBackend).
+    """
+
+    async def get(self, key: str, /) -> bytes | None:
+        """Get the value of `key`, or [](None) if it is missing or expired."""
+        ...
+
+    async def get_many(self, keys: Sequence[str], /) -> list[bytes | None]:
+        """Get the values of `keys`, in order, with one lookup."""
+        ...
+
+    async def set(self, key: str, value: bytes, /, *, ttl: float) -> None:
+        """Keep `value` as the value of `key` for `ttl` seconds."""
+        ...
+
+    async def delete(self, key: str, /) -> None:
+        """Remove the value of `key`, if there is one."""
+        ...
+
+
+class MemoryCacheBackend:
+    """Keeps cached values in memory, evicting the least recently used.
+
+    :param max_entries: Maximum number of values kept.
+    :param max_bytes: Maximum total size of the values kept.
+
+    :raises ValueError: If a limit is not positive.
+    """
+
+    def __init__(
+        self, *, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024
+    ):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("limits must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._size = 0
+        self.evictions = 0
+        """Number of values removed to make room for others."""
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Total size of the values kept, in bytes."""
+        return self._size
+
+    async def get(self, key: str, /) -> bytes | None:
+        """Get the value of `key`, or [](None) if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def get_many(self, keys: Sequence[str], /) -> list[bytes | None]:
+        """Get the values of `keys`, in order."""
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, /, *, ttl: float) -> None:
+        """Keep `value` as the value of `key` for `ttl` seconds.
+
+        Values larger than `max_bytes` are not kept.
+        """
+        if key in self._entries:
+            self._remove(key)
+        if ttl <= 0 or len(value) > self.max_bytes:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._size += len(value)
+        while (
+            len(self._entries) > self.max_entries or self._size > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def delete(self, key: str, /) -> None:
+        """Remove the value of `key`, if there is one."""
+        if key in self._entries:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._size -= len(value)
+
+
+def _default_shared_memory_path() -> str:
+    root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    if hasattr(os, "getuid"):
+        # Every user has their own directory, as they can't trust another's.
+        return os.path.join(root, f"tdk-cache-{os.getuid()}")
+    return os.path.join(root, "tdk-cache")
+
+
+def _check_private_directory(path: str) -> None:
+    """Make sure that only the current user can write to a directory.
+
+    :raises PermissionError: If anyone else can.
+    """
+    status = os.lstat(path)
+    if not stat.S_ISDIR(status.st_mode):
+        raise PermissionError(f"Not a directory: {path}")
+    if hasattr(os, "getuid") and status.st_uid != os.getuid():
+        raise PermissionError(f"Owned by another user: {path}")
+    if status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"Writable by other users: {path}")
+
+
+class SharedMemoryCacheBackend:
+    """Keeps cached values in shared memory, once for all the processes of a
+    host.
+
+    Every value is a file in a directory of a memory-backed file system,
+    `/dev/shm` on Linux, and is read by mapping the file into memory.
+    So the workers of a host read the same copy of a value, with no round
+    trip to another process, and a value written by one of them is seen by
+    the others at once.
+    Values are written to a temporary file that then replaces the old one,
+    so readers never see half a value and no locks are needed.
+    The files are small enough to be read and written without blocking the
+    event loop.
+
+    Expired values are removed from time to time: whenever a process has
+    written an eighth of `max_bytes`, it removes the expired values, and
+    then the values that expire soonest until the others fit in
+    `max_bytes`. See [](SharedMemoryCacheBackend.sweep).
+
+    Anyone who can write to the directory can change the values that are
+    read from it, so it must belong to the current user, and other users
+    must not be able to write to it.
+    Files that can't be read are treated as misses, and values that can't
+    be written are dropped.
+
+    :param path:
+        The directory of the values. It is created if missing.
+        Defaults to `tdk-cache-<uid>` in `/dev/shm`, or in the temporary
+        directory of systems without it.
+    :param max_bytes: Maximum total size of the values kept, with their keys.
+
+    :raises ValueError: If `max_bytes` is not positive.
+    :raises PermissionError:
+        If the directory belongs to another user, or other users can write
+        to it.
+    """
+
+    _header = struct.Struct("<dI")
+    """The expiry time of the value and the size of its key, which precede
+    the key and the value in a file."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        *,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        self.path = (
+            os.fspath(path)
+            if path is not None
+            else _default_shared_memory_path()
+        )
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        _check_private_directory(self.path)
+        self._written = 0
+
+    def _get_path(self, key: str) -> str:
+        name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.path, name)
+
+    async def get(self, key: str, /) -> bytes | None:
+        """Get the value of `key`, or [](None) if it is missing or expired."""
+        try:
+            with open(self._get_path(key), "rb") as file:
+                with mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as view:
+                    expires_at, key_size = self._header.unpack_from(view)
+                    start = self._header.size + key_size
+                    if (
+                        expires_at <= time.time()
+                        # Another key with the same hash.
+                        or view[self._header.size : start] != key.encode()
+                    ):
+                        return None
+                    return view[start:]
+        except (OSError, ValueError, struct.error):
+            # ValueError: an empty file can't be mapped.
+            return None
+
+    async def get_many(self, keys: Sequence[str], /) -> list[bytes | None]:
+        """Get the values of `keys`, in order."""
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, /, *, ttl: float) -> None:
+        """Keep `value` as the value of `key` for `ttl` seconds.
+
+        Values larger than `max_bytes` are not kept, and neither are values
+        that don't fit in the file system.
+        """
+        if ttl <= 0 or len(value) > self.max_bytes:
+            await self.delete(key)
+            return
+        expires_at = time.time() + ttl
+        encoded = key.encode()
+        temporary = None
+        try:
+            descriptor, temporary = tempfile.mkstemp(
+                dir=self.path, suffix=".tmp"
+            )
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(self._header.pack(expires_at, len(encoded)))
+                file.write(encoded)
+                file.write(value)
+            # The modification time tells sweep() when the value expires.
+            os.utime(temporary, (expires_at, expires_at))
+            os.replace(temporary, self._get_path(key))
+        except OSError:
+            if temporary is not None:
+                try:
+                    os.remove(temporary)
+                except OSError:
+                    pass
+            return
+        self._written += len(value)
+        if self._written >= self.max_bytes // 8:
+            self._written = 0
+            await asyncio.to_thread(self.sweep)
+
+    async def delete(self, key: str, /) -> None:
+        """Remove the value of `key`, if there is one."""
+        try:
+            os.remove(self._get_path(key))
+        except OSError:
+            pass
+
+    def sweep(self) -> None:
+        """Remove the expired values, then the values that expire soonest
+        until the others take at most `max_bytes`."""
+        now = time.time()
+        kept: list[tuple[float, int, str]] = []
+        for entry in os.scandir(self.path):
+            try:
+                status = entry.stat()
+                if entry.name.endswith(".tmp"):
+                    # Left behind by a process that died while writing.
+                    if status.st_ctime < now - 60:
+                        os.remove(entry.path)
+                elif status.st_mtime <= now:
+                    # If another process has just replaced it, a fresh
+                    # value is lost, which is only a miss.
+                    os.remove(entry.path)
+                else:
+                    kept.append((status.st_mtime, status.st_size, entry.path))
+            except FileNotFoundError:
+                pass
+        total = 0
+        for _, size, path in sorted(kept, reverse=True):
+            total += size
+            if total > self.max_bytes:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def clear(self) -> None:
+        """Remove every value."""
+        for entry in os.scandir(self.path):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+class SQLiteCacheBackend:
+    """Keeps cached values in an SQLite database on disk.
+
+    The database survives restarts and can be shared by the processes of a
+    host: it uses write-ahead logging, so readers don't block each other or
+    the writer.
+    Queries run in worker threads and never block the event loop.
+
+    When the values take more than `max_bytes`, those that expire soonest
+    are evicted.
+
+    :param path: The path of the database file. It is created if missing.
+    :param max_bytes: Maximum total size of the values kept.
+
+    :raises ValueError: If `max_bytes` is not positive.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike, *, max_bytes: int = 512 * 1024 * 1024
+    ):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, "
+                "value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_expires_at "
+                "ON responses (expires_at)"
+            )
+            # The total size is kept up to date by triggers, so that writes
+            # don't have to add up the sizes of every value.
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), "
+                "size INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO usage (id, size) "
+                "SELECT 0, COALESCE(SUM(size), 0) FROM responses"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_insert "
+                "AFTER INSERT ON responses BEGIN "
+                "UPDATE usage SET size = size + new.size; END"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_update "
+                "AFTER UPDATE OF size ON responses BEGIN "
+                "UPDATE usage SET size = size - old.size + new.size; END"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_delete "
+                "AFTER DELETE ON responses BEGIN "
+                "UPDATE usage SET size = size - old.size; END"
+            )
+            connection.commit()
+        self._written = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path, timeout=10, check_same_thread=False
+        )
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening it if needed."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _get(self, key: str) -> bytes | None:
+        row = (
+            self._get_connection()
+            .execute(
+                "SELECT value FROM responses "
+                "WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row is not None else None
+
+    def _get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        found: dict[str, bytes] = {}
+        # Stay well under the limit on the number of query parameters.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            found.update(
+                self._get_connection().execute(
+                    "SELECT key, value FROM responses "
+                    f"WHERE key IN ({', '.join('?' * len(chunk))}) "
+                    "AND expires_at > ?",
+                    (*chunk, time.time()),
+                )
+            )
+        return [found.get(key) for key in keys]
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        connection = self._get_connection()
+        with connection:
+            if ttl <= 0 or len(value) > self.max_bytes:
+                connection.execute(
+                    "DELETE FROM responses WHERE key = ?", (key,)
+                )
+                return
+            now = time.time()
+            # Not INSERT OR REPLACE, which would skip the delete trigger.
+            connection.execute(
+                "INSERT INTO responses (key, value, size, expires_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                "value = excluded.value, size = excluded.size, "
+                "expires_at = excluded.expires_at",
+                (key, value, len(value), now + ttl),
+            )
+            self._written += len(value)
+            (size,) = connection.execute("SELECT size FROM usage").fetchone()
+            if size <= self.max_bytes and self._written < self.max_bytes // 8:
+                return
+            # Expired values are removed whenever an eighth of max_bytes has
+            # been written, or when the values don't fit.
+            self._written = 0
+            connection.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (now,)
+            )
+            (size,) = connection.execute("SELECT size FROM usage").fetchone()
+            # Keep the values that expire last, up to max_bytes in total.
+            evicted = []
+            rows = connection.execute(
+                "SELECT key, size FROM responses "
+                "ORDER BY expires_at, key DESC"
+            )
+            while size > self.max_bytes:
+                evicted_key, evicted_size = rows.fetchone()
+                evicted.append((evicted_key,))
+                size -= evicted_size
+            rows.close()
+            connection.executemany(
+                "DELETE FROM responses WHERE key = ?", evicted
+            )
+
+    def _delete(self, key: str) -> None:
+        connection = self._get_connection()
+        with connection:
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    async def get(self, key: str, /) -> bytes | None:
+        """Get the value of `key`, or [](None) if it is missing or expired."""
+        return await asyncio.to_thread(self._get, key)
+
+    async def get_many(self, keys: Sequence[str], /) -> list[bytes | None]:
+        """Get the values of `keys`, in order, with one query."""
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def set(self, key: str, value: bytes, /, *, ttl: float) -> None:
+        """Keep `value` as the value of `key` for `ttl` seconds.
+
+        Values larger than `max_bytes` are not kept.
+        """
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str, /) -> None:
+        """Remove the value of `key`, if there is one."""
+        await asyncio.to_thread(self._delete, key)
+
+    def close(self) -> None:
+        """Close the connections to the database."""
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class CacheStats(BaseModel):
+    """A snapshot of the counters of a [](ResponseCache)."""
+
+    hits: int
+    """Number of requests answered with a result from the cache."""
+    negative_hits: int
+    """Number of requests answered with a cached "not found" response."""
+    misses: int
+    """Number of requests that were not found in the cache."""
+
+    @property
+    def saved_requests(self) -> int:
+        """Number of requests the cache saved from reaching the servers."""
+        return self.hits + self.negative_hits
+
+    @property
+    def hit_ratio(self) -> float:
+        """The ratio of requests answered from the cache."""
+        lookups = self.saved_requests + self.misses
+        return self.saved_requests / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """Caches the raw responses of the TDK servers.
+
+    Responses are cached as bytes and decoded and validated again for every
+    call, so callers never share the objects they receive.
+
+    Responses that found no results (see [](tdk.internal.utils.NOT_FOUND))
+    are kept apart from the others, usually for a shorter time,
+    so that repeated misspellings don't evict real results.
+
+    :param backend:
+        Where the responses are kept, such as a [](SQLiteCacheBackend),
+        a [](SharedMemoryCacheBackend) to share them between the processes
+        of a host, or a [](tdk.internal.redis_cache.RedisCacheBackend) to
+        share them between hosts.
+        Defaults to a new [](MemoryCacheBackend).
+    :param ttl: Seconds a response is kept for, unless `ttls` says otherwise.
+    :param ttls:
+        Seconds the responses are kept for, by the name of their dictionary,
+        such as `gts` or `sks`, or of their endpoint, such as
+        `autocomplete.json`. See [](get_endpoint).
+        The time of an endpoint takes precedence, so that the indices keep
+        theirs; give one to `kilavuz` only to set `sks`, `syyd` and `ysk`,
+        which share it, at once.
+        They are added to [](default_cache_ttls).
+        A time of zero disables caching.
+    :param negative_backend:
+        Where the "not found" responses are kept.
+        Defaults to a new [](MemoryCacheBackend) of up to 16384 responses.
+    :param negative_ttl:
+        Seconds a "not found" response is kept for.
+        A time of zero disables caching them.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        *,
+        ttl: float = 60 * 60,
+        ttls: Mapping[str, float] | None = None,
+        negative_backend: CacheBackend | None = None,
+        negative_ttl: float = 10 * 60,
+    ):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.ttls = {**default_cache_ttls, **(ttls or {})}
+        self.negative_backend = (
+            negative_backend
+            if negative_backend is not None
+            else MemoryCacheBackend(
+                max_entries=16384, max_bytes=4 * 1024 * 1024
+            )
+        )
+        self.negative_ttl = negative_ttl
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+
+    def get_ttl(self, endpoint: str, /, dictionary: str | None = None) -> float:
+        """Get the seconds the responses of `endpoint` are kept for,
+        if they are requested by `dictionary`."""
+        if endpoint in self.ttls:
+            return self.ttls[endpoint]
+        if dictionary is not None:
+            return self.ttls.get(dictionary, self.ttl)
+        return self.ttl
+
+    async def get(self, key: str, /) -> bytes | None:
+        """Get the cached response of `key`, counting hits and misses."""
+        if self.negative_ttl > 0:
+            value = await self.negative_backend.get(key)
+            if value is not None:
+                self._negative_hits += 1
+                return value
+        value = await self.backend.get(key)
+        if value is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+
+    async def get_many(self, keys: Sequence[str], /) -> list[bytes | None]:
+        """Get the cached responses of `keys`, in order, with one lookup per
+        backend, counting hits and misses."""
+        values: list[bytes | None] = [None] * len(keys)
+        if self.negative_ttl > 0:
+            values = await self.negative_backend.get_many(keys)
+            self._negative_hits += sum(v is not None for v in values)
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            found = await self.backend.get_many([keys[i] for i in missing])
+            for i, value in zip(missing, found):
+                values[i] = value
+            hits = sum(value is not None for value in found)
+            self._hits += hits
+            self._misses += len(missing) - hits
+        return values
+
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        /,
+        *,
+        endpoint: str,
+        not_found: bool,
+        dictionary: str | None = None,
+    ) -> None:
+        """Cache `value` as the response of `key`, from `endpoint`.
+
+        :param not_found: Whether the response found no results.
+        :param dictionary: The dictionary that requested the response.
+        """
+        ttl = self.get_ttl(endpoint, dictionary)
+        if not_found:
+            if ttl > 0:
+                await self.negative_backend.set(
+                    key, value, ttl=self.negative_ttl
+                )
+            return
+        await self.backend.set(key, value, ttl=ttl)
+
+    def stats(self) -> CacheStats:
+        """Get a snapshot of the counters of the cache."""
+        return CacheStats(
+            hits=self._hits,
+            negative_hits=self._negative_hits,
+            misses=self._misses,
+        )
+
+
+class ConditionalCache:
+    """Keeps copies of responses with their validators for conditional GETs.
+
+    When a response carries an `ETag` or a `Last-Modified` header, it is
+    kept with those validators.
+    The next request for the same resource sends them back as
+    `If-None-Match` and `If-Modified-Since`, and if the server answers with
+    `304 Not Modified`, the kept copy is used instead of downloading it
+    again.
+
+    :param backend:
+        Where the copies are kept.
+        Use a [](SQLiteCacheBackend) to keep them across restarts.
+        Defaults to a new [](MemoryCacheBackend).
+    :param ttl: Seconds a copy is kept for.
+    :param prefix:
+        A prefix of every key, so that the copies can share a backend with
+        a [](ResponseCache), which uses the same keys.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        *,
+        ttl: float = 30 * 24 * 60 * 60,
+        prefix: str = "",
+    ):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.prefix = prefix
+        self.not_modified = 0
+        """Number of responses that were served from a kept copy."""
+
+    async def get(self, key: str, /) -> tuple[dict[str, str], bytes] | None:
+        """Get the kept copy of `key`.
+
+        :returns:
+            The headers to send with a conditional request and the body of
+            the kept response, or [](None) if there is no copy.
+        """
+        record = await self.backend.get(self.prefix + key)
+        if record is None:
+            return None
+        validators, _, body = record.partition(b"\n")
+        headers = {}
+        etag, last_modified = json.loads(validators)
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+        return headers, body
+
+    async def set(
+        self, key: str, body: bytes, /, *, headers: Mapping[str, str]
+    ) -> None:
+        """Keep `body` as the copy of `key` if `headers` has validators.
+
+        :param headers: The headers of the response.
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag is None and last_modified is None:
+            return
+        validators = json.dumps([etag, last_modified]).encode()
+        await self.backend.set(
+            self.prefix + key, validators + b"\n" + body, ttl=self.ttl
+        )
+
+
+class StaleCache:
+    """Keeps the last good responses of resources that change rarely,
+    to answer with them while they are refreshed.
+
+    A response is fresh for `max_age` seconds.
+    After that, it is still served at once, while the client refreshes it
+    with one request in the background, and it keeps being served if the
+    refresh fails.
+    Responses that found no results are not kept.
+
+    :param backend:
+        Where the responses are kept.
+        Use a [](SQLiteCacheBackend) to keep them across restarts.
+        Defaults to a new [](MemoryCacheBackend).
+    :param max_age: Seconds a response is fresh for.
+    :param max_stale:
+        Seconds a response is kept for in total, after which callers wait
+        for a new one.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        *,
+        max_age: float = 60 * 60,
+        max_stale: float = 7 * 24 * 60 * 60,
+    ):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.max_age = max_age
+        self.max_stale = max_stale
+        self.stale_hits = 0
+        """Number of stale responses that were served."""
+        self.failed_revalidations = 0
+        """Number of background refreshes that failed."""
+
+    async def get(self, key: str, /) -> tuple[bytes, bool] | None:
+        """Get the kept response of `key`.
+
+        :returns:
+            The body of the response and whether it is fresh,
+            or [](None) if there is no response.
+        """
+        record = await self.backend.get(key)
+        if record is None:
+            return None
+        stored_at, _, body = record.partition(b"\n")
+        fresh = time.time() - float(stored_at) < self.max_age
+        if not fresh:
+            self.stale_hits += 1
+        return body, fresh
+
+    async def set(self, key: str, body: bytes, /) -> None:
+        """Keep `body` as the response of `key`, fresh from now."""
+        stored_at = repr(time.time()).encode()
+        await self.backend.set(
+            key, stored_at + b"\n" + body, ttl=self.max_stale
+        )
@@ -0,0 +1,110 @@
+"""
+This module provides the coalescing of identical concurrent calls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+from tdk.tools import lowercase
+
+_T = TypeVar("_T")
+
+
+class _Flight:
+    """A call that is in flight, and the number of callers waiting for it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Makes concurrent calls with the same key share a single execution.
+
+    The first caller of a key starts the call in a task,
+    and every caller that arrives before it finishes waits for that task.
+    All of them receive the same result object, or the same exception.
+
+    If every waiting caller is cancelled, the call is cancelled too.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+        self.coalesced = 0
+        """Number of calls that were served by a call already in flight."""
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls in flight."""
+        return len(self._flights)
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[_T]], /
+    ) -> _T:
+        """Call `func`, unless a call with the same `key` is in flight.
+
+        :raises TypeError: If `key` is not hashable.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+def _normalize(value: Any, /) -> Any:
+    if isinstance(value, str):
+        return lowercase(value, keep_nonletters=True, remove_hats=False)
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    return value
+
+
+def make_call_key(
+    func: Callable, args: tuple, kwargs: dict[str, Any]
+) -> Hashable | None:
+    """Make a key that identifies a call, or [](None) if it can't be hashed.
+
+    Calls to the same function with equal arguments have equal keys.
+    Strings are lowercased as in [](tdk.internal.cache.make_cache_key),
+    so that calls for `KEDİ` and `kedi` share one request, as they share
+    one cached response, and lists are compared by their items.
+
+    ```pycon
+    >>> from tdk.dictionaries.gts import search_gts
+    >>> make_call_key(search_gts, ("KEDİ",), {}) == make_call_key(
+    ...     search_gts, ("kedi",), {}
+    ... )
+    True
+    ```
+    """
+    key = (
+        func.__module__,
+        func.__qualname__,
+        _normalize(args),
+        tuple(sorted((name, _normalize(v)) for name, v in kwargs.items())),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
@@ -0,0 +1,119 @@
+"""
+This module provides deadlines, which bound the total time of a call.
+
+A deadline covers everything a call does: waiting for its turn, every
+request of functions that make several, retries and hedged requests.
+When it passes, the call is cancelled and [](DeadlineExceededError) is
+raised.
+
+```python
+from tdk.client import deadline
+
+with deadline(0.3):
+    entries = await client.search_terms(dictionaries, "ağ")
+```
+
+Deadlines are carried by a [](contextvars.ContextVar), so they apply to the
+tasks started in their context, and nested deadlines can only shorten the
+time left.
+Calls that are coalesced with a call already in flight wait for it until
+their own deadline, but the call itself runs under the deadline of the
+caller that started it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TypeVar
+
+
+__all__ = [
+    "DeadlineExceededError",
+    "deadline",
+    "get_deadline",
+    "get_remaining",
+    "run_with_deadline",
+]
+
+_T = TypeVar("_T")
+
+
+class DeadlineExceededError(asyncio.TimeoutError):
+    """The deadline of a call passed before it finished."""
+
+
+_current_deadline: ContextVar[float | None] = ContextVar(
+    "_current_deadline", default=None
+)
+"""The [](time.monotonic) time the current call must finish by."""
+
+
+def _tighten(timeout: float | None, /) -> float | None:
+    current = _current_deadline.get()
+    if timeout is None:
+        return current
+    new = time.monotonic() + timeout
+    return new if current is None else min(current, new)
+
+
+@contextmanager
+def deadline(timeout: float | None, /) -> Iterator[None]:
+    """Give the calls made in the block at most `timeout` seconds.
+
+    The block itself is not interrupted; the calls made in it are.
+
+    :param timeout:
+        The number of seconds from now, or [](None) to keep the current
+        deadline.
+    """
+    token = _current_deadline.set(_tighten(timeout))
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def get_deadline() -> float | None:
+    """Get the [](time.monotonic) time the current call must finish by,
+    if it has a deadline."""
+    return _current_deadline.get()
+
+
+def get_remaining() -> float | None:
+    """Get the seconds left until the current deadline, if there is one."""
+    current = _current_deadline.get()
+    if current is None:
+        return None
+    return max(current - time.monotonic(), 0.0)
+
+
+async def run_with_deadline(
+    awaitable: Awaitable[_T], timeout: float | None = None, /
+) -> _T:
+    """Await `awaitable` under the current deadline, shortened to `timeout`
+    seconds if it is given.
+
+    :raises DeadlineExceededError: If the deadline passes first.
+    """
+    until = _tighten(timeout)
+    if until is None:
+        return await awaitable
+    token = _current_deadline.set(until)
+    try:
+        remaining = until - time.monotonic()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceededError("The deadline passed")
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            if time.monotonic() < until:
+                raise
+            raise DeadlineExceededError("The deadline passed") from None
+    finally:
+        _current_deadline.reset(token)
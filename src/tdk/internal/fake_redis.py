@@ -0,0 +1,188 @@
+"""
+This module provides a local stand-in for a Redis server.
+
+A [](FakeRedisServer) keeps its keys in memory and answers the commands used
+by a [](tdk.internal.redis_cache.RedisCacheBackend), so that a shared cache
+can be tested without a Redis server.
+
+```python
+from tdk.internal.fake_redis import FakeRedisServer
+from tdk.internal.redis_cache import RedisCacheBackend
+
+async with FakeRedisServer() as server:
+    backend = RedisCacheBackend(server.url)
+```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from typing import Any
+
+from tdk.internal.redis_cache import read_reply
+
+
+__all__ = [
+    "FakeRedisServer",
+]
+
+
+def _encode_reply(reply: Any) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, Exception):
+        return f"-{reply}\r\n".encode()
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(map(_encode_reply, reply))
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+class FakeRedisServer:
+    """A local TCP server that answers a subset of the Redis commands.
+
+    It supports `PING`, `AUTH`, `SELECT`, `GET`, `MGET`, `SET` with the
+    `EX` and `PX` options, `DEL` and `FLUSHDB`, with a separate keyspace per
+    database. Other commands are answered with an error.
+
+    :param password: A password that clients must send with `AUTH`.
+    :param host: The host to listen on.
+    :param port: The port to listen on, `0` for any free port.
+    """
+
+    def __init__(
+        self,
+        *,
+        password: str | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.password = password
+        self._host = host
+        self._port = port
+        self._server: asyncio.Server | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+        self.databases: dict[int, dict[bytes, tuple[bytes, float]]] = {}
+        """The values and [](time.monotonic) expiry times of the keys,
+        by database."""
+        self.commands: Counter[str] = Counter()
+        """Number of commands received, by name."""
+        self.connections = 0
+        """Number of connections accepted."""
+
+    @property
+    def url(self) -> str:
+        """The `redis://` URL of the server, without a password.
+
+        :raises RuntimeError: If the server is not running.
+        """
+        if self._server is None:
+            raise RuntimeError("The server is not running")
+        host, port = self._server.sockets[0].getsockname()[:2]
+        if ":" in host:
+            host = f"[{host}]"
+        return f"redis://{host}:{port}/0"
+
+    async def start(self) -> None:
+        """Start listening."""
+        if self._server is None:
+            self._server = await asyncio.start_server(
+                self._serve, self._host, self._port
+            )
+
+    async def close(self) -> None:
+        """Stop listening and drop the open connections."""
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in self._connections:
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self) -> FakeRedisServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        self._connections.add(writer)
+        state = {"database": 0, "authenticated": self.password is None}
+        try:
+            while True:
+                command = await read_reply(reader)
+                writer.write(_encode_reply(self.execute(command, state)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def execute(self, command: list[bytes], state: dict[str, Any]) -> Any:
+        """Run a command for a connection in `state`, and return the reply.
+
+        Errors are returned as exceptions.
+        """
+        name, *args = command
+        command_name = name.decode().upper()
+        self.commands[command_name] += 1
+        if command_name == "AUTH":
+            if args[-1].decode() != self.password:
+                return Exception("WRONGPASS invalid password")
+            state["authenticated"] = True
+            return "OK"
+        if not state["authenticated"]:
+            return Exception("NOAUTH Authentication required.")
+        keys = self.databases.setdefault(state["database"], {})
+        if command_name == "PING":
+            return "PONG"
+        if command_name == "SELECT":
+            state["database"] = int(args[0])
+            return "OK"
+        if command_name == "GET":
+            return self._get(keys, args[0])
+        if command_name == "MGET":
+            return [self._get(keys, key) for key in args]
+        if command_name == "SET":
+            key, value, *options = args
+            expires_at = float("inf")
+            for option, amount in zip(options[::2], options[1::2]):
+                unit = {b"EX": 1.0, b"PX": 0.001}.get(option.upper())
+                if unit is None:
+                    return Exception("ERR syntax error")
+                expires_at = time.monotonic() + int(amount) * unit
+            keys[key] = (value, expires_at)
+            return "OK"
+        if command_name == "DEL":
+            removed = [key for key in args if self._get(keys, key) is not None]
+            for key in removed:
+                del keys[key]
+            return len(removed)
+        if command_name == "FLUSHDB":
+            keys.clear()
+            return "OK"
+        return Exception(f"ERR unknown command '{command_name}'")
+
+    @staticmethod
+    def _get(
+        keys: dict[bytes, tuple[bytes, float]], key: bytes
+    ) -> bytes | None:
+        entry = keys.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del keys[key]
+            return None
+        return value
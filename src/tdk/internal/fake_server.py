@@ -0,0 +1,731 @@
+"""
+This module provides a local stand-in for the TDK servers.
+
+A [](FakeTDKServer) answers the endpoints used by the dictionaries with
+fixture payloads shaped like the real ones, including the [](NOT_FOUND)
+response for unknown queries.
+A [](FaultProfile) injects latency, errors, broken documents and throttling,
+so that the concurrency, retry and caching settings of a client can be
+load-tested without a network connection.
+
+```python
+from tdk.client import AiohttpTransport, TDKClient
+from tdk.internal.fake_server import FakeTDKServer, FaultProfile
+
+async with FakeTDKServer(faults=FaultProfile(error_rate=0.1)) as server:
+    transport = AiohttpTransport(base_url=server.url)
+    async with TDKClient(transport=transport) as client:
+        entries = await client.search_gts("kedi")
+```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from collections import Counter
+from collections.abc import Mapping
+from typing import Any
+
+from aiohttp import web
+from pydantic import BaseModel, ConfigDict, Field
+
+from tdk.internal.utils import NOT_FOUND
+from tdk.tools import lowercase
+
+
+__all__ = [
+    "FaultProfile",
+    "FakeTDKServer",
+    "default_fixtures",
+]
+
+
+class FaultProfile(BaseModel):
+    """The faults a [](FakeTDKServer) injects into its responses.
+
+    Every response is delayed by a latency drawn from a log-normal
+    distribution with the median `latency` and the shape `latency_sigma`,
+    and a `tail_rate` share of the responses is delayed by `tail_latency`
+    more.
+    Rates are probabilities between 0 and 1.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    latency: float = Field(default=0.0, ge=0)
+    """Median latency of a response, in seconds."""
+    latency_sigma: float = Field(default=0.0, ge=0)
+    """Shape of the latency distribution, `0` for a constant latency."""
+    tail_latency: float = Field(default=0.0, ge=0)
+    """Extra latency of the slowest responses, in seconds."""
+    tail_rate: float = Field(default=0.0, ge=0, le=1)
+    """Share of the responses that have the extra latency."""
+    error_rate: float = Field(default=0.0, ge=0, le=1)
+    """Share of the responses that have an error status."""
+    error_statuses: tuple[int, ...] = (500, 502, 503)
+    """The error statuses, chosen at random."""
+    invalid_json_rate: float = Field(default=0.0, ge=0, le=1)
+    """Share of the responses that are an HTML page instead of JSON."""
+    truncated_rate: float = Field(default=0.0, ge=0, le=1)
+    """Share of the responses whose JSON document is cut in half."""
+    rate_limit: float | None = Field(default=None, gt=0)
+    """Requests answered per second before throttling with `429`,
+    or [](None) to never throttle."""
+    burst: int = Field(default=1, ge=1)
+    """Number of requests answered at once under the rate limit."""
+    seed: int | None = None
+    """Seed of the random choices, for reproducible runs."""
+
+
+def _gts_entry(
+    tdk_id: int,
+    entry: str,
+    meanings: list[tuple[str, int]],
+    *,
+    proverbs: tuple[str, ...] = (),
+    origin_language: int = 0,
+    original: str = "",
+) -> dict[str, Any]:
+    return {
+        "madde_id": f"{tdk_id}",
+        "kac": "0",
+        "kelime_no": f"{tdk_id + 249}",
+        "cesit": "0",
+        "anlam_gor": "0",
+        "on_taki": None,
+        "madde": entry,
+        "cesit_say": "0",
+        "anlam_say": f"{len(meanings)}",
+        "taki": None,
+        "cogul_mu": "0",
+        "ozel_mi": "0",
+        "egik_mi": "0",
+        "lisan_kodu": f"{origin_language}",
+        "lisan": original,
+        "telaffuz": None,
+        "birlesikler": None,
+        "font": None,
+        "madde_duz": entry,
+        "gosterim_tarihi": None,
+        "anlamlarListe": [
+            {
+                "anlam_id": f"{tdk_id * 10 + order}",
+                "madde_id": f"{tdk_id}",
+                "anlam_sira": f"{order}",
+                "fiil": "0",
+                "tipkes": "0",
+                "anlam": meaning,
+                "gos": "0",
+                "ozelliklerListe": [
+                    {
+                        "ozellik_id": f"{property_id}",
+                        "tur": "3",
+                        "tam_adi": "isim" if property_id == 19 else "sıfat",
+                        "kisa_adi": "a." if property_id == 19 else "sf.",
+                        "ekno": "30" if property_id == 19 else "31",
+                    }
+                ],
+            }
+            for order, (meaning, property_id) in enumerate(meanings, 1)
+        ],
+        "atasozu": [
+            {"madde_id": f"{tdk_id + order}", "madde": proverb, "on_taki": None}
+            for order, proverb in enumerate(proverbs, 1)
+        ],
+    }
+
+
+def _lehce_entry(tdk_id: int, turkish: str, **words: str) -> dict[str, Any]:
+    entry = {"lehce_id": f"{tdk_id}", "asil": turkish, "turkce": turkish}
+    for language in [
+        "azerice",
+        "baskurtca",
+        "kazakca",
+        "kirgizca",
+        "ozbekce",
+        "tatarca",
+        "turkmence",
+        "uygurca",
+        "rusca",
+    ]:
+        for number in range(1, 5):
+            entry[f"{language}{number}"] = (
+                words.get(language, "") if number == 1 else ""
+            )
+    return entry
+
+
+def _term(
+    tdk_id: int, term: str, meaning: str, dictionary: str, short_name: str
+) -> dict[str, Any]:
+    return {
+        "terim_id": f"{tdk_id}",
+        "eskterim": "",
+        "sozcuk": term,
+        "ingiliz": "",
+        "fransiz": "",
+        "alman": "",
+        "latin": "",
+        "diger": "",
+        "anlam": meaning,
+        "sozluk_ad": dictionary,
+        "kist": short_name,
+        "dilkarma": "",
+        "bkz": "",
+        "yaz": "",
+        "yaytar": "",
+    }
+
+
+def default_fixtures() -> dict[str, dict[str, Any]]:
+    """Get the payloads served by a [](FakeTDKServer) by default.
+
+    The payloads are grouped by endpoint, and keyed by their lowercase query.
+    Endpoints without a query, such as the indices, use the `""` key.
+    """
+    gts = {
+        "kedi": [
+            _gts_entry(
+                31522,
+                "kedi",
+                [
+                    (
+                        "Kedigillerden, evde beslenen, sevimli, tüylü hayvan"
+                        " (Felis domestica)",
+                        19,
+                    ),
+                    ("Bu türden hayvanların genel adı", 19),
+                ],
+                proverbs=("kedi ciğere bakar gibi", "kedi gibi"),
+            )
+        ],
+        "köpek": [
+            _gts_entry(
+                34127,
+                "köpek",
+                [
+                    (
+                        "Köpekgillerden, türlü cinsleri olan, evcil, "
+                        "sadık hayvan (Canis familiaris)",
+                        19,
+                    ),
+                    ("Başkasına dalkavukluk eden, aşağılık kimse", 19),
+                ],
+                proverbs=("köpek gibi çalışmak",),
+            )
+        ],
+        "kitap": [
+            _gts_entry(
+                33842,
+                "kitap",
+                [
+                    (
+                        "Ciltli veya ciltsiz olarak bir araya getirilmiş, "
+                        "basılı veya yazılı kâğıt yaprakların bütünü",
+                        19,
+                    )
+                ],
+                origin_language=11,
+                original="kitāb",
+            )
+        ],
+        "güzel": [
+            _gts_entry(
+                27601,
+                "güzel",
+                [
+                    ("Göze ve kulağa hoş gelen, hayranlık uyandıran", 20),
+                    ("Güzel olan şey veya kimse", 19),
+                ],
+            )
+        ],
+    }
+    index = sorted(gts) + ["kedicik", "kedigiller", "kitabe", "güzellik"]
+    return {
+        "gts": gts,
+        "gtsAtasozDeyim": {
+            "kedi": [
+                _gts_entry(
+                    31540,
+                    "kedi ciğere bakar gibi",
+                    [("Çok istekle, göz dikerek (bakmak)", 19)],
+                )
+            ],
+        },
+        "oneri": {
+            "kedü": [{"madde": "kedi"}, {"madde": "kendi"}],
+            "kitab": [{"madde": "kitap"}, {"madde": "kitabe"}],
+        },
+        "autocomplete.json": {"": [{"madde": word} for word in index]},
+        "autocompleteSapka.json": {
+            "": {"hala": "hâlâ", "kar": "kâr", "kagit": "kâğıt"}
+        },
+        "etmsAutoComp.json": {"": [{"madde": "kedi"}, {"madde": "kitap"}]},
+        "etms": {
+            "kedi": [
+                {
+                    "madde": "kedi",
+                    "anlam": "evcil hayvan",
+                    **{f"anlam{number}": "" for number in range(1, 9)},
+                    "aciklama": "Orta Türkçe kedi sözcüğünden.",
+                    "tr": "",
+                    **{f"bk{number}": "" for number in range(1, 5)},
+                    "kaynak": "Nişanyan",
+                }
+            ],
+        },
+        "atasozu": {
+            "damla": [
+                {
+                    "soz_id": "1125",
+                    "sozum": "damlaya damlaya göl olur",
+                    "atara": "damlaya damlaya göl olur",
+                    "anlami": "Küçük birikimler zamanla büyük bir bütün "
+                    "oluşturur.",
+                    "anahtar": "damla",
+                    "turu2": "Atasözü",
+                    "gosterim_tarihi": None,
+                }
+            ],
+        },
+        "bati": {
+            "abajur": [
+                {
+                    "kelime_id": "7",
+                    "sozcuk": "abajur",
+                    "kistdil": "Fr.",
+                    "dilacik": "abat-jour",
+                    "anlam": "<i>Lamba siperi</i>",
+                }
+            ],
+        },
+        "derleme": {
+            "abla": [
+                {
+                    "madde_id": "118",
+                    "kunye_id": "2",
+                    "madde": "abla",
+                    "madde_ekli": "abla (I)",
+                    "asilk": "",
+                    "asilkelim": "",
+                    "bakin": "",
+                    "anlam": "Büyük kız kardeş.",
+                    "sehir": "<b>Kastamonu</b>",
+                    "kisaltma": "DS",
+                    "eser_ad": "Derleme Sözlüğü",
+                    "yazar_ad": "",
+                    "yayinlayan": "Türk Dil Kurumu",
+                    "yayin_yeri": "Ankara",
+                    "yayin_yil": "1993",
+                    "fiziksel": "I. Cilt",
+                }
+            ],
+        },
+        "yazim": {
+            "kitap": [
+                {
+                    "yazim_id": "24771",
+                    "sozu": "kitap",
+                    "ekler": "-bı",
+                    "seskod": "k0321",
+                }
+            ],
+        },
+        "tarama": {
+            "kitap": [
+                {
+                    "kilavuz_id": "8",
+                    "kelime": "kitap",
+                    "kelime_no": "41",
+                    "taramalar": [
+                        {
+                            "kelime_id": "9127",
+                            "kelime": "kitap",
+                            "anlam": "bitik",
+                            "cilt": "4",
+                            "resim": "04_0291",
+                        }
+                    ],
+                }
+            ],
+        },
+        "taramaId": {
+            "9127": [
+                {
+                    "kelime_id": "9127",
+                    "kelime": "kitap",
+                    "anlam": "bitik",
+                    "cilt": "4",
+                    "resim": "04_0291",
+                }
+            ],
+        },
+        "kilavuz?prm=sks": {
+            "hala": [
+                {
+                    "id": "39",
+                    "kelime1": "hala",
+                    "eskelime1": "",
+                    "anlam1": "Babanın kız kardeşi",
+                    "ses1": "h0037",
+                    "kelime2": "hâlâ",
+                    "eskelime2": "",
+                    "anlam2": "Şimdiye kadar, henüz",
+                    "ses2": "h0038",
+                    "arama": "hala",
+                }
+            ],
+        },
+        "kilavuz?prm=syyd": {
+            "yanlız": [
+                {
+                    "id": "455",
+                    "yanliskelime": "yanlız",
+                    "dogrukelime": "yalnız",
+                    "yanlisses": "y0047",
+                    "anlam1": "Tek başına olan",
+                    "yanlisara": "yanlız",
+                }
+            ],
+        },
+        "kilavuz?prm=ysk": {
+            "abone": [
+                {
+                    "karsid": "2",
+                    "kkelime": "abone",
+                    "kkoken": "Fr.",
+                    "kkarsilik": "üye",
+                    "anlam": "Belli bir ücret karşılığında bir hizmetten "
+                    "yararlanan kimse",
+                }
+            ],
+        },
+        "adlar": {
+            "deniz": [
+                {
+                    "ad_id": "1630",
+                    "ad": "Deniz",
+                    "anlam": "Yer yüzünün çukur kesimlerini kaplayan tuzlu "
+                    "su kütlesi",
+                    "koken": "Türkçe",
+                    "cins": "3",
+                }
+            ],
+        },
+        "lehce": {
+            "ağaç": [
+                _lehce_entry(
+                    76,
+                    "ağaç",
+                    azerice="ağac",
+                    kazakca="ağaş",
+                    kirgizca="cığaç",
+                    ozbekce="yağoç",
+                    tatarca="ağaç",
+                    turkmence="agaç",
+                    rusca="derevo",
+                )
+            ],
+        },
+        "terim?terim": {
+            "": [
+                {
+                    "eser_id": "1",
+                    "eser_ad": "Bilişim Terimleri Sözlüğü",
+                    "yaytar": "2019",
+                },
+                {
+                    "eser_id": "2",
+                    "eser_ad": "Dil Bilim Terimleri Sözlüğü",
+                    "yaytar": "",
+                },
+            ],
+        },
+        "terim": {
+            "ağ": [
+                _term(
+                    2112,
+                    "ağ",
+                    "Birbirine bağlı bilgisayarlardan oluşan yapı",
+                    "Bilişim Terimleri Sözlüğü",
+                    "BTS",
+                )
+            ],
+        },
+        "eczacilik": {},
+        "hemsirelik": {},
+        "metroloji": {},
+        "icerik": {
+            "": {
+                "sayac": [{"deger": "1.024.307"}],
+                "karistirma": [{"id": "12", "yanlis": "hala", "dogru": "hâlâ"}],
+                "atasozu": [
+                    {
+                        "atasozu": "damlaya damlaya göl olur",
+                        "anlam": "Küçük birikimler zamanla büyür.",
+                    }
+                ],
+                "syyd": [
+                    {
+                        "id": "455",
+                        "yanliskelime": "yanlız",
+                        "dogrukelime": "yalnız",
+                    }
+                ],
+                "kural": [
+                    {
+                        "adi": "Büyük Harflerin Kullanıldığı Yerler",
+                        "url": "#",
+                    }
+                ],
+                "yabanci": {
+                    "karsid": "2",
+                    "kkelime": "abone",
+                    "kkoken": "Fr.",
+                    "kkarsilik": "üye",
+                    "anlam": "Belli bir ücret karşılığında bir hizmetten "
+                    "yararlanan kimse",
+                },
+                "kelime": [{"madde": "kedi", "anlam": "Evcil bir hayvan"}],
+            },
+        },
+    }
+
+
+_routes: dict[str, tuple[str, str | None]] = {
+    "/gts": ("gts", "ara"),
+    "/gtsAtasozDeyim": ("gtsAtasozDeyim", "ara"),
+    "/oneri": ("oneri", "soz"),
+    "/autocomplete.json": ("autocomplete.json", None),
+    "/assets/js/autocompleteSapka.json": ("autocompleteSapka.json", None),
+    "/etmsAutoComp.json": ("etmsAutoComp.json", None),
+    "/etms": ("etms", "ara"),
+    "/atasozu": ("atasozu", "ara"),
+    "/bati": ("bati", "ara"),
+    "/derleme": ("derleme", "ara"),
+    "/yazim": ("yazim", "ara"),
+    "/tarama": ("tarama", "ara"),
+    "/taramaId": ("taramaId", "id"),
+    "/terim": ("terim", "ara"),
+    "/adlar": ("adlar", "ara"),
+    "/lehce": ("lehce", "ara"),
+    "/eczacilik": ("eczacilik", "ara"),
+    "/hemsirelik": ("hemsirelik", "ara"),
+    "/metroloji": ("metroloji", "ara"),
+    "/icerik": ("icerik", None),
+}
+"""Endpoints with the group of their fixtures and their query parameter."""
+
+_error_page = (
+    b"<!DOCTYPE html><html><head><title>T\xc3\xbcrk Dil Kurumu</title></head>"
+    b"<body>Hata</body></html>"
+)
+
+
+class FakeTDKServer:
+    """A local HTTP server that emulates the TDK servers.
+
+    Start it with [](FakeTDKServer.start), or use it as an async context
+    manager, and send requests to [](FakeTDKServer.url), for example with
+    the `base_url` of a [](tdk.internal.http.AiohttpTransport).
+
+    The index files answer conditional requests with `304`, and every other
+    endpoint answers like the real servers do, including the `text/html`
+    content type of their JSON documents.
+
+    :param faults: The faults to inject. Can be replaced while running.
+    :param fixtures:
+        Payloads to serve in addition to [](default_fixtures),
+        grouped and keyed in the same way.
+    :param host: The host to listen on.
+    :param port: The port to listen on, `0` for any free port.
+    """
+
+    def __init__(
+        self,
+        *,
+        faults: FaultProfile = FaultProfile(),
+        fixtures: Mapping[str, Mapping[str, Any]] | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self._fixtures = default_fixtures()
+        for group, payloads in (fixtures or {}).items():
+            self._fixtures.setdefault(group, {}).update(payloads)
+        self._host = host
+        self._port = port
+        self._runner: web.AppRunner | None = None
+        self.faults = faults
+        self.requests: Counter[str] = Counter()
+        """Number of requests received, by path."""
+        self.statuses: Counter[int] = Counter()
+        """Number of responses sent, by status."""
+        self.corrupted = 0
+        """Number of responses with a broken document."""
+
+    @property
+    def faults(self) -> FaultProfile:
+        """The faults the server injects."""
+        return self._faults
+
+    @faults.setter
+    def faults(self, faults: FaultProfile) -> None:
+        self._faults = faults
+        self._random = random.Random(faults.seed)
+        self._tokens = float(faults.burst)
+        self._refilled_at = time.monotonic()
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server.
+
+        :raises RuntimeError: If the server is not running.
+        """
+        if self._runner is None:
+            raise RuntimeError("The server is not running")
+        host, port = self._runner.addresses[0][:2]
+        if ":" in host:
+            host = f"[{host}]"
+        return f"http://{host}:{port}"
+
+    def make_app(self) -> web.Application:
+        """Make the [](aiohttp.web.Application) that serves the endpoints."""
+        app = web.Application()
+        app.router.add_get("/{path:.*}", self._handle)
+        return app
+
+    async def start(self) -> None:
+        """Start listening."""
+        if self._runner is not None:
+            return
+        runner = web.AppRunner(self.make_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self._host, self._port).start()
+        self._runner = runner
+
+    async def close(self) -> None:
+        """Stop listening and drop the open connections."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> FakeTDKServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def get_payload(self, request: web.Request, /) -> Any:
+        """Get the payload of a request, as the real servers would."""
+        path, query = request.path, request.query
+        if path == "/kilavuz":
+            group = f"kilavuz?prm={query.get('prm', '')}"
+            key = query.get("ara", "")
+        elif path == "/terim" and "terim" in query:
+            group, key = "terim?terim", ""
+        elif path in _routes:
+            group, parameter = _routes[path]
+            key = query.get(parameter, "") if parameter else ""
+        else:
+            return None
+        payloads = self._fixtures.get(group, {})
+        payload = payloads.get(
+            lowercase(key, keep_nonletters=True, remove_hats=False)
+        )
+        if group == "terim" and isinstance(payload, list):
+            names = query.get("eser_ad", "").split("@")
+            payload = [term for term in payload if term["sozluk_ad"] in names]
+        if group == "oneri":
+            return payload or []
+        return payload or NOT_FOUND
+
+    def _throttle(self) -> float | None:
+        """Take a token, or get the seconds until one is available."""
+        rate = self._faults.rate_limit
+        if rate is None:
+            return None
+        now = time.monotonic()
+        self._tokens = min(
+            self._faults.burst,
+            self._tokens + (now - self._refilled_at) * rate,
+        )
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return None
+        return (1 - self._tokens) / rate
+
+    def _sample_latency(self) -> float:
+        faults = self._faults
+        latency = faults.latency
+        if latency > 0 and faults.latency_sigma > 0:
+            latency = self._random.lognormvariate(
+                math.log(latency), faults.latency_sigma
+            )
+        if self._random.random() < faults.tail_rate:
+            latency += faults.tail_latency
+        return latency
+
+    def _respond(self, status: int, **kwargs) -> web.Response:
+        self.statuses[status] += 1
+        return web.Response(status=status, **kwargs)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests[request.path] += 1
+        faults = self._faults
+
+        wait = self._throttle()
+        if wait is not None:
+            return self._respond(
+                429, headers={"Retry-After": f"{math.ceil(wait)}"}
+            )
+
+        latency = self._sample_latency()
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        if self._random.random() < faults.error_rate:
+            return self._respond(
+                self._random.choice(faults.error_statuses),
+                body=_error_page,
+                content_type="text/html",
+            )
+
+        payload = self.get_payload(request)
+        if payload is None:
+            return self._respond(
+                404, body=_error_page, content_type="text/html"
+            )
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+        if request.path.endswith(".json"):
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                return self._respond(304, headers={"ETag": etag})
+            headers = {"ETag": etag}
+            content_type = "application/json"
+        else:
+            headers = {}
+            content_type = "text/html"
+
+        roll = self._random.random()
+        if roll < faults.invalid_json_rate:
+            self.corrupted += 1
+            body = _error_page
+        elif roll < faults.invalid_json_rate + faults.truncated_rate:
+            self.corrupted += 1
+            body = body[: len(body) // 2]
+
+        return self._respond(
+            200,
+            body=body,
+            headers=headers,
+            content_type=content_type,
+            charset="utf-8",
+        )
@@ -0,0 +1,280 @@
+"""
+This module provides a JSON HTTP API for the dictionaries, so that programs in
+any language can share one client, with its connection pool, cache, rate
+limit and coalescing of identical calls, instead of each making their own
+requests to the TDK servers.
+
+Start it with `python -m tdk serve`, then call any function of
+[](gateway_functions) with its parameters in the query string:
+
+```console
+$ python -m tdk serve --port 8080 --rate-limit 10
+$ curl 'localhost:8080/search_gts?query=kedi'
+$ curl 'localhost:8080/search_names?query=deniz&according_to=name&gender=male'
+$ curl 'localhost:8080/search_lehce?lehce=kazakh_turkish&query=ağ'
+```
+
+Results are the models of the dictionaries, serialized with their field
+names, such as `meanings` rather than `anlamlarListe`.
+Enumerations can be given by value or by name, parameters that take several
+values are repeated, and a `timeout` in seconds bounds the call. See
+[](tdk.internal.deadlines).
+
+| Status | Meaning                                                          |
+|--------|------------------------------------------------------------------|
+| 200    | The result, which is an empty list if nothing was found.         |
+| 400    | A parameter is missing or invalid.                               |
+| 404    | There is no such function.                                       |
+| 502    | The TDK servers failed or answered with something unexpected.    |
+| 503    | The client is shutting down, or its circuit breaker is open.     |
+| 504    | The call did not finish before its `timeout` or the gateway's.   |
+
+Errors are answered with a JSON object with an `error` message.
+`GET /` lists the functions and their parameters,
+`GET /health` tells whether the gateway accepts calls, and
+`GET /metrics` renders the metrics of the client.
+See [](tdk.internal.metrics).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections.abc
+import inspect
+import types
+import typing
+from collections.abc import AsyncIterator
+from enum import Enum
+from typing import Any, NamedTuple
+
+from aiohttp import ClientError, ClientResponseError, web
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import to_json
+
+from tdk.client import (
+    CircuitOpenError,
+    ClientDrainingError,
+    DeadlineExceededError,
+    TDKClient,
+    deadline,
+)
+from tdk.internal.metrics import (
+    MetricsRegistry,
+    default_registry,
+    exposition_content_type,
+)
+from tdk.internal.utils import adapt_input_to_enum
+
+
+__all__ = [
+    "gateway_functions",
+    "client_key",
+    "make_app",
+]
+
+gateway_functions: tuple[str, ...] = (
+    "search_saying",
+    "search_western",
+    "get_terms_dictionaries",
+    "search_terms",
+    "search_derleme",
+    "get_etms_index",
+    "search_etms",
+    "get_gts_index",
+    "get_gts_circumflex_index",
+    "search_gts",
+    "search_gts_proverbs_and_phrases",
+    "get_gts_suggestions",
+    "search_names",
+    "search_lehce",
+    "search_sks",
+    "search_syyd",
+    "search_tarama",
+    "get_tarama_scans",
+    "search_spelling",
+    "search_loanwords",
+    "get_homepage_content",
+)
+"""The methods of [](tdk.client.TDKClient) that the gateway serves,
+each at `/<name>`."""
+
+client_key = web.AppKey("client", TDKClient)
+"""The key of the client of a gateway application."""
+
+
+class _Parameter(NamedTuple):
+    name: str
+    adapter: TypeAdapter
+    enums: tuple[type[Enum], ...]
+    many: bool
+    positional: bool
+    required: bool
+
+    def parse(self, values: list[str]) -> Any:
+        values = [self._adapt_enum_name(value) for value in values]
+        if self.many:
+            return self.adapter.validate_python(values)
+        return self.adapter.validate_python(values[-1])
+
+    def _adapt_enum_name(self, value: str) -> Any:
+        for enum in self.enums:
+            try:
+                return adapt_input_to_enum(value, enum)
+            except ValueError:
+                pass
+        return value
+
+
+def _get_enums(annotation: Any) -> tuple[type[Enum], ...]:
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return (annotation,)
+    return tuple(
+        enum
+        for argument in typing.get_args(annotation)
+        for enum in _get_enums(argument)
+    )
+
+
+def _get_parameters(name: str) -> list[_Parameter]:
+    method = getattr(TDKClient, name)
+    hints = typing.get_type_hints(method)
+    parameters = []
+    for parameter in list(inspect.signature(method).parameters.values())[1:]:
+        if parameter.name == "timeout":
+            # Read by `_call` itself, as the deadline of the call.
+            continue
+        annotation = hints[parameter.name]
+        many = typing.get_origin(annotation) is collections.abc.Iterable
+        if many:
+            # Validate into a list, as an iterable is validated lazily.
+            (item,) = typing.get_args(annotation)
+            annotation = types.GenericAlias(list, item)
+        parameters.append(
+            _Parameter(
+                name=parameter.name,
+                adapter=TypeAdapter(annotation),
+                enums=_get_enums(annotation),
+                many=many,
+                positional=parameter.kind is parameter.POSITIONAL_ONLY,
+                required=parameter.default is parameter.empty,
+            )
+        )
+    return parameters
+
+
+def _error(status: int, message: str, **details: Any) -> web.Response:
+    return web.json_response({"error": message, **details}, status=status)
+
+
+async def _call(
+    client: TDKClient, name: str, parameters: list[_Parameter], query: Any
+) -> web.Response:
+    args: list[Any] = []
+    kwargs: dict[str, Any] = {}
+    for parameter in parameters:
+        values = query.getall(parameter.name, [])
+        if not values:
+            if parameter.required:
+                return _error(400, f"Missing parameter: {parameter.name}")
+            continue
+        try:
+            value = parameter.parse(values)
+        except ValidationError as e:
+            return _error(
+                400,
+                f"Invalid parameter: {parameter.name}",
+                details=e.errors(include_url=False, include_context=False),
+            )
+        if parameter.positional:
+            args.append(value)
+        else:
+            kwargs[parameter.name] = value
+    try:
+        timeout = float(query["timeout"]) if "timeout" in query else None
+    except ValueError:
+        return _error(400, "Invalid parameter: timeout")
+    try:
+        with deadline(timeout):
+            result = await getattr(client, name)(*args, **kwargs)
+    except DeadlineExceededError:
+        return _error(504, "The call timed out")
+    except (ClientDrainingError, CircuitOpenError) as e:
+        return _error(503, str(e) or type(e).__name__)
+    except ClientResponseError as e:
+        return _error(502, "The TDK servers failed", upstream_status=e.status)
+    except (ClientError, asyncio.TimeoutError):
+        return _error(502, "The TDK servers could not be reached")
+    except (ValidationError, TypeError, ValueError):
+        # The dictionary could not make sense of the response.
+        return _error(502, "The TDK servers answered unexpectedly")
+    return web.Response(body=to_json(result), content_type="application/json")
+
+
+def make_app(
+    client: TDKClient | None = None,
+    *,
+    metrics: MetricsRegistry = default_registry,
+    drain_timeout: float = 10.0,
+    **client_options: Any,
+) -> web.Application:
+    """Make the [](aiohttp.web.Application) of a gateway.
+
+    :param client:
+        The client that makes the calls.
+        The gateway does not close clients it did not create.
+    :param metrics: The registry rendered at `/metrics`.
+    :param drain_timeout:
+        Seconds the calls in flight are given when the application shuts
+        down. See [](tdk.client.TDKClient.drain).
+    :param client_options:
+        Arguments of the [](tdk.client.TDKClient) that is created when the
+        application starts, if `client` is not given.
+    """
+    functions = {name: _get_parameters(name) for name in gateway_functions}
+
+    async def index(request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                name: [parameter.name for parameter in parameters]
+                for name, parameters in functions.items()
+            }
+        )
+
+    async def health(request: web.Request) -> web.Response:
+        client = request.app[client_key]
+        healthy = not (client.closed or client.draining)
+        return web.json_response(
+            {"healthy": healthy, "calls_in_flight": client.calls_in_flight},
+            status=200 if healthy else 503,
+        )
+
+    async def render_metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            body=metrics.render(),
+            headers={"Content-Type": exposition_content_type},
+        )
+
+    async def call(request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+        if name not in functions:
+            return _error(404, f"No such function: {name}")
+        return await _call(
+            request.app[client_key], name, functions[name], request.query
+        )
+
+    async def client_context(app: web.Application) -> AsyncIterator[None]:
+        if client is not None:
+            app[client_key] = client
+            yield
+            return
+        app[client_key] = TDKClient(metrics=metrics, **client_options)
+        yield
+        await app[client_key].drain(drain_timeout)
+
+    app = web.Application()
+    app.cleanup_ctx.append(client_context)
+    app.router.add_get("/", index)
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", render_metrics)
+    app.router.add_get("/{name}", call)
+    return app
@@ -0,0 +1,155 @@
+"""
+This module provides hedged requests, which cut the latency tail of the
+TDK servers.
+
+When a request has not been answered within the usual response time of its
+endpoint, a [](Hedger) sends a duplicate of it and uses whichever response
+arrives first, cancelling the other request.
+A budget limits the duplicates to a share of the requests, so hedging
+cannot multiply the load on the servers when they are slow for everyone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+__all__ = [
+    "HedgingPolicy",
+    "Hedger",
+]
+
+_T = TypeVar("_T")
+
+
+class HedgingPolicy(BaseModel):
+    """When requests are hedged.
+
+    A request is hedged once it has taken longer than the `percentile` of
+    the last `window` response times of its endpoint, so the delay follows
+    the latency of the servers as it changes.
+    Every request adds `budget` to a balance of hedges, up to
+    `max_balance`, and every hedge takes one from it, so at most a `budget`
+    share of the requests are hedged in the long run.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    percentile: float = Field(default=0.95, gt=0, lt=1)
+    """The percentile of the response times after which requests are
+    hedged."""
+    window: int = Field(default=200, ge=1)
+    """Number of the last response times of an endpoint that the percentile
+    is estimated from."""
+    min_samples: int = Field(default=20, ge=1)
+    """Number of responses from an endpoint needed to estimate the
+    percentile, at most `window`."""
+    initial_delay: float = Field(default=1.0, ge=0)
+    """Seconds after which requests are hedged until the percentile can be
+    estimated."""
+    min_delay: float = Field(default=0.005, ge=0)
+    """Minimum seconds to wait before hedging a request."""
+    budget: float = Field(default=0.05, ge=0, le=1)
+    """Hedges earned per request."""
+    max_balance: float = Field(default=10.0, ge=1)
+    """Maximum number of hedges that can be saved up."""
+
+
+class Hedger:
+    """Hedges requests as a [](HedgingPolicy) allows.
+
+    The last response times are kept per endpoint.
+    """
+
+    def __init__(self, policy: HedgingPolicy = HedgingPolicy()):
+        self.policy = policy
+        self._latencies: dict[str, deque[float]] = {}
+        self._balance = 1.0
+        self.hedged = 0
+        """Number of requests that were hedged."""
+        self.hedge_wins = 0
+        """Number of hedged requests that were answered by the duplicate."""
+        self.denied = 0
+        """Number of requests that were not hedged for lack of budget."""
+
+    def get_delay(self, endpoint: str, /) -> float:
+        """Get the seconds after which a request to an endpoint is hedged."""
+        policy = self.policy
+        latencies = self._latencies.get(endpoint)
+        if latencies is None or len(latencies) < min(
+            policy.min_samples, policy.window
+        ):
+            return policy.initial_delay
+        rank = math.ceil(policy.percentile * len(latencies))
+        return max(sorted(latencies)[rank - 1], policy.min_delay)
+
+    def observe(self, endpoint: str, seconds: float, /) -> None:
+        """Record the response time of a request to an endpoint."""
+        latencies = self._latencies.get(endpoint)
+        if latencies is None:
+            latencies = self._latencies[endpoint] = deque(
+                maxlen=self.policy.window
+            )
+        latencies.append(seconds)
+
+    def _take_hedge(self) -> bool:
+        if self._balance < 1:
+            self.denied += 1
+            return False
+        self._balance -= 1
+        self.hedged += 1
+        return True
+
+    async def run(
+        self, endpoint: str, send: Callable[[], Awaitable[_T]], /
+    ) -> _T:
+        """Call `send`, and call it again if it is slow to return.
+
+        The first result is returned and the other call is cancelled.
+        If a call fails while the other one is running, the other one is
+        awaited, and the first error is raised if both fail.
+        """
+        self._balance = min(
+            self._balance + self.policy.budget, self.policy.max_balance
+        )
+
+        async def timed_send() -> _T:
+            start = time.perf_counter()
+            result = await send()
+            self.observe(endpoint, time.perf_counter() - start)
+            return result
+
+        first = asyncio.ensure_future(timed_send())
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(
+                tasks, timeout=self.get_delay(endpoint)
+            )
+            if done or not self._take_hedge():
+                return await first
+            tasks.append(asyncio.ensure_future(timed_send()))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in tasks:
+                    if task in done and task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+            return first.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Don't warn about errors of the losing call.
+                    task.exception()
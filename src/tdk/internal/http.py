@@ -1,11 +1,38 @@
 """
-This module provides helper functions for making HTTP requests.
+This module provides helper functions and transports for making HTTP requests.
+
+A transport performs the requests of a [](tdk.client.TDKClient).
+The default [](AiohttpTransport) makes real requests with aiohttp.
+To run benchmarks and tests without a network connection, responses can be
+recorded to a cassette file with a [](RecordingTransport) and served back
+with a [](ReplayTransport).
 """
-from collections.abc import MutableMapping
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+from collections.abc import Callable, Mapping, MutableMapping
 from functools import wraps
-from typing import Optional
+from typing import Any, NamedTuple, Optional, Protocol
 
-from aiohttp import ClientSession
+from aiohttp import (
+    ClientResponseError,
+    ClientSession,
+    RequestInfo,
+    TCPConnector,
+)
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from tdk.internal.cache import get_endpoint
+from tdk.internal.deadlines import deadline
+from tdk.internal.tracing import (
+    LatencyRecorder,
+    RequestTimer,
+    make_trace_config,
+)
 
 default_headers: dict[str, str] = {
     "Accept": "application/json, text/javascript, */*; q=0.01",
@@ -18,12 +45,27 @@ default_headers: dict[str, str] = {
 }
 """Default headers for HTTP requests."""
 
+default_connector_options: dict[str, int | float | bool] = {
+    "limit": 100,
+    "limit_per_host": 20,
+    "keepalive_timeout": 30.0,
+    "use_dns_cache": True,
+    "ttl_dns_cache": 300,
+}
+"""Default arguments for the [](aiohttp.TCPConnector) of a client.
+
+All requests go to the same host, so connections are kept alive for long
+and DNS lookups are cached for a few minutes.
+"""
+
 
 def session_maker(**kwargs) -> ClientSession:
     """Create a [](aiohttp.ClientSession) with some default headers.
 
     This is preferred over creating a base [](aiohttp.ClientSession) because
     the TDK servers block requests that do not have headers.
+    The session also traces the phases of the requests.
+    See [](tdk.internal.tracing).
 
     :param kwargs:
         Additional arguments to be passed to [](aiohttp.ClientSession).
@@ -37,6 +79,10 @@ def session_maker(**kwargs) -> ClientSession:
         if a `headers` argument is provided and it is not a
         [](collections.abc.MutableMapping).
     """
+    kwargs["trace_configs"] = [
+        *kwargs.get("trace_configs", ()),
+        make_trace_config(),
+    ]
     if "headers" not in kwargs:
         return ClientSession(headers=default_headers, **kwargs)
     if not isinstance(kwargs["headers"], MutableMapping):
@@ -45,23 +91,332 @@ def session_maker(**kwargs) -> ClientSession:
     return ClientSession(**kwargs)
 
 
-def make_http_session_optional(func):
-    """Make [](aiohttp.ClientSession) optional for functions that require it.
+def connector_maker(**kwargs) -> TCPConnector:
+    """Create a [](aiohttp.TCPConnector) tuned for the TDK servers.
+
+    :param kwargs:
+        Arguments to be passed to [](aiohttp.TCPConnector).
+        They override the values in [](default_connector_options).
+    """
+    return TCPConnector(**{**default_connector_options, **kwargs})
+
+
+class TransportResponse(NamedTuple):
+    """A response received by a transport."""
+
+    status: int
+    """The HTTP status of the response."""
+    headers: Mapping[str, str]
+    """The headers of the response."""
+    body: bytes
+    """The body of the response."""
+    timings: Mapping[str, float] | None = None
+    """The durations of the phases of the request, if the transport
+    measured them. See [](tdk.internal.tracing)."""
+
+
+class Transport(Protocol):
+    """Performs the HTTP requests of a client."""
+
+    async def get(
+        self,
+        url: str,
+        /,
+        *,
+        params: Mapping[str, Any] | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> TransportResponse:
+        """Perform a GET request and read the whole response."""
+        ...
 
-    Creates a decorator
-    that provides a default [](aiohttp.ClientSession)
-    created by [](session_maker)
-    to the wrapped function.
+    async def close(self) -> None:
+        """Release the resources of the transport."""
+        ...
+
+
+def make_response_error(
+    url: str, response: TransportResponse, /
+) -> ClientResponseError:
+    """Make the error that aiohttp raises for an error status."""
+    return ClientResponseError(
+        RequestInfo(
+            url=URL(url),
+            method="GET",
+            headers=CIMultiDictProxy(CIMultiDict()),
+            real_url=URL(url),
+        ),
+        (),
+        status=response.status,
+        message=f"Status {response.status}",
+        headers=CIMultiDictProxy(CIMultiDict(response.headers)),
+    )
+
+
+def rebase_url(url: str, base_url: str | URL, /) -> str:
+    """Move a URL to another origin, keeping its path and query.
+
+    ```pycon
+    >>> rebase_url("https://sozluk.gov.tr/gts?ara=kedi", "http://[::1]:8080")
+    'http://[::1]:8080/gts?ara=kedi'
+    ```
+    """
+    base = URL(base_url)
+    parsed = URL(url)
+    rebased = str(base.with_path(base.path.rstrip("/") + parsed.path))
+    if parsed.raw_query_string:
+        rebased += "?" + parsed.raw_query_string
+    return rebased
+
+
+def make_request_key(url: str, params: Mapping[str, Any] | None, /) -> str:
+    """Make a key that identifies a GET request, regardless of its host.
+
+    ```pycon
+    >>> make_request_key("https://sozluk.gov.tr/gts", {"ara": "kedi"})
+    '/gts?ara=kedi'
+    ```
+    """
+    parsed = URL(url)
+    query = {**parsed.query, **{k: f"{v}" for k, v in (params or {}).items()}}
+    return str(URL.build(path=parsed.path, query=sorted(query.items())))
+
+
+class AiohttpTransport:
+    """Performs requests with an [](aiohttp.ClientSession).
+
+    The session is created lazily, on the first request, with
+    [](session_maker) and a connector made by [](connector_maker).
+    The durations of the phases of the requests are recorded per endpoint
+    in [](AiohttpTransport.latencies).
+    Sessions that are not made by [](session_maker) only have their
+    `download` and `total` phases recorded.
+
+    :param http_session:
+        An existing session to use.
+        The transport does not close sessions it did not create.
+    :param connector_options:
+        Arguments for [](connector_maker),
+        ignored if `http_session` is given.
+    :param base_url:
+        An origin to send the requests to instead of the TDK servers,
+        such as a [](tdk.internal.fake_server.FakeTDKServer).
+        See [](rebase_url).
+    """
+
+    def __init__(
+        self,
+        *,
+        http_session: ClientSession | None = None,
+        connector_options: Mapping[str, Any] | None = None,
+        base_url: str | None = None,
+    ):
+        self._http_session = http_session
+        self._owns_http_session = http_session is None
+        self._connector_options = dict(connector_options or {})
+        self.base_url = base_url
+        self.latencies = LatencyRecorder()
+        """The durations of the phases of the requests."""
+
+    @property
+    def http_session(self) -> ClientSession:
+        """The session used by the transport, created on first access."""
+        if self._http_session is None:
+            self._http_session = session_maker(
+                connector=connector_maker(**self._connector_options)
+            )
+        return self._http_session
+
+    async def get(
+        self,
+        url: str,
+        /,
+        *,
+        params: Mapping[str, Any] | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> TransportResponse:
+        if self.base_url is not None:
+            url = rebase_url(url, self.base_url)
+        timer = RequestTimer()
+        timer.start("total")
+        async with self.http_session.get(
+            url, params=params, headers=headers, trace_request_ctx=timer
+        ) as response:
+            timer.start("download")
+            body = await response.read()
+            timer.end("download")
+        timer.end("total")
+        self.latencies.record(get_endpoint(url), timer)
+        return TransportResponse(
+            status=response.status,
+            headers=response.headers,
+            body=body,
+            timings=timer.durations,
+        )
+
+    async def close(self) -> None:
+        if self._owns_http_session and self._http_session is not None:
+            await self._http_session.close()
+
+
+def _encode_body(body: bytes) -> dict[str, str]:
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(encoded: Mapping[str, str]) -> bytes:
+    if "text" in encoded:
+        return encoded["text"].encode("utf-8")
+    return base64.b64decode(encoded["base64"])
+
+
+class RecordingTransport:
+    """Records the requests of another transport to a cassette file.
+
+    Every response is written to the cassette when the transport is closed,
+    or when [](RecordingTransport.save) is called.
+    The cassette can be served back with a [](ReplayTransport).
+
+    :param inner: The transport that performs the requests.
+    :param path: The path of the cassette file. It is overwritten.
+    """
+
+    def __init__(self, inner: Transport, path: str | os.PathLike):
+        self.inner = inner
+        self.path = os.fspath(path)
+        self.interactions: list[dict[str, Any]] = []
+
+    async def get(
+        self,
+        url: str,
+        /,
+        *,
+        params: Mapping[str, Any] | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> TransportResponse:
+        response = await self.inner.get(url, params=params, headers=headers)
+        self.interactions.append(
+            {
+                "request": make_request_key(url, params),
+                "status": response.status,
+                "headers": dict(response.headers),
+                "body": _encode_body(response.body),
+            }
+        )
+        return response
+
+    def save(self) -> None:
+        """Write the recorded responses to the cassette file."""
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"version": 1, "interactions": self.interactions},
+                file,
+                ensure_ascii=False,
+                indent=1,
+            )
+
+    async def close(self) -> None:
+        self.save()
+        await self.inner.close()
+
+
+class ReplayTransport:
+    """Serves the responses recorded by a [](RecordingTransport).
+
+    Requests are matched by their path and query parameters,
+    so a cassette can be replayed against any host.
+    If a request was recorded several times, its responses are served in
+    the recorded order, and the last one is repeated after that.
+
+    :param path: The path of the cassette file.
+    :param latency:
+        Seconds to wait before serving each response,
+        or a function that returns them, to simulate a network.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        *,
+        latency: float | Callable[[], float] = 0.0,
+    ):
+        with open(path, encoding="utf-8") as file:
+            cassette = json.load(file)
+        self._responses: dict[str, list[TransportResponse]] = {}
+        for interaction in cassette["interactions"]:
+            self._responses.setdefault(interaction["request"], []).append(
+                TransportResponse(
+                    status=interaction["status"],
+                    headers=CIMultiDictProxy(
+                        CIMultiDict(interaction["headers"])
+                    ),
+                    body=_decode_body(interaction["body"]),
+                )
+            )
+        self._served: dict[str, int] = {}
+        self._latency = latency
+
+    async def get(
+        self,
+        url: str,
+        /,
+        *,
+        params: Mapping[str, Any] | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> TransportResponse:
+        """Serve the recorded response of a request.
+
+        :raises LookupError: If the request was not recorded.
+        """
+        key = make_request_key(url, params)
+        responses = self._responses.get(key)
+        if not responses:
+            raise LookupError(f"No response was recorded for {key}")
+        index = self._served.get(key, 0)
+        self._served[key] = index + 1
+        latency = self._latency() if callable(self._latency) else self._latency
+        if latency > 0:
+            await asyncio.sleep(latency)
+        return responses[min(index, len(responses) - 1)]
+
+    async def close(self) -> None:
+        pass
+
+
+def make_client_optional(func):
+    """Make [](tdk.client.TDKClient) optional for functions that require it.
+
+    Creates a decorator that provides a client to the wrapped function.
+
+    - If a `client` is given, it is used as is.
+    - If an `http_session` is given, it is wrapped in a client
+      that uses the session but does not close it.
+    - Otherwise, the default client of the running event loop is used.
+      See [](tdk.client.get_default_client).
+
+    The wrapped function also accepts a `timeout`, the number of seconds the
+    call may take in total. See [](tdk.internal.deadlines).
     """
     @wraps(func)
-    async def wrapper(*args, **kwargs):
-        if "http_session" in kwargs:
-            return await func(*args, **kwargs)
-        async with session_maker() as http_session:
-            return await func(*args, http_session=http_session, **kwargs)
+    async def wrapper(
+        *args, client=None, http_session=None, timeout=None, **kwargs
+    ):
+        # Imported here because the client module imports every dictionary.
+        from tdk.client import TDKClient, get_default_client
+
+        if client is None:
+            if http_session is not None:
+                client = TDKClient(http_session=http_session)
+            else:
+                client = get_default_client()
+        with deadline(timeout):
+            return await client._call(func, *args, **kwargs)
 
     # typing:
     wrapper.__annotations__ = func.__annotations__.copy()
+    wrapper.__annotations__["client"] = Optional["TDKClient"]
     wrapper.__annotations__["http_session"] = Optional[ClientSession]
+    wrapper.__annotations__["timeout"] = Optional[float]
 
     return wrapper
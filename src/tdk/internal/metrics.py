@@ -0,0 +1,380 @@
+"""
+This module provides the metrics that the client records about its requests.
+
+Clients record their requests, cache lookups, retries and validation
+failures in a [](MetricsRegistry), by default the process-wide
+[](default_registry), which renders them in the Prometheus text format:
+
+```python
+from tdk.internal.metrics import default_registry, exposition_content_type
+
+async def metrics(request):
+    return web.Response(
+        body=default_registry.render(),
+        headers={"Content-Type": exposition_content_type},
+    )
+```
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+
+from pydantic import BaseModel
+
+
+__all__ = [
+    "default_latency_buckets",
+    "Histogram",
+    "HistogramSnapshot",
+    "Counter",
+    "Gauge",
+    "MetricsRegistry",
+    "ClientMetrics",
+    "default_registry",
+    "exposition_content_type",
+]
+
+
+default_latency_buckets: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+"""Default upper bounds of the buckets of a latency [](Histogram), in seconds.
+"""
+
+
+class HistogramSnapshot(BaseModel):
+    """The state of a [](Histogram) at one point in time."""
+
+    count: int
+    """Number of observed values."""
+    sum: float
+    """Sum of the observed values."""
+    buckets: list[tuple[float, int]]
+    """Upper bounds of the buckets, with the number of values that are less
+    than or equal to them. The last bound is infinity."""
+    p50: float
+    """Estimated median of the observed values."""
+    p90: float
+    """Estimated 90th percentile of the observed values."""
+    p99: float
+    """Estimated 99th percentile of the observed values."""
+
+    @property
+    def mean(self) -> float:
+        """Mean of the observed values."""
+        return self.sum / self.count if self.count else 0.0
+
+
+class Histogram:
+    """Counts observed values in buckets with fixed bounds.
+
+    Percentiles are estimated by interpolating linearly within a bucket,
+    as Prometheus does.
+
+    :param buckets: The upper bounds of the buckets, in ascending order.
+        A bucket for larger values is added after them.
+    :raises ValueError: If the bounds are not in ascending order.
+    """
+
+    def __init__(self, buckets: Sequence[float] = default_latency_buckets):
+        if list(buckets) != sorted(set(buckets)):
+            raise ValueError("buckets must be in ascending order")
+        self.bounds: tuple[float, ...] = (*buckets, float("inf"))
+        self._counts = [0] * len(self.bounds)
+        self.count = 0
+        """Number of observed values."""
+        self.sum = 0.0
+        """Sum of the observed values."""
+
+    def observe(self, value: float, /) -> None:
+        """Count a value."""
+        self._counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> list[int]:
+        """Get the number of values in each bucket and the ones before it."""
+        counts = []
+        total = 0
+        for count in self._counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def quantile(self, q: float, /) -> float:
+        """Estimate the `q` quantile of the observed values.
+
+        Values in the last bucket are estimated as the largest finite bound.
+
+        :param q: The quantile, between 0 and 1.
+        :returns: The estimate, or `0.0` if no values were observed.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        lower_bound = 0.0
+        lower_count = 0
+        for bound, count in zip(self.bounds, self.cumulative_counts()):
+            if count >= rank and count > lower_count:
+                if bound == float("inf"):
+                    return lower_bound
+                share = (rank - lower_count) / (count - lower_count)
+                return lower_bound + (bound - lower_bound) * share
+            lower_bound = bound
+            lower_count = count
+        return lower_bound
+
+    def snapshot(self) -> HistogramSnapshot:
+        """Get the current state of the histogram."""
+        return HistogramSnapshot(
+            count=self.count,
+            sum=self.sum,
+            buckets=list(zip(self.bounds, self.cumulative_counts())),
+            p50=self.quantile(0.5),
+            p90=self.quantile(0.9),
+            p99=self.quantile(0.99),
+        )
+
+    def reset(self) -> None:
+        """Forget the observed values."""
+        self._counts = [0] * len(self.bounds)
+        self.count = 0
+        self.sum = 0.0
+
+
+exposition_content_type = "text/plain; version=0.0.4; charset=utf-8"
+"""The content type of [](MetricsRegistry.render)."""
+
+_name_pattern = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*")
+
+
+def _format_value(value: float, /) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return f"{int(value)}"
+    return repr(value)
+
+
+def _escape(value: str, /) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Value:
+    """The value of a metric with one set of label values."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, /) -> None:
+        """Add `amount` to the value."""
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0, /) -> None:
+        """Subtract `amount` from the value."""
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float, /) -> None:
+        """Replace the value."""
+        self.value = value
+
+
+class _Metric:
+    type = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ):
+        if not _name_pattern.fullmatch(name):
+            raise ValueError(f"Invalid metric name: {name!r}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], _Value] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: str) -> _Value:
+        """Get the value of the metric with some label values.
+
+        :raises ValueError: If the label names don't match the metric.
+        """
+        try:
+            key = tuple(f"{labels[name]}" for name in self.labelnames)
+        except KeyError:
+            key = None
+        if key is None or len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} has the labels {self.labelnames}, "
+                f"not {tuple(labels)}"
+            )
+        value = self._values.get(key)
+        if value is None:
+            with self._lock:
+                value = self._values.setdefault(key, _Value())
+        return value
+
+    def get(self, **labels: str) -> float:
+        """Get the current value of the metric with some label values."""
+        return self.labels(**labels).value
+
+    def render(self) -> str:
+        """Render the metric in the Prometheus text format."""
+        help_text = self.documentation.replace("\\", "\\\\").replace(
+            "\n", "\\n"
+        )
+        lines = [
+            f"# HELP {self.name} {help_text}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for key, value in sorted(self._values.items()):
+            if key:
+                labels = ",".join(
+                    f'{name}="{_escape(label)}"'
+                    for name, label in zip(self.labelnames, key)
+                )
+                lines.append(
+                    f"{self.name}{{{labels}}} {_format_value(value.value)}"
+                )
+            else:
+                lines.append(f"{self.name} {_format_value(value.value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(_Metric):
+    """A metric whose values only go up."""
+
+    type = "counter"
+
+
+class Gauge(_Metric):
+    """A metric whose values go up and down."""
+
+    type = "gauge"
+
+
+class MetricsRegistry:
+    """A set of metrics that are rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(
+        self,
+        kind: type[_Metric],
+        name: str,
+        documentation: str,
+        labels: Iterable[str],
+    ):
+        labels = tuple(labels)
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = kind(name, documentation, labels)
+        if type(metric) is not kind or metric.labelnames != labels:
+            raise ValueError(f"{name} is already registered differently")
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> Counter:
+        """Get the counter with a name, registering it if it is new.
+
+        :raises ValueError:
+            If a metric with that name has another type or other labels.
+        """
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> Gauge:
+        """Get the gauge with a name, registering it if it is new.
+
+        :raises ValueError:
+            If a metric with that name has another type or other labels.
+        """
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def get(self, name: str, /) -> _Metric | None:
+        """Get a registered metric by its name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        return "".join(
+            self._metrics[name].render() for name in sorted(self._metrics)
+        )
+
+
+default_registry = MetricsRegistry()
+"""The registry that clients record their metrics in by default."""
+
+
+class ClientMetrics:
+    """The metrics that clients record in a registry.
+
+    Requests are labelled with the dictionary that made them,
+    such as `gts` or `bst`, or with their endpoint if they were not made by
+    a dictionary function.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self.requests = registry.counter(
+            "tdk_requests_total",
+            "Requests sent to the TDK servers, by response status, "
+            "or 'error' if they failed without a response.",
+            ["dictionary", "status"],
+        )
+        self.response_bytes = registry.counter(
+            "tdk_response_bytes_total",
+            "Bytes downloaded from the TDK servers.",
+            ["dictionary"],
+        )
+        self.retries = registry.counter(
+            "tdk_retries_total",
+            "Requests retried after a transient failure.",
+            ["dictionary"],
+        )
+        self.cache_hits = registry.counter(
+            "tdk_cache_hits_total",
+            "Responses served from the response cache.",
+            ["dictionary"],
+        )
+        self.cache_misses = registry.counter(
+            "tdk_cache_misses_total",
+            "Responses not found in the response cache.",
+            ["dictionary"],
+        )
+        self.validation_failures = registry.counter(
+            "tdk_validation_failures_total",
+            "Responses that did not match the models of the dictionaries.",
+            ["dictionary"],
+        )
+        self.in_flight = registry.gauge(
+            "tdk_in_flight_requests",
+            "Requests sent to the TDK servers and not answered yet.",
+        )
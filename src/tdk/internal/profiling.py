@@ -0,0 +1,160 @@
+"""
+This module provides an opt-in profiler for the dictionary functions.
+
+While a [](Profiler) is active, the wall time of every dictionary function
+called in its context is split into three phases:
+
+- `transport`: getting the response, including cache lookups, queueing,
+  the network and retries,
+- `decode`: decoding the JSON documents,
+- `validation`: the rest of the call, which is mostly the validation of the
+  decoded documents by pydantic.
+
+```python
+from tdk.client import Profiler
+
+with Profiler() as profiler:
+    await client.search_terms(dictionaries, "ağ")
+print(profiler.report())
+```
+
+The profiler is carried by a [](contextvars.ContextVar), so it sees the
+calls made by the tasks started in its context, and nothing else.
+Calls that are coalesced with a call already in flight are not profiled
+again.
+"""
+
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar, Token
+
+from pydantic import BaseModel
+
+
+__all__ = [
+    "FunctionProfile",
+    "Profiler",
+]
+
+
+class FunctionProfile(BaseModel):
+    """The time spent in the calls to a function, by phase, in seconds."""
+
+    calls: int = 0
+    """Number of profiled calls."""
+    total: float = 0.0
+    """Wall time of the calls."""
+    transport: float = 0.0
+    """Time spent getting responses."""
+    decode: float = 0.0
+    """Time spent decoding JSON documents."""
+
+    @property
+    def validation(self) -> float:
+        """Time spent on the rest of the calls, mostly validation."""
+        return max(self.total - self.transport - self.decode, 0.0)
+
+
+class _CallTimes:
+    """The time spent in the phases of one call."""
+
+    __slots__ = ("transport", "decode")
+
+    def __init__(self):
+        self.transport = 0.0
+        self.decode = 0.0
+
+
+_current_profiler: ContextVar[Profiler | None] = ContextVar(
+    "_current_profiler", default=None
+)
+_current_call: ContextVar[_CallTimes | None] = ContextVar(
+    "_current_call", default=None
+)
+
+
+class Profiler:
+    """Splits the wall time of dictionary function calls into phases.
+
+    Use it as a context manager to profile the calls made in its context.
+    """
+
+    def __init__(self):
+        self._profiles: dict[str, FunctionProfile] = {}
+        self._tokens: list[Token] = []
+
+    def __enter__(self) -> Profiler:
+        self._tokens.append(_current_profiler.set(self))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current_profiler.reset(self._tokens.pop())
+
+    def record(
+        self,
+        function: str,
+        /,
+        total: float,
+        transport: float = 0.0,
+        decode: float = 0.0,
+    ) -> None:
+        """Record the phases of a call to a function."""
+        profile = self._profiles.get(function)
+        if profile is None:
+            profile = self._profiles[function] = FunctionProfile()
+        profile.calls += 1
+        profile.total += total
+        profile.transport += transport
+        profile.decode += decode
+
+    def stats(self) -> dict[str, FunctionProfile]:
+        """Get the profiles of the called functions, by function name."""
+        return {
+            function: profile.model_copy()
+            for function, profile in self._profiles.items()
+        }
+
+    def report(self) -> str:
+        """Format the profiles as a table, slowest functions first."""
+        lines = [
+            f"{'function':<40} {'calls':>6} {'total':>9} {'transport':>9} "
+            f"{'decode':>9} {'validation':>10}"
+        ]
+        for function, profile in sorted(
+            self._profiles.items(), key=lambda item: -item[1].total
+        ):
+            lines.append(
+                f"{function:<40} {profile.calls:>6} {profile.total:>9.4f} "
+                f"{profile.transport:>9.4f} {profile.decode:>9.4f} "
+                f"{profile.validation:>10.4f}"
+            )
+        return "\n".join(lines)
+
+
+def start_call() -> tuple[Profiler, _CallTimes, Token, float] | None:
+    """Start profiling a call, if a profiler is active."""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return None
+    call = _CallTimes()
+    return profiler, call, _current_call.set(call), time.perf_counter()
+
+
+def end_call(
+    function: str, started: tuple[Profiler, _CallTimes, Token, float], /
+) -> None:
+    """Record a call started by [](start_call)."""
+    profiler, call, token, start = started
+    _current_call.reset(token)
+    profiler.record(
+        function,
+        total=time.perf_counter() - start,
+        transport=call.transport,
+        decode=call.decode,
+    )
+
+
+def get_current_call() -> _CallTimes | None:
+    """Get the phase times of the call being profiled, if any."""
+    return _current_call.get()
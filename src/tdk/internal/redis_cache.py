@@ -0,0 +1,250 @@
+"""
+This module provides a cache backend that keeps its values in Redis, so that
+the clients of many processes and hosts share one warm cache.
+
+```python
+from tdk.client import ResponseCache, TDKClient
+from tdk.internal.redis_cache import RedisCacheBackend
+
+backend = RedisCacheBackend("redis://cache.internal:6379/0")
+client = TDKClient(cache=ResponseCache(backend))
+```
+
+The backend speaks the Redis protocol (RESP) itself, over asyncio streams,
+so it needs no other package and works with any server that implements the
+`GET`, `MGET`, `SET` and `DEL` commands, such as Redis, Valkey, KeyDB or
+Dragonfly.
+A [](tdk.internal.fake_redis.FakeRedisServer) can stand in for the server in
+tests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+from typing import Any
+
+from yarl import URL
+
+
+__all__ = [
+    "RedisError",
+    "RedisCacheBackend",
+    "encode_command",
+    "read_reply",
+]
+
+
+class RedisError(Exception):
+    """The server answered a command with an error."""
+
+
+def encode_command(*args: str | bytes | int) -> bytes:
+    """Encode a command as a RESP array of bulk strings.
+
+    ```pycon
+    >>> encode_command("GET", "tdk:/gts?ara=kedi")
+    b'*2\\r\\n$3\\r\\nGET\\r\\n$17\\r\\ntdk:/gts?ara=kedi\\r\\n'
+    ```
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, int):
+            arg = str(arg)
+        if isinstance(arg, str):
+            arg = arg.encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader, /) -> Any:
+    """Read one RESP reply.
+
+    Simple strings are returned as [](str), bulk strings as [](bytes),
+    integers as [](int), arrays as [](list) and null replies as [](None).
+
+    :raises RedisError: If the reply is an error.
+    :raises ConnectionError: If the reply is not valid RESP.
+    :raises asyncio.IncompleteReadError:
+        If the connection is closed before the end of the reply.
+    """
+    line = (await reader.readuntil(b"\r\n"))[:-2]
+    kind, rest = line[:1], line[1:]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RedisError(rest.decode(errors="replace"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Unknown reply type {kind!r}")
+
+
+_Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class RedisCacheBackend:
+    """Keeps cached values in a Redis server.
+
+    Values expire on the server, so every client sees the same times to
+    live. [](RedisCacheBackend.get_many) fetches many values with one `MGET`.
+
+    A shared cache must not take the clients down with it: if the server
+    can't be reached, times out or answers with an error, lookups are
+    treated as misses and writes are dropped, and
+    [](RedisCacheBackend.errors) is incremented.
+
+    Connections are opened on demand, up to `max_connections`, and kept open
+    between commands.
+    A connection is closed rather than reused if a command on it fails or is
+    cancelled, since the rest of its reply would still be on the way.
+
+    :param url:
+        The address of the server, as
+        `redis://[[user]:password@]host[:port][/database]`.
+    :param prefix:
+        A prefix of every key, so that the cache can share a database with
+        other data.
+    :param max_connections: Maximum number of connections open at once.
+    :param timeout: Seconds to wait for a connection or a reply.
+
+    :raises ValueError: If `url` is not a `redis://` URL.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        *,
+        prefix: str = "tdk:",
+        max_connections: int = 8,
+        timeout: float = 1.0,
+    ):
+        parsed = URL(url)
+        if parsed.scheme != "redis" or not parsed.host:
+            raise ValueError(f"Not a redis:// URL: {url}")
+        self.url = url
+        self.prefix = prefix
+        self.timeout = timeout
+        self._host = parsed.host
+        self._port = parsed.port or 6379
+        self._user = parsed.user or None
+        self._password = parsed.password
+        self._database = int(parsed.path.strip("/") or 0)
+        self._idle: list[_Connection] = []
+        self._slots = asyncio.Semaphore(max_connections)
+        self.errors = 0
+        """Number of commands that failed and were treated as misses."""
+
+    async def _connect(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        try:
+            if self._password is not None:
+                auth: tuple[str, ...]
+                if self._user is not None:
+                    auth = ("AUTH", self._user, self._password)
+                else:
+                    auth = ("AUTH", self._password)
+                await self._send(reader, writer, auth)
+            if self._database:
+                await self._send(reader, writer, ("SELECT", self._database))
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    @staticmethod
+    async def _send(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        command: Sequence[str | bytes | int],
+    ) -> Any:
+        writer.write(encode_command(*command))
+        await writer.drain()
+        return await read_reply(reader)
+
+    async def execute(self, *command: str | bytes | int) -> Any:
+        """Send a command and return its reply.
+
+        Keys are sent as given, without the `prefix`.
+
+        :raises RedisError: If the server answers with an error.
+        :raises OSError: If the server can't be reached.
+        :raises asyncio.IncompleteReadError:
+            If the server closes the connection before replying.
+        :raises asyncio.TimeoutError: If the server takes too long.
+        """
+        async with self._slots:
+            if self._idle:
+                connection = self._idle.pop()
+            else:
+                connection = await asyncio.wait_for(
+                    self._connect(), self.timeout
+                )
+            try:
+                reply = await asyncio.wait_for(
+                    self._send(*connection, command), self.timeout
+                )
+            except RedisError:
+                # The whole reply was read, so the connection can be reused.
+                self._idle.append(connection)
+                raise
+            except BaseException:
+                connection[1].close()
+                raise
+            self._idle.append(connection)
+            return reply
+
+    async def _try(self, *command: str | bytes | int) -> Any:
+        try:
+            return await self.execute(*command)
+        except (
+            OSError,
+            asyncio.IncompleteReadError,
+            asyncio.TimeoutError,
+            RedisError,
+        ):
+            self.errors += 1
+            return None
+
+    async def get(self, key: str, /) -> bytes | None:
+        """Get the value of `key`, or [](None) if it is missing or expired."""
+        return await self._try("GET", self.prefix + key)
+
+    async def get_many(self, keys: Sequence[str], /) -> list[bytes | None]:
+        """Get the values of `keys`, in order, with one `MGET`."""
+        if not keys:
+            return []
+        values = await self._try("MGET", *(self.prefix + key for key in keys))
+        return values if values is not None else [None] * len(keys)
+
+    async def set(self, key: str, value: bytes, /, *, ttl: float) -> None:
+        """Keep `value` as the value of `key` for `ttl` seconds."""
+        if ttl <= 0:
+            await self.delete(key)
+            return
+        milliseconds = max(round(ttl * 1000), 1)
+        await self._try("SET", self.prefix + key, value, "PX", milliseconds)
+
+    async def delete(self, key: str, /) -> None:
+        """Remove the value of `key`, if there is one."""
+        await self._try("DEL", self.prefix + key)
+
+    async def close(self) -> None:
+        """Close the idle connections to the server."""
+        connections, self._idle = self._idle, []
+        for _, writer in connections:
+            writer.close()
+        for _, writer in connections:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
@@ -0,0 +1,260 @@
+"""
+This module provides the retry policy and the circuit breaker that protect
+requests to the TDK servers from transient failures.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from json import JSONDecodeError
+from typing import TypeVar
+
+from aiohttp import (
+    ClientConnectionError,
+    ClientPayloadError,
+    ClientResponseError,
+)
+from pydantic import BaseModel, ConfigDict, Field
+
+from tdk.internal.deadlines import get_remaining
+
+_T = TypeVar("_T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of making a request while the circuit is open."""
+
+
+def parse_retry_after(value: str | None, /) -> float | None:
+    """Parse the value of a `Retry-After` header into seconds.
+
+    The header can either hold a number of seconds or an HTTP date.
+    Invalid values and dates in the past are parsed as [](None).
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    seconds = (date - datetime.now(timezone.utc)).total_seconds()
+    return seconds if seconds > 0 else None
+
+
+def is_transient(error: BaseException, /) -> bool:
+    """Whether an error means the upstream is failing, rather than the request.
+
+    Connection errors, timeouts, broken payloads and `5xx` responses are
+    transient.
+    """
+    if isinstance(error, ClientResponseError):
+        return error.status >= 500
+    return isinstance(
+        error, (ClientConnectionError, ClientPayloadError, asyncio.TimeoutError)
+    )
+
+
+class RetryPolicy(BaseModel):
+    """How requests that failed for a transient reason are retried.
+
+    The delay before the `n`th retry is chosen at random between zero and
+    `backoff_base * 2 ** (n - 1)`, capped at `backoff_max` ("full jitter").
+    If the server sent a `Retry-After` header, the delay is at least that
+    long, and the request is not retried if the server asks for more than
+    `backoff_max` seconds.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    max_attempts: int = Field(default=3, ge=1)
+    """Maximum number of attempts, including the first one."""
+    backoff_base: float = Field(default=0.25, ge=0)
+    """Upper bound of the first delay, in seconds."""
+    backoff_max: float = Field(default=10.0, ge=0)
+    """Upper bound of every delay, in seconds."""
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+    """Response statuses that are retried."""
+    respect_retry_after: bool = True
+    """Whether to wait as long as the `Retry-After` header asks."""
+    retry_invalid_json: bool = True
+    """Whether to retry successful responses that are not valid JSON.
+
+    The TDK servers occasionally answer with broken documents.
+    Error responses raise their status instead, and are retried according
+    to `retry_statuses`.
+    """
+
+    def is_retryable(self, error: BaseException, /) -> bool:
+        """Whether a request that failed with `error` should be retried."""
+        if isinstance(error, ClientResponseError):
+            return error.status in self.retry_statuses
+        if isinstance(error, JSONDecodeError):
+            return self.retry_invalid_json
+        return is_transient(error)
+
+    def get_delay(self, error: BaseException, /, attempt: int) -> float | None:
+        """Get the seconds to wait before retrying a failed attempt.
+
+        :param error: The error the attempt failed with.
+        :param attempt: The number of the failed attempt, starting from 1.
+        :returns: The delay, or [](None) if the request must not be retried.
+        """
+        if attempt >= self.max_attempts or not self.is_retryable(error):
+            return None
+        delay = random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        )
+        if self.respect_retry_after and isinstance(error, ClientResponseError):
+            retry_after = parse_retry_after(
+                error.headers.get("Retry-After") if error.headers else None
+            )
+            if retry_after is not None:
+                if retry_after > self.backoff_max:
+                    return None
+                delay = max(delay, retry_after)
+        return delay
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    """Requests are made as usual."""
+    OPEN = "open"
+    """Requests fail immediately with [](CircuitOpenError)."""
+    HALF_OPEN = "half_open"
+    """A single trial request is made to see if the upstream recovered."""
+
+
+class CircuitBreaker:
+    """Stops making requests while the upstream keeps failing.
+
+    After `failure_threshold` consecutive transient failures
+    (see [](is_transient)), the circuit opens and requests fail
+    immediately for `reset_timeout` seconds.
+    Then a single trial request is let through: the circuit closes if it
+    succeeds, and opens again if it fails.
+
+    :raises ValueError: If a parameter is not positive.
+    """
+
+    def __init__(
+        self, *, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        if reset_timeout <= 0:
+            raise ValueError("reset_timeout must be positive")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        """The current state of the circuit."""
+        if (
+            self._state is CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def before_request(self) -> None:
+        """Check that a request may be made.
+
+        :raises CircuitOpenError: If the circuit is open.
+        """
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return
+        if state is CircuitState.HALF_OPEN and not self._trial_in_flight:
+            self._state = CircuitState.HALF_OPEN
+            self._trial_in_flight = True
+            return
+        raise CircuitOpenError(
+            "The TDK servers are failing, no requests are made for now"
+        )
+
+    def record_success(self) -> None:
+        """Record that a request succeeded."""
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self, error: BaseException, /) -> None:
+        """Record that a request failed with `error`.
+
+        Errors that are not transient show that the upstream is answering,
+        so they are recorded as successes.
+        """
+        if not is_transient(error):
+            self.record_success()
+            return
+        was_trial = self._trial_in_flight
+        self._trial_in_flight = False
+        self._failures += 1
+        if was_trial or self._failures >= self.failure_threshold:
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    def record_cancellation(self) -> None:
+        """Record that a request was cancelled before it could finish."""
+        self._trial_in_flight = False
+
+
+async def call_with_retries(
+    func: Callable[[], Awaitable[_T]],
+    /,
+    *,
+    policy: RetryPolicy | None,
+    breaker: CircuitBreaker | None,
+    on_retry: Callable[[BaseException], None] | None = None,
+) -> _T:
+    """Call `func` until it succeeds, as allowed by `policy` and `breaker`.
+
+    Attempts that would start after the current deadline are not made,
+    and the last error is raised instead.
+    See [](tdk.internal.deadlines).
+
+    :param on_retry: Called with the error of each attempt that is retried.
+    :raises CircuitOpenError: If `breaker` does not allow a request.
+    """
+    attempt = 1
+    while True:
+        if breaker is not None:
+            breaker.before_request()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.record_cancellation()
+            raise
+        except Exception as e:
+            if breaker is not None:
+                breaker.record_failure(e)
+            delay = policy.get_delay(e, attempt) if policy else None
+            if delay is None:
+                raise
+            remaining = get_remaining()
+            if remaining is not None and delay >= remaining:
+                raise
+            if on_retry is not None:
+                on_retry(e)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
@@ -0,0 +1,501 @@
+"""
+This module provides the scheduler that paces requests to the TDK servers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Literal
+
+from aiohttp import ClientResponseError
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class TokenBucket:
+    """A token bucket rate limiter.
+
+    Tokens are added at a rate of `rate` per second, up to `burst` tokens.
+    Each [](TokenBucket.acquire) call takes one token, waiting for one if
+    the bucket is empty.
+    Waiters are served by [](Priority), and in the order they arrived
+    within a priority, so interactive requests never wait for the tokens of
+    a backlog of bulk ones.
+
+    :param rate: Number of tokens added per second.
+    :param burst: Maximum number of tokens the bucket can hold.
+
+    :raises ValueError: If `rate` or `burst` is not positive.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._queues: dict[Priority, deque[asyncio.Future[None]]] = {
+            lane: deque() for lane in Priority
+        }
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def waiting(self) -> dict[Priority, int]:
+        """Number of callers waiting for a token, by priority."""
+        return {lane: len(queue) for lane, queue in self._queues.items()}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def _is_ahead(self, lane: Priority) -> bool:
+        """Whether callers of the same or a higher priority are waiting."""
+        for other in Priority:
+            if self._queues[other]:
+                return True
+            if other is lane:
+                return False
+        return False
+
+    def _wake_up(self) -> None:
+        self._timer = None
+        self._refill()
+        for queue in self._queues.values():
+            while queue and self._tokens >= 1:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self._tokens -= 1
+                    waiter.set_result(None)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not any(self._queues.values()):
+            return
+        self._timer = asyncio.get_running_loop().call_later(
+            (1 - self._tokens) / self.rate, self._wake_up
+        )
+
+    async def acquire(self, lane: Priority | None = None) -> None:
+        """Take a token, waiting until one is available.
+
+        :param lane:
+            The priority of the caller.
+            Defaults to the priority of the current context.
+            See [](priority).
+        """
+        if lane is None:
+            lane = get_priority()
+        self._refill()
+        if not self._is_ahead(lane) and self._tokens >= 1:
+            self._tokens -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(waiter)
+        self._schedule()
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The token was handed over already, so give it back.
+                self._tokens += 1
+            else:
+                self._queues[lane].remove(waiter)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._wake_up()
+            raise
+
+
+def is_congestion(error: BaseException, /) -> bool:
+    """Whether an error means the upstream is overloaded.
+
+    Timeouts, `429` responses and `5xx` responses are signs of congestion.
+    """
+    if isinstance(error, ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, asyncio.TimeoutError)
+
+
+class AIMDPolicy(BaseModel):
+    """How an [](AdaptiveLimiter) adjusts its concurrency limit.
+
+    The limit grows by `increase` for every `limit` requests that succeed
+    while the limiter is full, and it is multiplied by `decrease` when a
+    request fails with [](is_congestion) or takes `latency_tolerance` times
+    longer than usual.
+    Requests that were started before the last decrease cannot decrease the
+    limit again, so a burst of failures counts as one.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    initial_limit: int = Field(default=4, ge=1)
+    """The limit before any request has finished."""
+    min_limit: int = Field(default=1, ge=1)
+    """The lowest limit."""
+    max_limit: int = Field(default=64, ge=1)
+    """The highest limit."""
+    increase: float = Field(default=1.0, gt=0)
+    """How much the limit grows per limit-worth of successful requests."""
+    decrease: float = Field(default=0.5, gt=0, lt=1)
+    """The factor the limit is multiplied by on congestion."""
+    latency_tolerance: float = Field(default=2.0, gt=1)
+    """How many times slower than usual a request must be to count as
+    congestion."""
+    latency_smoothing: float = Field(default=0.05, gt=0, le=1)
+    """Weight of a new latency in the usual latency."""
+    min_samples: int = Field(default=10, ge=1)
+    """Number of latencies needed before they are judged."""
+
+
+class AdaptiveLimiter:
+    """Adjusts a limit on the number of requests in flight to the health of
+    the upstream, with additive increase and multiplicative decrease (AIMD),
+    as TCP does.
+
+    The limit is enforced by the [](Scheduler) that owns the limiter.
+    """
+
+    def __init__(self, policy: AIMDPolicy = AIMDPolicy()):
+        self.policy = policy
+        self._limit = min(
+            float(max(policy.initial_limit, policy.min_limit)),
+            policy.max_limit,
+        )
+        self._latency: float | None = None
+        self._samples = 0
+        self._decreased_at = float("-inf")
+        self.decreases = 0
+        """Number of times the limit was decreased."""
+
+    @property
+    def limit(self) -> int:
+        """The number of requests that can be in flight at once."""
+        return max(int(self._limit), self.policy.min_limit)
+
+    def record(
+        self,
+        started_at: float,
+        /,
+        error: BaseException | None = None,
+        *,
+        saturated: bool = False,
+    ) -> None:
+        """Adjust the limit to the outcome of a finished request.
+
+        :param started_at:
+            The [](time.monotonic) time the request was started at.
+        :param error: The error the request failed with, if it failed.
+        :param saturated:
+            Whether the limit was holding requests back when the request
+            finished. The limit only grows while it is saturated.
+        """
+        latency = time.monotonic() - started_at
+        if error is not None:
+            if is_congestion(error):
+                self._decrease(started_at)
+        elif self._is_latency_jump(latency):
+            self._decrease(started_at)
+        elif saturated:
+            self._limit = min(
+                self._limit + self.policy.increase / self._limit,
+                self.policy.max_limit,
+            )
+
+    def _is_latency_jump(self, latency: float) -> bool:
+        policy = self.policy
+        usual = self._latency
+        self._samples += 1
+        if usual is None:
+            self._latency = latency
+            return False
+        self._latency = usual + policy.latency_smoothing * (latency - usual)
+        return (
+            self._samples > policy.min_samples
+            and latency > usual * policy.latency_tolerance
+        )
+
+    def _decrease(self, started_at: float) -> None:
+        if started_at <= self._decreased_at:
+            return
+        self._decreased_at = time.monotonic()
+        self._limit = max(
+            self._limit * self.policy.decrease, self.policy.min_limit
+        )
+        self.decreases += 1
+
+
+class Priority(Enum):
+    """The lane of a request in a [](Scheduler).
+
+    Interactive requests are always started before bulk ones.
+    """
+
+    INTERACTIVE = "interactive"
+    """Requests that someone is waiting for. The default."""
+    BULK = "bulk"
+    """Requests made by background jobs."""
+
+
+_current_priority: ContextVar[Priority] = ContextVar(
+    "_current_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def priority(value: Priority | Literal["interactive", "bulk"], /):
+    """Give the requests made in the block a priority.
+
+    The priority is carried by a [](contextvars.ContextVar), so it also
+    applies to the tasks started in the block.
+
+    ```python
+    from tdk.client import Priority, priority
+
+    with priority(Priority.BULK):
+        await asyncio.gather(*(client.search_gts(w) for w in words))
+    ```
+    """
+    token = _current_priority.set(Priority(value))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def get_priority() -> Priority:
+    """Get the priority of the requests made in the current context."""
+    return _current_priority.get()
+
+
+class SchedulerStats(BaseModel):
+    """A snapshot of the state of a [](Scheduler)."""
+
+    in_flight: int
+    """Number of requests that are being performed."""
+    queued: int
+    """Number of requests waiting for their turn."""
+    queued_by_priority: dict[str, int] = {}
+    """Number of requests waiting for their turn, by priority."""
+    completed: int
+    """Number of requests that have been performed."""
+    total_wait: float
+    """Seconds spent waiting in the queue, summed over all requests."""
+    max_wait: float
+    """The longest time a request has waited in the queue, in seconds."""
+    concurrency_limit: int | None = None
+    """The current limit of the adaptive limiter, if there is one."""
+
+    @property
+    def mean_wait(self) -> float:
+        """Average seconds a request waited in the queue."""
+        started = self.in_flight + self.completed
+        return self.total_wait / started if started else 0.0
+
+
+class Scheduler:
+    """Limits the number and the rate of requests that are in flight.
+
+    All dictionaries are served from the same host, so a client uses a
+    single scheduler for all of its requests.
+
+    Requests wait in one queue per [](Priority), and a request is only
+    started when no request of a higher priority is waiting, so interactive
+    requests never wait behind a backlog of bulk ones.
+    `reserved` slots are only used by interactive requests, so they can be
+    started even while bulk requests take every other slot.
+    Under a rate limit, requests wait for their token before they take a
+    slot, so no slot is held while waiting, and tokens are also handed out
+    by priority. See [](TokenBucket).
+
+    :param max_concurrency:
+        Maximum number of requests in flight at once,
+        or [](None) for no limit.
+    :param rate_limit:
+        Maximum number of requests started per second,
+        or [](None) for no limit.
+    :param burst:
+        Number of requests that can be started at once
+        when the rate limit has not been reached for a while.
+    :param adaptive:
+        How to adapt the number of requests in flight to the health of the
+        upstream, or [](None) to not adapt it.
+        Applies in addition to `max_concurrency`.
+    :param reserved:
+        Number of slots that bulk requests can't use.
+        Bulk requests can always use at least one slot.
+
+    :raises ValueError: If a limit is not positive.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int | None = None,
+        rate_limit: float | None = None,
+        burst: int = 1,
+        adaptive: AIMDPolicy | None = None,
+        reserved: int = 0,
+    ):
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if reserved < 0:
+            raise ValueError("reserved must not be negative")
+        self._max_concurrency = max_concurrency
+        self._reserved = reserved
+        self._bucket = (
+            TokenBucket(rate_limit, burst) if rate_limit is not None else None
+        )
+        self._limiter = (
+            AdaptiveLimiter(adaptive) if adaptive is not None else None
+        )
+        self._queues: dict[Priority, deque[asyncio.Future[None]]] = {
+            lane: deque() for lane in Priority
+        }
+        self._started = 0
+        self._in_flight = 0
+        self._queued = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def limiter(self) -> AdaptiveLimiter | None:
+        """The adaptive limiter of the scheduler, if it has one."""
+        return self._limiter
+
+    def _capacity(self) -> float:
+        capacity = (
+            self._max_concurrency
+            if self._max_concurrency is not None
+            else float("inf")
+        )
+        if self._limiter is not None:
+            capacity = min(capacity, self._limiter.limit)
+        return capacity
+
+    def _can_start(self, lane: Priority) -> bool:
+        capacity = self._capacity()
+        if lane is Priority.BULK:
+            capacity = max(capacity - self._reserved, 1)
+        return self._started < capacity
+
+    def _is_ahead(self, lane: Priority) -> bool:
+        """Whether requests of the same or a higher priority are waiting."""
+        for other in Priority:
+            if self._queues[other]:
+                return True
+            if other is lane:
+                return False
+        return False
+
+    def _wake_up(self) -> None:
+        for lane in Priority:
+            queue = self._queues[lane]
+            while queue and self._can_start(lane):
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self._started += 1
+                    waiter.set_result(None)
+            if queue:
+                # Lower priorities wait for this one.
+                return
+
+    async def _acquire(self, lane: Priority) -> None:
+        if not self._is_ahead(lane) and self._can_start(lane):
+            self._started += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(waiter)
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The turn was handed over already, so pass it on.
+                self._started -= 1
+            else:
+                self._queues[lane].remove(waiter)
+            self._wake_up()
+            raise
+
+    def _release(self) -> None:
+        self._started -= 1
+        self._wake_up()
+
+    @asynccontextmanager
+    async def slot(self, lane: Priority | None = None) -> AsyncIterator[None]:
+        """Wait for the turn of a request and hold it while in the block.
+
+        The adaptive limiter judges the request by the duration of the block
+        and the error raised in it, if any.
+
+        :param lane:
+            The priority of the request.
+            Defaults to the priority of the current context.
+            See [](priority).
+        """
+        if lane is None:
+            lane = get_priority()
+        queued_at = time.monotonic()
+        self._queued += 1
+        try:
+            # The token is taken first, so that no slot is held while
+            # waiting for one.
+            if self._bucket is not None:
+                await self._bucket.acquire(lane)
+            await self._acquire(lane)
+        finally:
+            self._queued -= 1
+
+        started_at = time.monotonic()
+        wait = started_at - queued_at
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        self._in_flight += 1
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            if self._limiter is not None:
+                self._limiter.record(
+                    started_at,
+                    error=error,
+                    saturated=any(self._queues.values()),
+                )
+            self._release()
+
+    def stats(self) -> SchedulerStats:
+        """Get a snapshot of the state of the scheduler."""
+        queued = {
+            lane.value: len(queue) for lane, queue in self._queues.items()
+        }
+        if self._bucket is not None:
+            for lane, waiting in self._bucket.waiting.items():
+                queued[lane.value] += waiting
+        return SchedulerStats(
+            in_flight=self._in_flight,
+            queued=self._queued,
+            queued_by_priority=queued,
+            completed=self._completed,
+            total_wait=self._total_wait,
+            max_wait=self._max_wait,
+            concurrency_limit=(
+                self._limiter.limit if self._limiter is not None else None
+            ),
+        )
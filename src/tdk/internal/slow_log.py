@@ -0,0 +1,121 @@
+"""
+This module provides the log of the requests that took too long.
+
+A client with a [](SlowRequestLog) checks the duration of every request it
+makes, from the cache lookup to the decoded response, retries included.
+Requests that take longer than the threshold are kept in
+[](SlowRequestLog.records) and logged to the `tdk.slow_requests` logger,
+with the record in the `slow_request` attribute of the log record.
+
+```python
+client = TDKClient(slow_log=SlowRequestLog(threshold=2.0, sample_rate=0.1))
+```
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+from collections import deque
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+__all__ = [
+    "SlowRequest",
+    "SlowRequestLog",
+]
+
+
+CacheStatus = Literal["hit", "miss", "not_modified", "stale", "off"]
+
+
+class SlowRequest(BaseModel):
+    """A request that took longer than the threshold of a [](SlowRequestLog)."""
+
+    dictionary: str
+    """The dictionary that made the request, or its endpoint."""
+    request: str
+    """The path and query of the request, such as `/gts?ara=kedi`."""
+    duration: float
+    """Seconds the request took."""
+    cache: CacheStatus
+    """Whether the response came from the response cache (`hit` or `miss`),
+    was a kept copy confirmed with a conditional request (`not_modified`),
+    was a stale copy served while it is refreshed (`stale`),
+    or the client has no response cache (`off`)."""
+    retries: int
+    """Number of times the request was retried."""
+    response_size: int | None
+    """Size of the last response body in bytes, if a response was received.
+    """
+    phases: dict[str, float]
+    """Seconds spent in each phase of the last attempt, if the transport
+    measured them. See [](tdk.internal.tracing)."""
+    error: str | None = None
+    """The error the request failed with, if it failed."""
+
+
+class RequestTrace:
+    """What happened while a client got a response."""
+
+    __slots__ = ("cache", "retries", "response_size", "phases")
+
+    def __init__(self, cache: CacheStatus):
+        self.cache: CacheStatus = cache
+        self.retries = 0
+        self.response_size: int | None = None
+        self.phases: dict[str, float] = {}
+
+
+class SlowRequestLog:
+    """Keeps and logs the requests that took longer than a threshold.
+
+    :param threshold: Seconds after which a request is slow.
+    :param sample_rate:
+        Share of the slow requests that are recorded,
+        to limit the cost of logging when many requests are slow.
+    :param max_records: Number of the latest records that are kept.
+    :param logger: The logger to log the records to.
+    :raises ValueError: If a parameter is out of range.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 1.0,
+        sample_rate: float = 1.0,
+        max_records: int = 1000,
+        logger: logging.Logger = logging.getLogger("tdk.slow_requests"),
+    ):
+        if threshold < 0:
+            raise ValueError("threshold must not be negative")
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.logger = logger
+        self.records: deque[SlowRequest] = deque(maxlen=max_records)
+        """The latest recorded slow requests, oldest first."""
+        self.slow = 0
+        """Number of slow requests, recorded or not."""
+
+    def should_record(self, duration: float, /) -> bool:
+        """Whether a request that took `duration` seconds is recorded."""
+        if duration < self.threshold:
+            return False
+        self.slow += 1
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def record(self, request: SlowRequest, /) -> None:
+        """Keep and log a slow request."""
+        self.records.append(request)
+        self.logger.warning(
+            "Slow request %s took %.3fs (cache: %s, retries: %d)",
+            request.request,
+            request.duration,
+            request.cache,
+            request.retries,
+            extra={"slow_request": request},
+        )
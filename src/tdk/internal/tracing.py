@@ -0,0 +1,150 @@
+"""
+This module provides the tracing of the phases of each request.
+
+The [](aiohttp.TraceConfig) made by [](make_trace_config) is added to every
+session made by [](tdk.internal.http.session_maker).
+It marks the phases of the requests that carry a [](RequestTimer),
+and a [](LatencyRecorder) collects the phase durations per endpoint into
+histograms:
+
+- `queue`: waiting for a free connection in the pool,
+- `dns`: resolving the host name, when it is not cached,
+- `connect`: opening a new connection, including the TLS handshake,
+- `ttfb`: from sending the request to receiving the response headers,
+- `download`: reading the response body,
+- `total`: the whole request.
+
+High `queue` times point at a starved pool, high `dns` and `connect` times
+at the network, and high `ttfb` times at the upstream server.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from types import SimpleNamespace
+
+from aiohttp import ClientSession, TraceConfig
+
+from tdk.internal.metrics import (
+    Histogram,
+    HistogramSnapshot,
+    default_latency_buckets,
+)
+
+
+__all__ = [
+    "RequestTimer",
+    "LatencyRecorder",
+    "make_trace_config",
+]
+
+
+class RequestTimer:
+    """Measures the phases of one request."""
+
+    __slots__ = ("durations", "_started")
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+        """Seconds spent in each phase that was entered."""
+        self._started: dict[str, float] = {}
+
+    def start(self, phase: str, /) -> None:
+        """Mark the start of a phase."""
+        self._started[phase] = time.perf_counter()
+
+    def end(self, phase: str, /) -> None:
+        """Mark the end of a phase that was started."""
+        started = self._started.pop(phase, None)
+        if started is not None:
+            self.durations[phase] = (
+                self.durations.get(phase, 0.0) + time.perf_counter() - started
+            )
+
+
+def _make_callback(phase: str, start: bool):
+    async def callback(
+        session: ClientSession, context: SimpleNamespace, params
+    ) -> None:
+        timer = context.trace_request_ctx
+        if isinstance(timer, RequestTimer):
+            if start:
+                timer.start(phase)
+            else:
+                timer.end(phase)
+
+    return callback
+
+
+def make_trace_config() -> TraceConfig:
+    """Make a trace config that marks the phases of a [](RequestTimer).
+
+    The timer is passed to a request as its `trace_request_ctx`.
+    Requests without a timer are not measured.
+    """
+    trace_config = TraceConfig()
+    for signal, phase, start in [
+        (trace_config.on_connection_queued_start, "queue", True),
+        (trace_config.on_connection_queued_end, "queue", False),
+        (trace_config.on_dns_resolvehost_start, "dns", True),
+        (trace_config.on_dns_resolvehost_end, "dns", False),
+        (trace_config.on_connection_create_start, "connect", True),
+        (trace_config.on_connection_create_end, "connect", False),
+        (trace_config.on_request_headers_sent, "ttfb", True),
+        (trace_config.on_request_end, "ttfb", False),
+    ]:
+        signal.append(_make_callback(phase, start))
+    return trace_config
+
+
+class LatencyRecorder:
+    """Collects the phase durations of requests into histograms.
+
+    :param buckets: The bucket bounds of the histograms, in seconds.
+    """
+
+    def __init__(self, buckets: Sequence[float] = default_latency_buckets):
+        self._buckets = tuple(buckets)
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+
+    def observe(self, endpoint: str, phase: str, seconds: float, /) -> None:
+        """Record the duration of a phase of a request to an endpoint."""
+        histogram = self._histograms.get((endpoint, phase))
+        if histogram is None:
+            histogram = self._histograms[(endpoint, phase)] = Histogram(
+                self._buckets
+            )
+        histogram.observe(seconds)
+
+    def record(self, endpoint: str, timer: RequestTimer, /) -> None:
+        """Record every phase measured by a timer."""
+        durations = timer.durations
+        if "connect" in durations and "dns" in durations:
+            # Host names are resolved while the connection is created.
+            durations["connect"] = max(
+                durations["connect"] - durations["dns"], 0.0
+            )
+        for phase, seconds in durations.items():
+            self.observe(endpoint, phase, seconds)
+
+    def get_histogram(self, endpoint: str, phase: str, /) -> Histogram | None:
+        """Get the histogram of a phase of the requests to an endpoint."""
+        return self._histograms.get((endpoint, phase))
+
+    def snapshot(self) -> dict[str, dict[str, HistogramSnapshot]]:
+        """Get the histograms of every endpoint, by endpoint and phase.
+
+        ```pycon
+        >>> client.latencies.snapshot()["gts"]["ttfb"].p99
+        0.41
+        ```
+        """
+        snapshot: dict[str, dict[str, HistogramSnapshot]] = {}
+        for (endpoint, phase), histogram in sorted(self._histograms.items()):
+            snapshot.setdefault(endpoint, {})[phase] = histogram.snapshot()
+        return snapshot
+
+    def reset(self) -> None:
+        """Forget every recorded duration."""
+        self._histograms.clear()
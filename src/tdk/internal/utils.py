@@ -5,6 +5,10 @@ This module contains miscellaneous utilities for the library.
 from __future__ import annotations
 
 import asyncio
+import atexit
+import os
+import threading
+from contextvars import ContextVar
 from enum import Enum
 from functools import wraps
 from typing import Annotated, Any, Type
@@ -14,11 +18,72 @@ from pydantic import BeforeValidator, AfterValidator
 from tdk.enums import MeaningProperty
 
 
+_background_loop: asyncio.AbstractEventLoop | None = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Get the event loop that runs the synchronous functions.
+
+    The loop is started on first use in a daemon thread and lives until the
+    interpreter exits, so the default client of the loop
+    (see [](tdk.client.get_default_client)) keeps its connections alive
+    between synchronous calls.
+    Forked child processes start their own loop when they need one.
+    """
+    global _background_loop
+    if _background_loop is not None:
+        return _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="tdk-event-loop", daemon=True
+            )
+            thread.start()
+            atexit.register(_stop_background_loop, loop, thread)
+            _background_loop = loop
+    return _background_loop
+
+
+def _stop_background_loop(
+    loop: asyncio.AbstractEventLoop, thread: threading.Thread, /
+) -> None:
+    """Close the default client of the background loop and stop the loop."""
+    # Imported here because the client module imports every dictionary.
+    from tdk.client import close_default_client
+
+    if loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(close_default_client(), loop).result(
+            timeout=5
+        )
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        if not thread.is_alive():
+            loop.close()
+
+
+def _forget_background_loop() -> None:
+    """Forget the loop of the parent process, whose thread is not forked."""
+    global _background_loop, _background_loop_lock
+    _background_loop = None
+    _background_loop_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_background_loop)
+
+
 def make_sync(func_to_be_cloned, /):
     """Make an async function run synchronously.
 
     Creates a decorator that runs the async function given as a parameter
-    synchronously.
+    synchronously, on the loop returned by [](get_background_loop).
+    The calling thread blocks until the result is ready, which also works
+    when the calling thread has a running event loop of its own.
 
     :::{important}
     The wrapped function is discarded and not used.
@@ -42,11 +107,33 @@ def make_sync(func_to_be_cloned, /):
 
     print(wait_sync())  # Hello, world!
     ```
+
+    :raises RuntimeError:
+        If the synchronous function is called from a coroutine that is
+        running on the background loop, as it would wait for itself forever.
     """
     def decorator(_unused_func):
         @wraps(func_to_be_cloned)
         def new_func(*args, **kwargs):
-            return asyncio.run(func_to_be_cloned(*args, **kwargs))
+            loop = get_background_loop()
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            if running_loop is loop:
+                raise RuntimeError(
+                    "Synchronous functions cannot be called from "
+                    "the background event loop"
+                )
+            future = asyncio.run_coroutine_threadsafe(
+                func_to_be_cloned(*args, **kwargs), loop
+            )
+            try:
+                return future.result()
+            except BaseException:
+                # Don't leave the coroutine running when interrupted.
+                future.cancel()
+                raise
 
         return new_func
 
@@ -89,14 +176,28 @@ Works using [](str_or_none_as_str).
 """
 
 
+default_media_base_url = "https://sozluk.gov.tr"
+"""The origin of the sound and image files of the TDK servers."""
+
+media_base_url: ContextVar[str] = ContextVar(
+    "media_base_url", default=default_media_base_url
+)
+"""The origin that [](sound_url_validator) and [](image_url_validator) build
+URLs on.
+
+Clients set it while their calls validate responses.
+See the `media_base_url` parameter of [](tdk.client.TDKClient).
+"""
+
+
 def sound_url_validator(v: str, /) -> str:
     """Convert a sound code to a valid sound URL.
 
-    Strings that do not start with `https://` are converted to
-    `https://sozluk.gov.tr/ses/{}.wav`.
+    Strings that are not URLs already are converted to
+    `https://sozluk.gov.tr/ses/{}.wav`, on the origin in [](media_base_url).
     """
-    if not v.startswith("https://"):
-        return f"https://sozluk.gov.tr/ses/{v}.wav"
+    if not v.startswith(("https://", "http://")):
+        return f"{media_base_url.get().rstrip('/')}/ses/{v}.wav"
     return v
 
 
@@ -110,11 +211,14 @@ Works using [](sound_url_validator).
 def image_url_validator(v: str, /) -> str:
     """Convert an image code to a valid image URL.
 
-    Strings that do not start with `https://` are converted to
-    `https://sozluk.gov.tr/dosyalar/tarornek/{}.gif`.
+    Strings that are not URLs already are converted to
+    `https://sozluk.gov.tr/dosyalar/tarornek/{}.gif`, on the origin in
+    [](media_base_url).
     """
-    if not v.startswith("https://"):
-        return f"https://sozluk.gov.tr/dosyalar/tarornek/{v}.gif"
+    if not v.startswith(("https://", "http://")):
+        return (
+            f"{media_base_url.get().rstrip('/')}/dosyalar/tarornek/{v}.gif"
+        )
     return v
 
 
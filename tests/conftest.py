@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from tdk.client import TDKClient
+from tdk.internal.fake_server import FakeTDKServer, FaultProfile
+from tdk.internal.http import AiohttpTransport
+
+
+def _run_against_server(
+    test, *, faults=FaultProfile(), fixtures=None, metrics=None, **options
+):
+    async def main():
+        async with FakeTDKServer(faults=faults, fixtures=fixtures) as server:
+            async with TDKClient(
+                transport=AiohttpTransport(base_url=server.url),
+                metrics=metrics,
+                **options,
+            ) as client:
+                return await test(client, server)
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def run_against_server():
+    """Run `test(client, server)` with a client of a fake server, and return
+    its result.
+
+    Takes the `faults` and `fixtures` of the server, and the other options
+    of the client. The client records no metrics unless given a registry.
+    """
+    return _run_against_server
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from tdk.client import TDKClient
+from tdk.internal.balancing import BalancedTransport, BalancingPolicy
+from tdk.internal.fake_server import FakeTDKServer, FaultProfile
+from tdk.internal.http import AiohttpTransport
+
+GTS = "https://sozluk.gov.tr/gts?ara=kedi"
+
+
+async def dead_url():
+    async with FakeTDKServer() as server:
+        return server.url
+
+
+def by_url(transport):
+    return {stats.url: stats for stats in transport.stats()}
+
+
+def test_requires_upstreams():
+    with pytest.raises(ValueError):
+        BalancedTransport(AiohttpTransport(), [])
+
+
+def test_least_outstanding_requests():
+    async def main():
+        slow = FakeTDKServer(faults=FaultProfile(latency=0.2))
+        async with slow, FakeTDKServer() as fast:
+            async with TDKClient(
+                base_url=[slow.url, fast.url], metrics=None
+            ) as client:
+
+                async def worker():
+                    for _ in range(5):
+                        await client.get_json(GTS)
+
+                await asyncio.gather(*(worker() for _ in range(4)))
+                return by_url(client.transport), slow.url, fast.url
+
+    stats, slow, fast = asyncio.run(main())
+    assert stats[slow].requests + stats[fast].requests == 20
+    assert stats[fast].requests > 3 * stats[slow].requests
+
+
+def test_failover_ejects_dead_upstreams():
+    async def main():
+        dead = await dead_url()
+        async with FakeTDKServer() as alive:
+            transport = BalancedTransport(
+                AiohttpTransport(), [dead, alive.url], max_failures=2
+            )
+            async with TDKClient(transport=transport, metrics=None) as client:
+                for _ in range(6):
+                    assert await client.search_gts("kedi")
+                return by_url(transport), dead
+
+    stats, dead = asyncio.run(main())
+    assert not stats[dead].healthy
+    assert stats[dead].failures == 2
+
+
+def test_failover_on_server_errors():
+    async def main():
+        failing = FakeTDKServer(faults=FaultProfile(error_rate=1.0))
+        async with failing, FakeTDKServer() as alive:
+            transport = BalancedTransport(
+                AiohttpTransport(), [failing.url, alive.url]
+            )
+            for _ in range(4):
+                response = await transport.get(GTS)
+                assert response.status == 200
+            await transport.close()
+            return by_url(transport)[failing.url]
+
+    assert asyncio.run(main()).failures >= 1
+
+
+def test_raises_when_every_upstream_fails():
+    async def main():
+        transport = BalancedTransport(
+            AiohttpTransport(), [await dead_url(), await dead_url()]
+        )
+        try:
+            with pytest.raises(ClientConnectionError):
+                await transport.get(GTS)
+            return transport.stats()
+        finally:
+            await transport.close()
+
+    assert [stats.requests for stats in asyncio.run(main())] == [1, 1]
+
+
+def test_health_checks():
+    async def main():
+        dead = await dead_url()
+        async with FakeTDKServer() as alive:
+            transport = BalancedTransport(
+                AiohttpTransport(),
+                [dead, alive.url],
+                health_check_interval=0.01,
+                health_check_path="/gts?ara=kedi",
+            )
+            await transport.get(GTS)
+            await asyncio.sleep(0.1)
+            await transport.close()
+            return by_url(transport), dead, alive.url
+
+    stats, dead, alive = asyncio.run(main())
+    assert not stats[dead].healthy
+    assert stats[alive].healthy
+
+
+def test_health_checks_of_client():
+    async def main():
+        dead = await dead_url()
+        async with FakeTDKServer() as alive:
+            async with TDKClient(
+                base_url=[dead, alive.url],
+                balancing=BalancingPolicy(
+                    max_failures=5,
+                    health_check_interval=0.01,
+                    health_check_path="/gts?ara=kedi",
+                ),
+                metrics=None,
+            ) as client:
+                await client.search_gts("kedi")
+                await asyncio.sleep(0.1)
+                return by_url(client.transport), dead
+
+    stats, dead = asyncio.run(main())
+    assert not stats[dead].healthy
+    assert stats[dead].failures > 5
+
+
+class FailingChecks:
+    """Fails the first health check with an error of its own."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.checks = 0
+
+    async def get(self, url, /, **kwargs):
+        if url.endswith("ara=k%C3%B6pek"):
+            self.checks += 1
+            if self.checks == 1:
+                raise RuntimeError("check failed")
+        return await self.inner.get(url, **kwargs)
+
+    async def close(self):
+        await self.inner.close()
+
+
+def test_health_checks_go_on_after_errors(caplog):
+    async def main():
+        dead = await dead_url()
+        async with FakeTDKServer() as alive:
+            inner = FailingChecks(AiohttpTransport())
+            transport = BalancedTransport(
+                inner,
+                [dead, alive.url],
+                health_check_interval=0.01,
+                health_check_path="/gts?ara=köpek",
+            )
+            await transport.get(GTS)
+            await asyncio.sleep(0.1)
+            await transport.close()
+            return by_url(transport), dead, inner.checks
+
+    with caplog.at_level(logging.ERROR, logger="tdk.internal.balancing"):
+        stats, dead, checks = asyncio.run(main())
+    assert checks > 2
+    assert not stats[dead].healthy
+    assert "health checks" in caplog.text
+
+
+def test_media_base_url():
+    async def main():
+        async with FakeTDKServer() as server:
+            async with TDKClient(
+                base_url=server.url,
+                media_base_url="https://media.example",
+                metrics=None,
+            ) as client:
+                return await client.search_spelling("kitap")
+
+    entry = asyncio.run(main())[0]
+    assert entry.sound_url == "https://media.example/ses/k0321.wav"
@@ -0,0 +1,472 @@
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+from contextlib import closing
+
+import pytest
+from aiohttp import ClientResponseError
+
+from tdk.internal.cache import (
+    ConditionalCache,
+    MemoryCacheBackend,
+    ResponseCache,
+    SharedMemoryCacheBackend,
+    SQLiteCacheBackend,
+    StaleCache,
+    _default_shared_memory_path,
+    get_endpoint,
+    make_cache_key,
+)
+from tdk.internal.fake_server import FaultProfile
+
+
+class TestCacheKey:
+    def test_turkish_normalization(self):
+        keys = {
+            make_cache_key("https://sozluk.gov.tr/gts", {"ara": query})
+            for query in ["KEDİ", "Kedi", "kedi"]
+        }
+        assert keys == {"/gts?ara=kedi"}
+
+    def test_dotless_i(self):
+        assert (
+            make_cache_key("https://sozluk.gov.tr/gts", {"ara": "KIR"})
+            == "/gts?ara=k%C4%B1r"
+        )
+
+    def test_params_in_url_and_order(self):
+        assert make_cache_key(
+            "https://sozluk.gov.tr/lehce?lehce=4&ara=Su", None
+        ) == make_cache_key(
+            "https://sozluk.gov.tr/lehce", {"ara": "su", "lehce": 4}
+        )
+
+    def test_endpoint(self):
+        assert get_endpoint("https://sozluk.gov.tr/gts") == "gts"
+        assert (
+            get_endpoint(
+                "https://sozluk.gov.tr/assets/js/autocompleteSapka.json"
+            )
+            == "autocompleteSapka.json"
+        )
+
+
+class TestMemoryCacheBackend:
+    def test_lru_eviction(self):
+        async def test():
+            backend = MemoryCacheBackend(max_entries=2)
+            await backend.set("a", b"1", ttl=60)
+            await backend.set("b", b"2", ttl=60)
+            await backend.get("a")
+            await backend.set("c", b"3", ttl=60)
+            return [await backend.get(key) for key in "abc"], backend
+
+        values, backend = asyncio.run(test())
+        assert values == [b"1", None, b"3"]
+        assert backend.evictions == 1
+
+    def test_size_limit(self):
+        async def test():
+            backend = MemoryCacheBackend(max_bytes=10)
+            await backend.set("a", b"12345", ttl=60)
+            await backend.set("b", b"123456", ttl=60)
+            await backend.set("huge", b"x" * 11, ttl=60)
+            return await backend.get("a"), await backend.get("huge"), backend
+
+        a, huge, backend = asyncio.run(test())
+        assert a is None and huge is None
+        assert backend.size == 6 and len(backend) == 1
+
+    def test_expiry(self):
+        async def test():
+            backend = MemoryCacheBackend()
+            await backend.set("a", b"1", ttl=0.01)
+            await asyncio.sleep(0.02)
+            return await backend.get("a"), backend.size
+
+        assert asyncio.run(test()) == (None, 0)
+
+
+def write_shared(path, key, value):
+    backend = SharedMemoryCacheBackend(path)
+    asyncio.run(backend.set(key, value, ttl=60))
+
+
+class TestSharedMemoryCacheBackend:
+    def test_shared_between_processes(self, tmp_path):
+        process = multiprocessing.get_context("spawn").Process(
+            target=write_shared,
+            args=(tmp_path, "/gts?ara=kedi", b"[]"),
+        )
+        process.start()
+        process.join(30)
+        backend = SharedMemoryCacheBackend(tmp_path)
+        assert asyncio.run(backend.get("/gts?ara=kedi")) == b"[]"
+
+    def test_expiry_and_delete(self, tmp_path):
+        async def test():
+            backend = SharedMemoryCacheBackend(tmp_path)
+            await backend.set("a", b"1", ttl=0.01)
+            await backend.set("b", b"2", ttl=60)
+            await backend.set("c", b"", ttl=60)
+            await asyncio.sleep(0.02)
+            values = await backend.get_many(["a", "b", "c"])
+            await backend.delete("b")
+            await backend.delete("b")
+            return values, await backend.get("b")
+
+        assert asyncio.run(test()) == ([None, b"2", b""], None)
+
+    def test_ignores_broken_files(self, tmp_path):
+        async def test():
+            backend = SharedMemoryCacheBackend(tmp_path)
+            await backend.set("a", b"1", ttl=60)
+            path = backend._get_path("a")
+            # A value of another key with the same hash.
+            os.replace(path, backend._get_path("b"))
+            open(path, "wb").close()
+            return await backend.get("a"), await backend.get("b")
+
+        assert asyncio.run(test()) == (None, None)
+
+    def test_unreadable_and_unwritable_values_are_misses(self, tmp_path):
+        async def test():
+            backend = SharedMemoryCacheBackend(tmp_path / "cache")
+            os.mkdir(backend._get_path("a"))
+            missing = await backend.get("a")
+            os.rmdir(backend._get_path("a"))
+            os.rmdir(backend.path)
+            await backend.set("b", b"2", ttl=60)
+            return missing, await backend.get("b")
+
+        assert asyncio.run(test()) == (None, None)
+
+    def test_rejects_directories_others_can_write_to(self, tmp_path):
+        os.chmod(tmp_path, 0o777)
+        with pytest.raises(PermissionError):
+            SharedMemoryCacheBackend(tmp_path)
+
+    @pytest.mark.skipif(not hasattr(os, "getuid"), reason="no user ids")
+    def test_default_directory_is_per_user(self):
+        path = _default_shared_memory_path()
+        assert os.path.basename(path) == f"tdk-cache-{os.getuid()}"
+
+    def test_sweep_evicts_soonest_to_expire(self, tmp_path):
+        async def test():
+            backend = SharedMemoryCacheBackend(tmp_path, max_bytes=45)
+            await backend.set("expired", b"1234", ttl=0.01)
+            await backend.set("short", b"1234", ttl=10)
+            await backend.set("long", b"1234", ttl=60)
+            await backend.set("longer", b"1234", ttl=120)
+            await asyncio.sleep(0.02)
+            backend.sweep()
+            keys = ("expired", "short", "long", "longer")
+            return [await backend.get(key) for key in keys]
+
+        assert asyncio.run(test()) == [None, None, b"1234", b"1234"]
+        assert len(os.listdir(tmp_path)) == 2
+
+
+class TestSQLiteCacheBackend:
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "cache.sqlite3"
+
+        async def test():
+            first = SQLiteCacheBackend(path)
+            await first.set("/gts?ara=kedi", b"[]", ttl=60)
+            first.close()
+            second = SQLiteCacheBackend(path)
+            try:
+                return await second.get("/gts?ara=kedi")
+            finally:
+                second.close()
+
+        assert asyncio.run(test()) == b"[]"
+        with sqlite3.connect(path) as connection:
+            mode = connection.execute("PRAGMA journal_mode").fetchone()
+        assert mode == ("wal",)
+
+    def test_expiry_and_delete(self, tmp_path):
+        async def test():
+            backend = SQLiteCacheBackend(tmp_path / "cache.sqlite3")
+            await backend.set("a", b"1", ttl=0.01)
+            await backend.set("b", b"2", ttl=60)
+            await asyncio.sleep(0.02)
+            expired = await backend.get("a")
+            await backend.delete("b")
+            deleted = await backend.get("b")
+            backend.close()
+            return expired, deleted
+
+        assert asyncio.run(test()) == (None, None)
+
+    def test_evicts_soonest_to_expire(self, tmp_path):
+        async def test():
+            backend = SQLiteCacheBackend(
+                tmp_path / "cache.sqlite3", max_bytes=8
+            )
+            await backend.set("short", b"1234", ttl=10)
+            await backend.set("long", b"1234", ttl=60)
+            await backend.set("longer", b"1234", ttl=120)
+            values = [await backend.get(k) for k in ("short", "long", "longer")]
+            backend.close()
+            return values
+
+        assert asyncio.run(test()) == [None, b"1234", b"1234"]
+
+    def test_tracks_total_size(self, tmp_path):
+        path = tmp_path / "cache.sqlite3"
+
+        async def test():
+            backend = SQLiteCacheBackend(path, max_bytes=64)
+            await backend.set("a", b"1234", ttl=60)
+            await backend.set("a", b"12345678", ttl=60)
+            await backend.set("b", b"1234", ttl=60)
+            await backend.set("c", b"1234", ttl=60)
+            await backend.delete("c")
+            await backend.set("b", b"", ttl=0)
+            backend.close()
+
+        asyncio.run(test())
+        with closing(sqlite3.connect(path)) as connection:
+            total = connection.execute("SELECT size FROM usage").fetchone()
+            actual = connection.execute(
+                "SELECT SUM(size) FROM responses"
+            ).fetchone()
+        assert total == actual == (8,)
+
+    def test_get_many(self, tmp_path):
+        async def test():
+            backend = SQLiteCacheBackend(tmp_path / "cache.sqlite3")
+            for i in range(600):
+                await backend.set(f"{i}", f"{i}".encode(), ttl=60)
+            await backend.set("expired", b"x", ttl=0.01)
+            await asyncio.sleep(0.02)
+            keys = ["missing", "expired", *(f"{i}" for i in range(600))]
+            values = await backend.get_many(keys)
+            backend.close()
+            return values
+
+        values = asyncio.run(test())
+        assert values[:3] == [None, None, b"0"]
+        assert values[-1] == b"599"
+
+
+class TestResponseCache:
+    def test_per_endpoint_ttl(self):
+        cache = ResponseCache(ttl=10, ttls={"gts": 20, "oneri": 0})
+        assert cache.get_ttl("gts") == 20
+        assert cache.get_ttl("etms") == 10
+        assert cache.get_ttl("autocomplete.json") == 24 * 60 * 60
+
+        async def test():
+            await cache.set(
+                "/oneri?soz=a", b"[]", endpoint="oneri", not_found=False
+            )
+            await cache.set(
+                "/gts?ara=a", b"[]", endpoint="gts", not_found=False
+            )
+            return (
+                await cache.get("/oneri?soz=a"),
+                await cache.get("/gts?ara=a"),
+            )
+
+        assert asyncio.run(test()) == (None, b"[]")
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.hit_ratio) == (1, 1, 0.5)
+
+    def test_per_dictionary_ttl(self):
+        cache = ResponseCache(ttl=10, ttls={"sks": 5, "kilavuz": 7})
+        assert cache.get_ttl("kilavuz", "sks") == 7
+        cache = ResponseCache(ttl=10, ttls={"sks": 5, "ysk": 0})
+        assert cache.get_ttl("kilavuz", "sks") == 5
+        assert cache.get_ttl("kilavuz", "syyd") == 10
+        assert cache.get_ttl("autocomplete.json", "gts") == 24 * 60 * 60
+
+    def test_client_passes_the_dictionary(self, run_against_server):
+        async def test(client, server):
+            for _ in range(2):
+                await client.search_sks("hala")
+                await client.search_syyd("yanlız")
+            return client.cache.stats()
+
+        stats = run_against_server(test, cache=ResponseCache(ttls={"sks": 0}))
+        assert (stats.hits, stats.misses) == (1, 3)
+
+    def test_negative_caching(self):
+        not_found = '{"error": "Sonuç bulunamadı"}'.encode()
+        cache = ResponseCache(
+            negative_backend=MemoryCacheBackend(max_entries=1),
+            negative_ttl=60,
+        )
+
+        async def put(key, value, is_not_found):
+            await cache.set(key, value, endpoint="gts", not_found=is_not_found)
+
+        async def test():
+            await put("/gts?ara=a", b"[1]", False)
+            await put("/gts?ara=x", not_found, True)
+            assert await cache.get("/gts?ara=x") == not_found
+            assert await cache.get("/gts?ara=x") == not_found
+            assert await cache.get("/gts?ara=a") == b"[1]"
+            # The negative cache has its own size limit.
+            await put("/gts?ara=y", not_found, True)
+            assert await cache.get("/gts?ara=x") is None
+            assert len(cache.backend) == 1
+
+        asyncio.run(test())
+        stats = cache.stats()
+        assert (stats.hits, stats.negative_hits, stats.misses) == (1, 2, 1)
+        assert stats.saved_requests == 3
+
+    def test_negative_caching_disabled(self):
+        cache = ResponseCache(negative_ttl=0)
+
+        async def test():
+            await cache.set("/gts?ara=x", b"{}", endpoint="gts", not_found=True)
+            return await cache.get("/gts?ara=x")
+
+        assert asyncio.run(test()) is None
+
+    def test_get_many(self):
+        cache = ResponseCache()
+
+        async def test():
+            await cache.set(
+                "/gts?ara=a", b"[1]", endpoint="gts", not_found=False
+            )
+            await cache.set("/gts?ara=x", b"{}", endpoint="gts", not_found=True)
+            return await cache.get_many(
+                ["/gts?ara=a", "/gts?ara=x", "/gts?ara=b"]
+            )
+
+        assert asyncio.run(test()) == [b"[1]", b"{}", None]
+        stats = cache.stats()
+        assert (stats.hits, stats.negative_hits, stats.misses) == (1, 1, 1)
+
+
+class TestConditionalCache:
+    def test_keeps_validators(self):
+        cache = ConditionalCache()
+
+        async def test():
+            await cache.set("/a", b"[1]", headers={})
+            await cache.set(
+                "/b",
+                b"[2]",
+                headers={
+                    "ETag": '"abc"',
+                    "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+                },
+            )
+            return await cache.get("/a"), await cache.get("/b")
+
+        assert asyncio.run(test()) == (
+            None,
+            (
+                {
+                    "If-None-Match": '"abc"',
+                    "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+                },
+                b"[2]",
+            ),
+        )
+
+    def test_shares_a_backend_with_a_response_cache(self):
+        backend = MemoryCacheBackend()
+        responses = ResponseCache(backend)
+        copies = ConditionalCache(backend, prefix="conditional:")
+
+        async def test():
+            await responses.set(
+                "/gts?ara=kedi", b"[1]", endpoint="gts", not_found=False
+            )
+            await copies.set("/gts?ara=kedi", b"[2]", headers={"ETag": "1"})
+            return (
+                await responses.get("/gts?ara=kedi"),
+                await copies.get("/gts?ara=kedi"),
+            )
+
+        assert asyncio.run(test()) == (
+            b"[1]",
+            ({"If-None-Match": "1"}, b"[2]"),
+        )
+
+
+class TestStaleCache:
+    def test_fresh_responses_are_reused(self, run_against_server):
+        async def test(client, server):
+            first = await client.get_homepage_content()
+            assert await client.get_homepage_content() == first
+            return server.requests["/icerik"]
+
+        stale_cache = StaleCache()
+        assert run_against_server(test, stale_cache=stale_cache) == 1
+
+    def test_stale_responses_are_refreshed_once_in_the_background(
+        self, run_against_server
+    ):
+        async def test(client, server):
+            await client.get_terms_dictionaries()
+            server.faults = FaultProfile(latency=0.1)
+            results = await asyncio.gather(
+                *(client.get_terms_dictionaries() for _ in range(3))
+            )
+            # Answered before the refresh could finish.
+            assert client.calls_in_flight == 1
+            await asyncio.sleep(0.2)
+            assert client.calls_in_flight == 0
+            return results, server.requests["/terim"]
+
+        stale_cache = StaleCache(max_age=0)
+        results, requests = run_against_server(test, stale_cache=stale_cache)
+        assert all(result == results[0] for result in results)
+        assert requests == 2
+
+    def test_refreshes_skip_the_response_cache(self, run_against_server):
+        async def test(client, server):
+            await client.get_terms_dictionaries()
+            await client.get_terms_dictionaries()
+            await asyncio.sleep(0.05)
+            await client.get_terms_dictionaries()
+            await asyncio.sleep(0.05)
+            return server.requests["/terim"]
+
+        stale_cache = StaleCache(max_age=0)
+        assert (
+            run_against_server(
+                test, cache=ResponseCache(), stale_cache=stale_cache
+            )
+            == 3
+        )
+
+    def test_stale_responses_survive_upstream_errors(self, run_against_server):
+        async def test(client, server):
+            first = await client.get_homepage_content()
+            server.faults = FaultProfile(error_rate=1.0)
+            assert await client.get_homepage_content() == first
+            await asyncio.sleep(0.05)
+            assert await client.get_homepage_content() == first
+            await asyncio.sleep(0.05)
+
+        stale_cache = StaleCache(max_age=0)
+        run_against_server(test, stale_cache=stale_cache, retry=None)
+        assert stale_cache.failed_revalidations == 2
+
+    def test_missing_responses_are_waited_for(self, run_against_server):
+        async def test(client, server):
+            server.faults = FaultProfile(error_rate=1.0)
+            with pytest.raises(ClientResponseError):
+                await client.get_homepage_content()
+
+        run_against_server(test, stale_cache=StaleCache(), retry=None)
+
+    def test_expiry(self):
+        async def test():
+            stale_cache = StaleCache(max_age=0)
+            await stale_cache.set("/icerik", b"{}")
+            assert await stale_cache.get("/icerik") == (b"{}", False)
+            assert await stale_cache.get("/terim") is None
+
+        asyncio.run(test())
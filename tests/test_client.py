@@ -0,0 +1,395 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from aiohttp import ClientResponseError, web
+from aiohttp.test_utils import TestServer
+
+from tdk.client import (
+    ClientDrainingError,
+    ConditionalCache,
+    TDKClient,
+    ResponseCache,
+    RetryPolicy,
+    get_default_client,
+    close_default_client,
+)
+from tdk.internal.deadlines import DeadlineExceededError
+from tdk.internal.fake_server import FakeTDKServer, FaultProfile
+from tdk.internal.http import make_client_optional
+from tdk.internal.scheduling import Priority, priority
+
+
+def run_with_server(handler, test):
+    """Run `test(server)` against a local server that answers with `handler`."""
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handler)
+        async with TestServer(app) as server:
+            return await test(server)
+
+    return asyncio.run(main())
+
+
+async def echo(request: web.Request) -> web.Response:
+    return web.json_response(
+        {"path": request.path, "params": dict(request.query)}
+    )
+
+
+class TestTDKClient:
+    def test_get_json(self):
+        async def test(server):
+            async with TDKClient() as client:
+                return await client.get_json(
+                    str(server.make_url("/gts")), params={"ara": "kedi"}
+                )
+
+        assert run_with_server(echo, test) == {
+            "path": "/gts",
+            "params": {"ara": "kedi"},
+        }
+
+    def test_reuses_connections(self):
+        peers = set()
+
+        async def handler(request):
+            peers.add(request.transport.get_extra_info("peername"))
+            return await echo(request)
+
+        async def test(server):
+            async with TDKClient() as client:
+                for _ in range(5):
+                    await client.get_json(str(server.make_url("/gts")))
+
+        run_with_server(handler, test)
+        assert len(peers) == 1
+
+    def test_closed_client_raises(self):
+        async def test():
+            client = TDKClient()
+            await client.close()
+            with pytest.raises(RuntimeError):
+                await client.get_json("http://localhost/")
+
+        asyncio.run(test())
+
+    def test_does_not_close_given_session(self):
+        async def test(server):
+            async with TDKClient() as owner:
+                async with TDKClient(http_session=owner.http_session) as c:
+                    await c.get_json(str(server.make_url("/")))
+                return owner.http_session.closed
+
+        assert run_with_server(echo, test) is False
+
+    def test_methods_take_a_timeout(self, run_against_server):
+        async def test(client, server):
+            with pytest.raises(DeadlineExceededError):
+                await client.search_terms(["Tıp"], "ağ", timeout=0.01)
+            with pytest.raises(DeadlineExceededError):
+                await client.search_gts("kedi", timeout=0.01)
+            return await client.search_gts("kedi", timeout=1)
+
+        result = run_against_server(test, faults=FaultProfile(latency=0.1))
+        assert result
+
+
+class TestDefaultClient:
+    def test_shared_within_loop(self):
+        async def test():
+            first = get_default_client()
+            assert get_default_client() is first
+            await close_default_client()
+            assert first.closed
+            assert get_default_client() is not first
+            await close_default_client()
+
+        asyncio.run(test())
+
+    def test_requires_running_loop(self):
+        with pytest.raises(RuntimeError):
+            get_default_client()
+
+    def test_closed_when_asyncio_run_ends(self):
+        script = textwrap.dedent(
+            """
+            import asyncio
+            import contextlib
+            import gc
+
+            import tdk
+            from tdk.client import _default_clients, get_default_client
+            from tdk.internal.fake_server import FakeTDKServer
+
+            async def main():
+                async with FakeTDKServer() as server:
+                    await get_default_client().get_json(
+                        server.url + "/gts?ara=kedi"
+                    )
+                    with contextlib.suppress(Exception):
+                        await tdk.search_gts("kedi", timeout=0.2)
+
+            asyncio.run(main())
+            gc.collect()
+            assert not _default_clients
+            """
+        )
+        result = subprocess.run(
+            [sys.executable, "-W", "error::ResourceWarning", "-c", script],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+            timeout=60,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stderr == ""
+
+
+class TestRetries:
+    def test_retries_server_errors(self):
+        statuses = [200, 503]
+
+        async def handler(request):
+            status = statuses.pop()
+            return web.json_response({"status": status}, status=status)
+
+        async def test(server):
+            async with TDKClient(retry=RetryPolicy(backoff_base=0)) as client:
+                return await client.get_json(str(server.make_url("/")))
+
+        assert run_with_server(handler, test) == {"status": 200}
+
+    def test_raises_when_out_of_retries(self):
+        async def handler(request):
+            return web.Response(status=500)
+
+        async def test(server):
+            async with TDKClient(retry=None) as client:
+                with pytest.raises(ClientResponseError):
+                    await client.get_json(str(server.make_url("/")))
+
+        run_with_server(handler, test)
+
+    def test_client_errors_are_not_retried_or_decoded(self):
+        requests = 0
+
+        async def handler(request):
+            nonlocal requests
+            requests += 1
+            return web.Response(
+                status=404, text="<html></html>", content_type="text/html"
+            )
+
+        async def test(server):
+            async with TDKClient(retry=RetryPolicy(backoff_base=0)) as client:
+                with pytest.raises(ClientResponseError) as info:
+                    await client.get_json(str(server.make_url("/")))
+                return info.value.status
+
+        assert run_with_server(handler, test) == 404
+        assert requests == 1
+
+
+@make_client_optional
+async def fetch(url: str, /, *, client: TDKClient):
+    return await client.get_json(url)
+
+
+class TestCoalescing:
+    def test_concurrent_calls_share_request(self):
+        hits = 0
+
+        async def handler(request):
+            nonlocal hits
+            hits += 1
+            await asyncio.sleep(0.05)
+            return await echo(request)
+
+        async def test(server):
+            url = str(server.make_url("/gts"))
+            async with TDKClient() as client:
+                results = await asyncio.gather(
+                    *(fetch(url, client=client) for _ in range(10))
+                )
+                assert client.single_flight.coalesced == 9
+                assert client.single_flight.in_flight == 0
+                await fetch(url, client=client)
+            return results
+
+        results = run_with_server(handler, test)
+        assert hits == 2
+        assert all(result is results[0] for result in results)
+
+    def test_normalized_queries_share_request(self):
+        async def test():
+            faults = FaultProfile(latency=0.05)
+            async with FakeTDKServer(faults=faults) as server:
+                async with TDKClient(base_url=server.url) as client:
+                    results = await asyncio.gather(
+                        client.search_gts("KEDİ"),
+                        client.search_gts("kedi"),
+                        client.search_gts("Kedi"),
+                    )
+                return results, server.requests["/gts"]
+
+        results, requests = asyncio.run(test())
+        assert requests == 1
+        assert results[0] and results[0] == results[1] == results[2]
+
+    def test_interactive_call_does_not_wait_for_bulk_call(self):
+        async def test():
+            faults = FaultProfile(latency=0.05)
+            async with FakeTDKServer(faults=faults) as server:
+                async with TDKClient(
+                    base_url=server.url, limit_per_host=1, metrics=None
+                ) as client:
+                    with priority(Priority.BULK):
+                        bulk = [
+                            asyncio.create_task(client.search_gts(query))
+                            for query in ("köpek", "at", "kuş", "kedi")
+                        ]
+                    await asyncio.sleep(0.01)
+                    result = await client.search_gts("kedi")
+                    done = bulk[-1].done()
+                    await asyncio.gather(*bulk)
+                    return result, done
+
+        result, bulk_done = asyncio.run(test())
+        assert result
+        assert not bulk_done
+
+    def test_disabled(self):
+        hits = 0
+
+        async def handler(request):
+            nonlocal hits
+            hits += 1
+            return await echo(request)
+
+        async def test(server):
+            url = str(server.make_url("/gts"))
+            async with TDKClient(coalesce=False) as client:
+                await asyncio.gather(
+                    *(fetch(url, client=client) for _ in range(3))
+                )
+
+        run_with_server(handler, test)
+        assert hits == 3
+
+    def test_cancelling_one_waiter_keeps_the_call(self):
+        async def handler(request):
+            await asyncio.sleep(0.05)
+            return await echo(request)
+
+        async def test(server):
+            url = str(server.make_url("/gts"))
+            async with TDKClient() as client:
+                first = asyncio.create_task(fetch(url, client=client))
+                second = asyncio.create_task(fetch(url, client=client))
+                await asyncio.sleep(0.01)
+                first.cancel()
+                return await second
+
+        assert run_with_server(handler, test)["path"] == "/gts"
+
+
+class TestCaching:
+    def test_serves_normalized_queries_from_cache(self):
+        hits = 0
+
+        async def handler(request):
+            nonlocal hits
+            hits += 1
+            return await echo(request)
+
+        async def test(server):
+            url = str(server.make_url("/gts"))
+            async with TDKClient(cache=ResponseCache()) as client:
+                for query in ["KEDİ", "Kedi", "kedi"]:
+                    result = await client.get_json(url, params={"ara": query})
+                return result, client.cache.stats()
+
+        result, stats = run_with_server(handler, test)
+        assert hits == 1
+        assert result == {"path": "/gts", "params": {"ara": "KEDİ"}}
+        assert (stats.hits, stats.misses) == (2, 1)
+
+
+class TestConditionalRequests:
+    def test_not_modified_is_served_from_kept_copy(self):
+        statuses = []
+
+        async def handler(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                statuses.append(304)
+                return web.Response(status=304)
+            statuses.append(200)
+            return web.json_response(["kedi"], headers={"ETag": '"v1"'})
+
+        async def test(server):
+            url = str(server.make_url("/autocomplete.json"))
+            conditional_cache = ConditionalCache()
+            async with TDKClient(conditional_cache=conditional_cache) as c:
+                results = [
+                    await c.get_json(url, conditional=True) for _ in range(3)
+                ]
+                # Unconditional requests don't use the kept copy.
+                await c.get_json(url)
+            return results, conditional_cache.not_modified
+
+        results, not_modified = run_with_server(handler, test)
+        assert results == [["kedi"]] * 3
+        assert statuses == [200, 304, 304, 200]
+        assert not_modified == 2
+
+
+class TestDrain:
+    def test_waits_for_calls_in_flight(self, run_against_server):
+        async def test(client, server):
+            calls = [
+                asyncio.create_task(client.search_gts("kedi")),
+                asyncio.create_task(client.search_saying("damla")),
+            ]
+            await asyncio.sleep(0.01)
+            assert client.calls_in_flight == 2
+            drain = asyncio.create_task(client.drain())
+            await asyncio.sleep(0)
+            assert client.draining
+            with pytest.raises(ClientDrainingError):
+                await client.search_gts("kalem")
+            with pytest.raises(ClientDrainingError):
+                await client.get_json("https://sozluk.gov.tr/gts")
+            results = await asyncio.gather(*calls)
+            return await drain, results, client.closed
+
+        finished, results, closed = run_against_server(
+            test, faults=FaultProfile(latency=0.1)
+        )
+        assert finished and closed
+        assert all(results)
+
+    def test_cancels_calls_after_the_timeout(self, run_against_server):
+        async def test(client, server):
+            call = asyncio.create_task(client.search_gts("kedi"))
+            await asyncio.sleep(0.01)
+            finished = await client.drain(timeout=0.05)
+            with pytest.raises(asyncio.CancelledError):
+                await call
+            return finished, client.calls_in_flight
+
+        assert run_against_server(test, faults=FaultProfile(latency=1)) == (
+            False,
+            0,
+        )
+
+    def test_idle_client_closes_at_once(self, run_against_server):
+        async def test(client, server):
+            await client.search_gts("kedi")
+            return await client.drain(timeout=0), client.closed
+
+        assert run_against_server(test) == (True, True)
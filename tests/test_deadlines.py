@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import ClientResponseError, web
+from aiohttp.test_utils import TestServer
+
+from tdk.client import DeadlineExceededError, RetryPolicy, TDKClient, deadline
+from tdk.dictionaries.bst import search_terms
+from tdk.internal.deadlines import (
+    get_deadline,
+    get_remaining,
+    run_with_deadline,
+)
+from tdk.internal.fake_server import FakeTDKServer, FaultProfile
+from tdk.internal.http import AiohttpTransport
+
+TERMS = [
+    "İlaç ve Eczacılık Terimleri Sözlüğü",
+    "Hemşirelik Terimleri Sözlüğü",
+    "Uluslararası Metroloji Sözlüğü",
+]
+
+
+class TestDeadline:
+    def test_nested_deadlines_only_shorten(self):
+        assert get_deadline() is None
+        with deadline(10):
+            outer = get_deadline()
+            with deadline(1):
+                assert get_deadline() < outer
+                with deadline(100):
+                    assert get_remaining() <= 1
+            with deadline(None):
+                assert get_deadline() == outer
+        assert get_remaining() is None
+
+    def test_cancels_the_awaitable(self):
+        cancelled = False
+
+        async def slow():
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(run_with_deadline(slow(), 0.01))
+        assert cancelled
+
+    def test_passed_deadline_raises_immediately(self):
+        async def main():
+            with deadline(0):
+                await run_with_deadline(asyncio.sleep(0))
+
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(main())
+
+    def test_inner_timeouts_are_not_deadlines(self):
+        async def fail():
+            raise asyncio.TimeoutError
+
+        with pytest.raises(asyncio.TimeoutError) as info:
+            asyncio.run(run_with_deadline(fail(), 10))
+        assert not isinstance(info.value, DeadlineExceededError)
+
+
+class TestClientDeadlines:
+    def test_covers_every_request_of_a_call(self):
+        async def main():
+            faults = FaultProfile(latency=0.1)
+            async with FakeTDKServer(faults=faults) as server:
+                async with TDKClient(
+                    transport=AiohttpTransport(base_url=server.url),
+                    metrics=None,
+                ) as client:
+                    start = time.perf_counter()
+                    with pytest.raises(DeadlineExceededError):
+                        await search_terms(
+                            TERMS, "ağ", client=client, timeout=0.25
+                        )
+                    return time.perf_counter() - start
+
+        assert asyncio.run(main()) < 0.35
+
+    def test_client_timeout(self):
+        async def main():
+            faults = FaultProfile(latency=0.1)
+            async with FakeTDKServer(faults=faults) as server:
+                async with TDKClient(
+                    transport=AiohttpTransport(base_url=server.url),
+                    metrics=None,
+                    timeout=0.15,
+                ) as client:
+                    assert await client.search_gts("kedi")
+                    with pytest.raises(DeadlineExceededError):
+                        await client.search_terms(TERMS, "ağ")
+                    with deadline(0.05), pytest.raises(DeadlineExceededError):
+                        await client.search_gts("kedi")
+
+        asyncio.run(main())
+
+    def test_retries_stop_at_the_deadline(self):
+        requests = 0
+
+        async def handler(request):
+            nonlocal requests
+            requests += 1
+            return web.Response(status=503, headers={"Retry-After": "5"})
+
+        async def main():
+            app = web.Application()
+            app.router.add_get("/{tail:.*}", handler)
+            async with TestServer(app) as server:
+                async with TDKClient(
+                    retry=RetryPolicy(backoff_max=10), metrics=None
+                ) as client:
+                    start = time.perf_counter()
+                    with deadline(1), pytest.raises(ClientResponseError):
+                        await client.get_json(str(server.make_url("/gts")))
+                    return time.perf_counter() - start
+
+        # The last error is raised, rather than waiting for the deadline.
+        assert asyncio.run(main()) < 0.5
+        assert requests == 1
@@ -0,0 +1,123 @@
+import time
+from json import JSONDecodeError
+
+import pytest
+from aiohttp import ClientResponseError
+
+from tdk.client import ConditionalCache, RetryPolicy
+from tdk.dictionaries.lehce import Lehce
+from tdk.internal.fake_server import FaultProfile
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda c: c.search_gts("kedi"),
+        lambda c: c.search_gts_proverbs_and_phrases("kedi"),
+        lambda c: c.get_gts_suggestions("kedü"),
+        lambda c: c.get_gts_index(),
+        lambda c: c.get_gts_circumflex_index(),
+        lambda c: c.get_etms_index(),
+        lambda c: c.search_etms("kedi"),
+        lambda c: c.search_saying("damla"),
+        lambda c: c.search_western("abajur"),
+        lambda c: c.search_derleme("abla"),
+        lambda c: c.search_spelling("kitap"),
+        lambda c: c.search_tarama("kitap"),
+        lambda c: c.get_tarama_scans(9127),
+        lambda c: c.search_sks("hala"),
+        lambda c: c.search_syyd("yanlız"),
+        lambda c: c.search_loanwords("abone"),
+        lambda c: c.search_names("deniz", according_to="name", gender="either"),
+        lambda c: c.search_lehce(Lehce.AZERBAIJAN_TURKISH, "ağaç"),
+        lambda c: c.get_terms_dictionaries(),
+        lambda c: c.search_terms(["Bilişim Terimleri Sözlüğü"], "ağ"),
+        lambda c: c.get_homepage_content(),
+    ],
+)
+def test_fixtures_are_valid(call, run_against_server):
+    async def test(client, server):
+        return await call(client)
+
+    assert run_against_server(test)
+
+
+def test_not_found(run_against_server):
+    async def test(client, server):
+        return await client.search_gts("yokyok"), server.statuses
+
+    results, statuses = run_against_server(test)
+    assert results == []
+    assert statuses == {200: 1}
+
+
+def test_conditional_requests(run_against_server):
+    async def test(client, server):
+        for _ in range(3):
+            await client.get_gts_index()
+        return server.statuses
+
+    statuses = run_against_server(test, conditional_cache=ConditionalCache())
+    assert statuses == {200: 1, 304: 2}
+
+
+class TestFaults:
+    def test_latency(self, run_against_server):
+        async def test(client, server):
+            start = time.perf_counter()
+            await client.search_gts("kedi")
+            return time.perf_counter() - start
+
+        faults = FaultProfile(latency=0.05)
+        assert run_against_server(test, faults=faults) >= 0.05
+
+    def test_errors_are_retried(self, run_against_server):
+        async def test(client, server):
+            with pytest.raises(ClientResponseError):
+                await client.search_gts("kedi")
+            return server.requests["/gts"]
+
+        faults = FaultProfile(error_rate=1, error_statuses=(503,))
+        retry = RetryPolicy(max_attempts=3, backoff_base=0)
+        assert run_against_server(test, faults=faults, retry=retry) == 3
+
+    @pytest.mark.parametrize(
+        "faults",
+        [FaultProfile(invalid_json_rate=1), FaultProfile(truncated_rate=1)],
+    )
+    def test_broken_documents(self, faults, run_against_server):
+        async def test(client, server):
+            with pytest.raises(JSONDecodeError):
+                await client.search_gts("kedi")
+            return server.corrupted
+
+        assert run_against_server(test, faults=faults, retry=None) == 1
+
+    def test_throttling(self, run_against_server):
+        async def test(client, server):
+            await client.search_gts("kedi")
+            with pytest.raises(ClientResponseError) as e:
+                await client.search_gts("köpek")
+            return e.value
+
+        faults = FaultProfile(rate_limit=0.1)
+        # Retry-After asks for 10 seconds, longer than backoff_max allows.
+        retry = RetryPolicy(backoff_max=1)
+        error = run_against_server(test, faults=faults, retry=retry)
+        assert error.status == 429
+        assert error.headers["Retry-After"] == "10"
+
+    def test_seeded_faults_are_reproducible(self, run_against_server):
+        faults = FaultProfile(error_rate=0.5, seed=42)
+
+        async def test(client, server):
+            for query in ["kedi", "köpek", "kitap", "güzel"] * 5:
+                try:
+                    await client.search_gts(query)
+                except ClientResponseError:
+                    pass
+            return server.statuses
+
+        assert run_against_server(
+            test, faults=faults, retry=None
+        ) == run_against_server(test, faults=faults, retry=None)
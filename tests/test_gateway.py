@@ -0,0 +1,164 @@
+import asyncio
+
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+from tdk.__main__ import make_backend, make_parser
+from tdk.client import RedisCacheBackend, ResponseCache, TDKClient
+from tdk.internal.fake_server import FakeTDKServer, FaultProfile
+from tdk.internal.gateway import client_key, gateway_functions, make_app
+from tdk.internal.metrics import MetricsRegistry
+
+
+def gateway_test(test, *, faults=FaultProfile(), **options):
+    async def main():
+        async with FakeTDKServer(faults=faults) as upstream:
+            app = make_app(
+                base_url=upstream.url,
+                cache=ResponseCache(),
+                metrics=MetricsRegistry(),
+                **options,
+            )
+            async with TestServer(app) as server, ClientSession() as session:
+
+                async def get(path, **params):
+                    url = server.make_url(path)
+                    async with session.get(url, params=params) as response:
+                        return response.status, await response.json()
+
+                return await test(get, upstream, app)
+
+    return asyncio.run(main())
+
+
+def test_serves_the_models():
+    async def test(get, upstream, app):
+        return await get("/search_gts", query="kedi")
+
+    status, entries = gateway_test(test)
+    assert status == 200
+    assert entries[0]["entry"] == "kedi"
+    assert entries[0]["meanings"][0]["meaning"].startswith("Kedigillerden")
+
+
+def test_parameters():
+    async def test(get, upstream, app):
+        names = await get(
+            "/search_names", query="deniz", according_to="name", gender="4"
+        )
+        lehce = await get(
+            "/search_lehce", lehce="azerbaijan_turkish", query="ağaç"
+        )
+        not_found = await get("/search_gts", query="yokböylebirsöz")
+        return names, lehce, not_found
+
+    names, lehce, not_found = gateway_test(test)
+    assert names[0] == 200 and names[1][0]["name"] == "Deniz"
+    assert lehce[0] == 200 and lehce[1]
+    assert not_found == (200, [])
+
+
+def test_repeated_parameters():
+    async def test(get, upstream, app):
+        url = "/search_terms?query=ağ&dictionaries={}&dictionaries={}"
+        url = url.format(
+            "Bilişim Terimleri Sözlüğü", "Uluslararası Metroloji Sözlüğü"
+        )
+        return *await get(url), upstream.requests["/metroloji"]
+
+    status, entries, metroloji_requests = gateway_test(test)
+    assert status == 200
+    assert {entry["dictionary_name"] for entry in entries} == {
+        "Bilişim Terimleri Sözlüğü"
+    }
+    assert metroloji_requests == 1
+
+
+def test_invalid_requests():
+    async def test(get, upstream, app):
+        return (
+            await get("/search_gts"),
+            await get("/search_names", query="a", according_to="x", gender="4"),
+            await get("/get_tarama_scans", tdk_id="x"),
+            await get("/search_gts", query="kedi", timeout="soon"),
+            await get("/search_everything", query="kedi"),
+            sum(upstream.requests.values()),
+        )
+
+    *responses, requests = gateway_test(test)
+    assert [status for status, _ in responses] == [400, 400, 400, 400, 404]
+    assert responses[0][1] == {"error": "Missing parameter: query"}
+    assert responses[1][1]["details"]
+    assert requests == 0
+
+
+def test_calls_share_one_client():
+    async def test(get, upstream, app):
+        results = await asyncio.gather(
+            *(get("/search_gts", query="kedi") for _ in range(10))
+        )
+        results.append(await get("/search_gts", query="KEDİ"))
+        return results, upstream.requests["/gts"]
+
+    results, requests = gateway_test(test, faults=FaultProfile(latency=0.05))
+    assert all(result == results[0] for result in results)
+    assert requests == 1
+
+
+def test_upstream_errors():
+    async def test(get, upstream, app):
+        failed = await get("/search_gts", query="kedi")
+        upstream.faults = FaultProfile(latency=1)
+        timed_out = await get("/search_gts", query="at", timeout="0.05")
+        return failed, timed_out
+
+    failed, timed_out = gateway_test(
+        test, faults=FaultProfile(error_rate=1.0), retry=None
+    )
+    assert failed[0] == 502 and failed[1]["upstream_status"] >= 500
+    assert timed_out[0] == 504
+
+
+def test_index_health_and_shutdown():
+    async def test(get, upstream, app):
+        index = await get("/")
+        health = await get("/health")
+        return index, health, app[client_key]
+
+    (_, index), (_, health), client = gateway_test(test)
+    assert list(index) == list(gateway_functions)
+    assert index["search_names"] == ["query", "according_to", "gender"]
+    assert health == {"healthy": True, "calls_in_flight": 0}
+    assert client.closed
+
+
+def test_given_client_is_not_closed():
+    async def main():
+        async with FakeTDKServer() as upstream:
+            client = TDKClient(base_url=upstream.url, metrics=None)
+            app = make_app(client, metrics=MetricsRegistry())
+            async with TestServer(app) as server, ClientSession() as session:
+                url = server.make_url("/search_gts")
+                async with session.get(url, params={"query": "kedi"}) as r:
+                    assert r.status == 200
+            assert not client.closed
+            await client.close()
+
+    asyncio.run(main())
+
+
+def test_command_line():
+    args = make_parser().parse_args(
+        [
+            "serve",
+            "--port=9000",
+            "--base-url=http://a",
+            "--base-url=http://b",
+            "--redis=redis://localhost:6380/1",
+        ]
+    )
+    assert (args.port, args.base_url) == (9000, ["http://a", "http://b"])
+    assert isinstance(make_backend(args), RedisCacheBackend)
+    args = make_parser().parse_args(["serve"])
+    assert make_backend(args) is None
+    assert args.rate_limit == 10
@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from tdk.client import TDKClient
+from tdk.internal.hedging import Hedger, HedgingPolicy
+
+
+def make_send(delays, results, cancelled):
+    async def send():
+        index = len(results)
+        results.append(index)
+        try:
+            delay = delays[index]
+            if isinstance(delay, Exception):
+                raise delay
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return index
+
+    return send
+
+
+def run(hedger, delays, endpoint="gts"):
+    results, cancelled = [], []
+
+    async def main():
+        return await hedger.run(endpoint, make_send(delays, results, cancelled))
+
+    return asyncio.run(main()), len(results), cancelled
+
+
+class TestHedger:
+    def test_fast_requests_are_not_hedged(self):
+        hedger = Hedger(HedgingPolicy(initial_delay=0.1))
+        assert run(hedger, [0.0]) == (0, 1, [])
+        assert hedger.hedged == 0
+
+    def test_slow_request_is_hedged_and_cancelled(self):
+        hedger = Hedger(HedgingPolicy(initial_delay=0.02))
+        assert run(hedger, [1.0, 0.0]) == (1, 2, [0])
+        assert hedger.hedged == hedger.hedge_wins == 1
+
+    def test_original_can_still_win(self):
+        hedger = Hedger(HedgingPolicy(initial_delay=0.02))
+        assert run(hedger, [0.05, 1.0]) == (0, 2, [1])
+        assert hedger.hedge_wins == 0
+
+    def test_failed_call_waits_for_the_other(self):
+        hedger = Hedger(HedgingPolicy(initial_delay=0.02))
+        assert run(hedger, [0.05, ValueError()]) == (0, 2, [])
+
+    def test_both_failing_raises_the_first_error(self):
+        hedger = Hedger(HedgingPolicy(initial_delay=0.0))
+
+        async def main():
+            errors = iter([KeyError(), ValueError()])
+
+            async def send():
+                error = next(errors)
+                await asyncio.sleep(0.01)
+                raise error
+
+            await hedger.run("gts", send)
+
+        with pytest.raises(KeyError):
+            asyncio.run(main())
+
+    def test_budget_limits_hedges(self):
+        hedger = Hedger(
+            HedgingPolicy(initial_delay=0.0, budget=0.5, max_balance=1)
+        )
+        hedged = [run(hedger, [0.01, 0.01])[1] == 2 for _ in range(6)]
+        # The first hedge is free, then one is earned every two requests.
+        assert hedged == [True, False, True, False, True, False]
+        assert hedger.denied == 3
+
+    def test_delay_follows_the_percentile(self):
+        hedger = Hedger(
+            HedgingPolicy(percentile=0.5, min_samples=10, initial_delay=3)
+        )
+        for _ in range(9):
+            hedger.observe("gts", 0.2)
+        assert hedger.get_delay("gts") == 3
+        hedger.observe("gts", 0.2)
+        assert 0.1 < hedger.get_delay("gts") <= 0.25
+        assert hedger.get_delay("bst") == 3
+
+    def test_delay_follows_a_change_in_latency(self):
+        hedger = Hedger(
+            HedgingPolicy(percentile=0.9, window=50, min_samples=10)
+        )
+        for _ in range(1000):
+            hedger.observe("gts", 0.1)
+        assert hedger.get_delay("gts") == 0.1
+        for _ in range(50):
+            hedger.observe("gts", 0.5)
+        assert hedger.get_delay("gts") == 0.5
+
+    def test_delay_has_a_minimum(self):
+        hedger = Hedger(HedgingPolicy(min_samples=1, min_delay=0.05))
+        hedger.observe("gts", 0.0)
+        assert hedger.get_delay("gts") == 0.05
+
+
+def test_client_hedges_slow_responses():
+    requests = 0
+
+    async def handler(request):
+        nonlocal requests
+        requests += 1
+        if requests == 1:
+            await asyncio.sleep(1)
+        return web.json_response({"error": "Sonuç bulunamadı"})
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handler)
+        async with TestServer(app) as server:
+            async with TDKClient(
+                hedging=HedgingPolicy(initial_delay=0.05), metrics=None
+            ) as client:
+                start = time.perf_counter()
+                await client.get_json(str(server.make_url("/gts")))
+                return time.perf_counter() - start, client.hedger
+
+    duration, hedger = asyncio.run(main())
+    assert duration < 0.5
+    assert requests == 2
+    assert hedger.hedge_wins == 1
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import time
+
+import pytest
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+
+from tdk.client import TDKClient
+from tdk.internal.fake_server import FakeTDKServer, FaultProfile
+from tdk.internal.http import (
+    AiohttpTransport,
+    RecordingTransport,
+    ReplayTransport,
+    make_request_key,
+)
+
+
+def test_request_key_ignores_host_and_parameter_order():
+    assert make_request_key(
+        "http://127.0.0.1:8080/lehce?lehce=1", {"ara": "kedi"}
+    ) == make_request_key("https://sozluk.gov.tr/lehce?ara=kedi&lehce=1", None)
+
+
+def record(tmp_path, handler, queries):
+    cassette = tmp_path / "cassette.json"
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handler)
+        async with TestServer(app) as server:
+            transport = RecordingTransport(AiohttpTransport(), cassette)
+            async with TDKClient(transport=transport) as client:
+                for query in queries:
+                    await client.get_json(
+                        str(server.make_url("/gts")), params={"ara": query}
+                    )
+
+    asyncio.run(main())
+    return cassette
+
+
+async def echo(request: web.Request) -> web.Response:
+    return web.json_response({"ara": request.query["ara"]})
+
+
+class TestRecordAndReplay:
+    def test_replays_without_a_server(self, tmp_path):
+        cassette = record(tmp_path, echo, ["kedi", "köpek"])
+        assert len(json.loads(cassette.read_text())["interactions"]) == 2
+
+        async def main():
+            async with TDKClient(transport=ReplayTransport(cassette)) as c:
+                return [
+                    await c.get_json(
+                        "https://sozluk.gov.tr/gts", params={"ara": query}
+                    )
+                    for query in ["köpek", "kedi", "kedi"]
+                ]
+
+        assert asyncio.run(main()) == [
+            {"ara": "köpek"},
+            {"ara": "kedi"},
+            {"ara": "kedi"},
+        ]
+
+    def test_replays_responses_in_recorded_order(self, tmp_path):
+        statuses = [200, 503]
+
+        async def handler(request):
+            status = statuses.pop()
+            return web.json_response({"status": status}, status=status)
+
+        cassette = record(tmp_path, handler, ["kedi"])
+
+        async def main():
+            async with TDKClient(transport=ReplayTransport(cassette)) as c:
+                return await c.get_json(
+                    "https://sozluk.gov.tr/gts", params={"ara": "kedi"}
+                )
+
+        # The recorded 503 is retried, and the recorded 200 is served.
+        assert asyncio.run(main()) == {"status": 200}
+
+    def test_unrecorded_request_raises(self, tmp_path):
+        cassette = record(tmp_path, echo, ["kedi"])
+
+        async def main():
+            async with TDKClient(transport=ReplayTransport(cassette)) as c:
+                with pytest.raises(LookupError):
+                    await c.get_json(
+                        "https://sozluk.gov.tr/gts", params={"ara": "at"}
+                    )
+
+        asyncio.run(main())
+
+    def test_simulated_latency(self, tmp_path):
+        cassette = record(tmp_path, echo, ["kedi"])
+        transport = ReplayTransport(cassette, latency=lambda: 0.05)
+
+        async def main():
+            start = time.perf_counter()
+            await transport.get(
+                "https://sozluk.gov.tr/gts", params={"ara": "kedi"}
+            )
+            return time.perf_counter() - start
+
+        assert asyncio.run(main()) >= 0.05
+
+    def test_binary_bodies_survive(self, tmp_path):
+        body = bytes(range(256))
+
+        async def handler(request):
+            return web.Response(body=body)
+
+        cassette = tmp_path / "cassette.json"
+
+        async def main():
+            app = web.Application()
+            app.router.add_get("/{tail:.*}", handler)
+            async with TestServer(app) as server:
+                transport = RecordingTransport(AiohttpTransport(), cassette)
+                await transport.get(str(server.make_url("/image")))
+                await transport.close()
+            return await ReplayTransport(cassette).get("http://x/image")
+
+        assert asyncio.run(main()).body == body
+
+
+class TestLatencies:
+    def test_phases_are_recorded_per_endpoint(self):
+        async def main():
+            faults = FaultProfile(latency=0.05)
+            async with FakeTDKServer(faults=faults) as server:
+                transport = AiohttpTransport(base_url=server.url)
+                async with TDKClient(transport=transport) as client:
+                    await client.search_gts("kedi")
+                    await client.search_gts("köpek")
+                    await client.search_saying("damla")
+                    return client.latencies.snapshot()
+
+        latencies = asyncio.run(main())
+        assert set(latencies) == {"gts", "atasozu"}
+        gts = latencies["gts"]
+        assert gts["total"].count == gts["ttfb"].count == 2
+        assert gts["download"].count == 2
+        assert gts["ttfb"].sum >= 0.1
+        # The connection is opened once and reused.
+        assert gts["connect"].count == 1
+        assert "connect" not in latencies["atasozu"]
+
+    def test_given_sessions_are_not_traced(self):
+        async def main():
+            async with FakeTDKServer() as server:
+                async with ClientSession() as session:
+                    transport = AiohttpTransport(
+                        http_session=session, base_url=server.url
+                    )
+                    await transport.get("https://sozluk.gov.tr/gts")
+                    return transport.latencies.snapshot()["gts"]
+
+        assert set(asyncio.run(main())) == {"download", "total"}
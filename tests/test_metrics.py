@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientResponseError
+from pydantic import ValidationError
+
+from tdk.client import ResponseCache, RetryPolicy
+from tdk.internal.fake_server import FaultProfile
+from tdk.internal.metrics import Histogram, MetricsRegistry
+
+
+class TestHistogram:
+    def test_counts_values_in_buckets(self):
+        histogram = Histogram([1, 2, 4])
+        for value in [0.5, 1, 1.5, 3, 10]:
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        assert snapshot.count == 5
+        assert snapshot.sum == 16
+        assert snapshot.mean == 3.2
+        assert snapshot.buckets == [
+            (1, 2),
+            (2, 3),
+            (4, 4),
+            (float("inf"), 5),
+        ]
+
+    def test_quantiles_are_interpolated(self):
+        histogram = Histogram([1, 2])
+        for value in [0.5] * 50 + [1.5] * 50:
+            histogram.observe(value)
+        assert histogram.quantile(0.25) == 0.5
+        assert histogram.quantile(0.75) == 1.5
+        assert histogram.quantile(1) == 2
+
+    def test_overflowing_values_are_capped(self):
+        histogram = Histogram([1])
+        histogram.observe(5)
+        assert histogram.quantile(0.99) == 1
+
+    def test_empty(self):
+        assert Histogram().snapshot().p99 == 0
+
+    def test_reset(self):
+        histogram = Histogram()
+        histogram.observe(1)
+        histogram.reset()
+        assert histogram.count == 0
+        assert histogram.cumulative_counts()[-1] == 0
+
+    def test_bounds_must_ascend(self):
+        with pytest.raises(ValueError):
+            Histogram([2, 1])
+
+
+class TestMetricsRegistry:
+    def test_render(self):
+        registry = MetricsRegistry()
+        requests = registry.counter(
+            "requests_total", "Requests.", ["dictionary", "status"]
+        )
+        requests.labels(dictionary="gts", status="200").inc()
+        requests.labels(dictionary="gts", status="200").inc()
+        requests.labels(dictionary='"a\\b"', status="error").inc(0.5)
+        registry.gauge("in_flight", "Requests\nin flight.").labels().set(3)
+        assert registry.render() == (
+            "# HELP in_flight Requests\\nin flight.\n"
+            "# TYPE in_flight gauge\n"
+            "in_flight 3\n"
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{dictionary="\\"a\\\\b\\"",status="error"} 0.5\n'
+            'requests_total{dictionary="gts",status="200"} 2\n'
+        )
+
+    def test_metrics_are_shared_by_name(self):
+        registry = MetricsRegistry()
+        assert registry.counter("a", "A.") is registry.counter("a", "A.")
+        with pytest.raises(ValueError):
+            registry.gauge("a", "A.")
+        with pytest.raises(ValueError):
+            registry.counter("a", "A.", ["label"])
+
+    def test_labels_must_match(self):
+        counter = MetricsRegistry().counter("a", "A.", ["dictionary"])
+        with pytest.raises(ValueError):
+            counter.labels()
+        with pytest.raises(ValueError):
+            counter.labels(dictionary="gts", status="200")
+
+    def test_invalid_name(self):
+        with pytest.raises(ValueError):
+            MetricsRegistry().counter("tdk-requests", "Requests.")
+
+
+FIXTURES = {"gts": {"bozuk": [{"madde": "bozuk"}]}}
+
+
+class TestClientMetrics:
+    def test_requests_and_cache(self, run_against_server):
+        async def test(client, server):
+            for _ in range(3):
+                await client.search_gts("kedi")
+            await client.get_json("https://sozluk.gov.tr/gts?ara=kedi")
+
+        registry = MetricsRegistry()
+        run_against_server(test, metrics=registry, cache=ResponseCache())
+        requests = registry.get("tdk_requests_total")
+        assert requests.get(dictionary="gts", status="200") == 1
+        assert registry.get("tdk_cache_hits_total").get(dictionary="gts") == 3
+        assert registry.get("tdk_cache_misses_total").get(dictionary="gts") == 1
+        assert registry.get("tdk_response_bytes_total").get(dictionary="gts")
+        assert registry.get("tdk_in_flight_requests").get() == 0
+
+    def test_dictionaries_label_their_requests(self, run_against_server):
+        async def test(client, server):
+            await client.search_terms(["Bilişim Terimleri Sözlüğü"], "ağ")
+
+        registry = MetricsRegistry()
+        run_against_server(test, metrics=registry)
+        requests = registry.get("tdk_requests_total")
+        assert requests.get(dictionary="bst", status="200") == 1
+
+    def test_retries(self, run_against_server):
+        async def test(client, server):
+            with pytest.raises(ClientResponseError):
+                await client.search_gts("kedi")
+
+        registry = MetricsRegistry()
+        run_against_server(
+            test,
+            metrics=registry,
+            faults=FaultProfile(error_rate=1, error_statuses=(503,)),
+            retry=RetryPolicy(max_attempts=3, backoff_base=0),
+        )
+        assert registry.get("tdk_retries_total").get(dictionary="gts") == 2
+        requests = registry.get("tdk_requests_total")
+        assert requests.get(dictionary="gts", status="503") == 3
+
+    def test_validation_failures(self, run_against_server):
+        async def test(client, server):
+            await asyncio.gather(
+                *(client.search_gts("bozuk") for _ in range(3)),
+                return_exceptions=True,
+            )
+            with pytest.raises(ValidationError):
+                await client.search_gts("bozuk")
+
+        registry = MetricsRegistry()
+        run_against_server(test, fixtures=FIXTURES, metrics=registry)
+        # Coalesced calls share one validation failure.
+        failures = registry.get("tdk_validation_failures_total")
+        assert failures.get(dictionary="gts") == 2
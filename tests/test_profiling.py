@@ -0,0 +1,41 @@
+import asyncio
+
+from tdk.client import Profiler
+from tdk.internal.fake_server import FaultProfile
+
+LATENCY = FaultProfile(latency=0.02)
+
+
+def test_phases_are_attributed_per_function(run_against_server):
+    async def test(client, server):
+        await client.search_gts("kitap")
+        with Profiler() as profiler:
+            await client.search_gts("kedi")
+            await asyncio.gather(
+                asyncio.create_task(client.search_gts("köpek")),
+                client.search_terms(["Bilişim Terimleri Sözlüğü"], "ağ"),
+            )
+        await client.search_gts("güzel")
+        return profiler
+
+    profiler = run_against_server(test, faults=LATENCY)
+    stats = profiler.stats()
+    assert set(stats) == {"gts.search_gts", "bst.search_terms"}
+    gts = stats["gts.search_gts"]
+    assert gts.calls == 2
+    assert gts.transport >= 0.04
+    assert gts.decode > 0
+    assert gts.validation > 0
+    assert gts.total >= gts.transport + gts.decode
+    assert stats["bst.search_terms"].calls == 1
+    assert "gts.search_gts" in profiler.report()
+
+
+def test_nothing_is_recorded_without_a_profiler(run_against_server):
+    profiler = Profiler()
+
+    async def test(client, server):
+        await client.search_gts("kedi")
+
+    run_against_server(test, faults=LATENCY)
+    assert profiler.stats() == {}
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from tdk.client import ResponseCache, TDKClient
+from tdk.internal.fake_redis import FakeRedisServer
+from tdk.internal.fake_server import FakeTDKServer
+from tdk.internal.http import AiohttpTransport
+from tdk.internal.redis_cache import (
+    RedisCacheBackend,
+    RedisError,
+    encode_command,
+)
+
+
+def redis_test(test, **options):
+    async def main():
+        async with FakeRedisServer(**options) as server:
+            return await test(server)
+
+    return asyncio.run(main())
+
+
+def test_rejects_other_urls():
+    with pytest.raises(ValueError):
+        RedisCacheBackend("http://localhost:6379")
+
+
+def test_encode_command():
+    assert encode_command("SET", "k", b"\r\n", "PX", 10) == (
+        b"*5\r\n$3\r\nSET\r\n$1\r\nk\r\n$2\r\n\r\n\r\n"
+        b"$2\r\nPX\r\n$2\r\n10\r\n"
+    )
+
+
+def test_get_set_delete():
+    async def test(server):
+        backend = RedisCacheBackend(server.url)
+        await backend.set("/gts?ara=kedi", b"[]", ttl=60)
+        await backend.set("/gts?ara=it", b"[1]", ttl=0.01)
+        await backend.set("/gts?ara=at", b"[2]", ttl=60)
+        await backend.delete("/gts?ara=at")
+        await asyncio.sleep(0.02)
+        values = await backend.get_many(
+            ["/gts?ara=kedi", "/gts?ara=it", "/gts?ara=at"]
+        )
+        await backend.close()
+        return values, set(server.databases[0]), server.commands
+
+    values, keys, commands = redis_test(test)
+    assert values == [b"[]", None, None]
+    assert keys == {b"tdk:/gts?ara=kedi"}
+    assert commands["MGET"] == 1
+    assert not commands["GET"]
+
+
+def test_authentication_and_database():
+    async def test(server):
+        url = server.url.replace("redis://", "redis://:secret@")[:-1] + "2"
+        backend = RedisCacheBackend(url, prefix="")
+        await backend.set("key", b"value", ttl=60)
+        value = await backend.get("key")
+        await backend.close()
+        return value, server.databases[2]
+
+    value, database = redis_test(test, password="secret")
+    assert value == b"value"
+    assert set(database) == {b"key"}
+
+
+def test_connections_are_reused_and_bounded():
+    async def test(server):
+        backend = RedisCacheBackend(server.url, max_connections=2)
+        await asyncio.gather(
+            *(backend.set(f"{i}", b"x", ttl=60) for i in range(20))
+        )
+        await asyncio.gather(*(backend.get(f"{i}") for i in range(20)))
+        await backend.close()
+        return server.connections
+
+    assert redis_test(test) == 2
+
+
+def test_errors_are_misses():
+    async def test(server):
+        backend = RedisCacheBackend(server.url, prefix="")
+        with pytest.raises(RedisError):
+            await backend.execute("HGETALL", "key")
+        await backend.set("key", b"value", ttl=60)
+        await server.close()
+        value = await backend.get("key")
+        values = await backend.get_many(["key", "other"])
+        await backend.set("key", b"value", ttl=60)
+        await backend.close()
+        return value, values, backend.errors
+
+    assert redis_test(test) == (None, [None, None], 3)
+
+
+def test_shared_between_clients():
+    async def test(redis):
+        async with FakeTDKServer() as server:
+            for _ in range(3):
+                backend = RedisCacheBackend(redis.url)
+                async with TDKClient(
+                    transport=AiohttpTransport(base_url=server.url),
+                    cache=ResponseCache(backend),
+                    metrics=None,
+                ) as client:
+                    assert await client.search_gts("kedi")
+                await backend.close()
+            return server.requests["/gts"]
+
+    assert redis_test(test) == 1
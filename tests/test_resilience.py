@@ -0,0 +1,124 @@
+import asyncio
+from json import JSONDecodeError
+
+import pytest
+from aiohttp import ClientConnectionError, ClientResponseError
+from multidict import CIMultiDict
+
+from tdk.internal.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    RetryPolicy,
+    call_with_retries,
+    parse_retry_after,
+)
+
+
+def response_error(status, headers=None):
+    return ClientResponseError(
+        None, (), status=status, headers=CIMultiDict(headers or {})
+    )
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after("120") == 120
+
+    def test_past_date(self):
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+
+    def test_invalid(self):
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+
+class TestRetryPolicy:
+    def test_backoff_is_bounded(self):
+        policy = RetryPolicy(max_attempts=10, backoff_base=1, backoff_max=3)
+        error = ClientConnectionError()
+        assert 0 <= policy.get_delay(error, attempt=1) <= 1
+        assert 0 <= policy.get_delay(error, attempt=8) <= 3
+
+    def test_gives_up(self):
+        policy = RetryPolicy(max_attempts=2)
+        assert policy.get_delay(ClientConnectionError(), attempt=2) is None
+        assert policy.get_delay(response_error(404), attempt=1) is None
+        assert policy.get_delay(ValueError(), attempt=1) is None
+
+    def test_invalid_json(self):
+        error = JSONDecodeError("", "", 0)
+        assert RetryPolicy().get_delay(error, attempt=1) is not None
+        policy = RetryPolicy(retry_invalid_json=False)
+        assert policy.get_delay(error, attempt=1) is None
+
+    def test_retry_after(self):
+        policy = RetryPolicy(backoff_base=0, backoff_max=5)
+        error = response_error(429, {"Retry-After": "2"})
+        assert policy.get_delay(error, attempt=1) == 2
+        error = response_error(503, {"Retry-After": "60"})
+        assert policy.get_delay(error, attempt=1) is None
+
+
+class TestCircuitBreaker:
+    def test_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.01)
+        for _ in range(2):
+            breaker.before_request()
+            breaker.record_failure(response_error(502))
+        assert breaker.state is CircuitState.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+        asyncio.run(asyncio.sleep(0.02))
+        assert breaker.state is CircuitState.HALF_OPEN
+        breaker.before_request()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()  # only one trial at a time
+        breaker.record_success()
+        assert breaker.state is CircuitState.CLOSED
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure(ClientConnectionError())
+        asyncio.run(asyncio.sleep(0.02))
+        breaker.before_request()
+        breaker.record_failure(ClientConnectionError())
+        assert breaker.state is CircuitState.OPEN
+
+    def test_client_errors_do_not_count(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure(response_error(404))
+        assert breaker.state is CircuitState.CLOSED
+
+
+class TestCallWithRetries:
+    def test_retries_until_success(self):
+        errors = [ClientConnectionError(), response_error(503)]
+
+        async def flaky():
+            if errors:
+                raise errors.pop()
+            return "ok"
+
+        policy = RetryPolicy(backoff_base=0)
+        result = asyncio.run(
+            call_with_retries(flaky, policy=policy, breaker=None)
+        )
+        assert result == "ok"
+
+    def test_open_circuit_fails_fast(self):
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            raise ClientConnectionError()
+
+        breaker = CircuitBreaker(failure_threshold=2)
+        policy = RetryPolicy(max_attempts=5, backoff_base=0)
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(
+                call_with_retries(failing, policy=policy, breaker=breaker)
+            )
+        assert calls == 2
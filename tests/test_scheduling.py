@@ -0,0 +1,331 @@
+import asyncio
+import time
+
+import pytest
+
+from aiohttp import ClientResponseError
+
+from tdk.client import TDKClient
+from tdk.internal.fake_server import FakeTDKServer, FaultProfile
+from tdk.internal.http import AiohttpTransport
+from tdk.internal.scheduling import (
+    AdaptiveLimiter,
+    AIMDPolicy,
+    Priority,
+    Scheduler,
+    TokenBucket,
+    get_priority,
+    priority,
+)
+
+
+class TestTokenBucket:
+    def test_priority(self):
+        async def test():
+            bucket = TokenBucket(rate=100, burst=1)
+            await bucket.acquire()
+            order = []
+
+            async def acquire(lane, name):
+                await bucket.acquire(lane)
+                order.append(name)
+
+            bulk = asyncio.create_task(acquire(Priority.BULK, "bulk"))
+            await asyncio.sleep(0)
+            await acquire(Priority.INTERACTIVE, "interactive")
+            await bulk
+            return order
+
+        assert asyncio.run(test()) == ["interactive", "bulk"]
+
+    def test_rate(self):
+        async def test():
+            bucket = TokenBucket(rate=100, burst=1)
+            start = time.monotonic()
+            for _ in range(6):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        assert asyncio.run(test()) >= 0.05
+
+    def test_burst(self):
+        async def test():
+            bucket = TokenBucket(rate=1, burst=5)
+            start = time.monotonic()
+            for _ in range(5):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        assert asyncio.run(test()) < 0.5
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+        with pytest.raises(ValueError):
+            TokenBucket(rate=1, burst=0)
+
+
+class TestScheduler:
+    def test_max_concurrency(self):
+        scheduler = Scheduler(max_concurrency=2)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with scheduler.slot():
+                peak = max(peak, scheduler.stats().in_flight)
+                await asyncio.sleep(0.01)
+
+        async def test():
+            tasks = [asyncio.create_task(request()) for _ in range(6)]
+            await asyncio.sleep(0)
+            queued = scheduler.stats().queued
+            await asyncio.gather(*tasks)
+            return queued
+
+        assert asyncio.run(test()) == 4
+        assert peak == 2
+        stats = scheduler.stats()
+        assert stats.completed == 6
+        assert stats.in_flight == stats.queued == 0
+        assert stats.max_wait >= 0.01
+        assert 0 < stats.mean_wait <= stats.max_wait
+
+    def test_cancelled_waiter_releases_nothing(self):
+        scheduler = Scheduler(max_concurrency=1)
+
+        async def test():
+            async with scheduler.slot():
+                waiter = asyncio.create_task(scheduler.slot().__aenter__())
+                await asyncio.sleep(0)
+                waiter.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await waiter
+            async with scheduler.slot():
+                pass
+
+        asyncio.run(test())
+        assert scheduler.stats().completed == 2
+
+
+def response_error(status):
+    return ClientResponseError(None, (), status=status)
+
+
+class TestAdaptiveLimiter:
+    def run_window(self, limiter, error=None, latency=0.01, saturated=True):
+        """Finish a limit-worth of requests that started together."""
+        started_at = time.monotonic() - latency
+        for _ in range(limiter.limit):
+            limiter.record(started_at, error=error, saturated=saturated)
+
+    def test_grows_additively_while_saturated(self):
+        limiter = AdaptiveLimiter(AIMDPolicy(initial_limit=2, max_limit=4))
+        self.run_window(limiter)
+        assert limiter.limit == 2
+        self.run_window(limiter)
+        assert limiter.limit == 3
+        for _ in range(10):
+            self.run_window(limiter)
+        assert limiter.limit == 4
+
+    def test_does_not_grow_while_idle(self):
+        limiter = AdaptiveLimiter(AIMDPolicy(initial_limit=2))
+        for _ in range(10):
+            self.run_window(limiter, saturated=False)
+        assert limiter.limit == 2
+
+    @pytest.mark.parametrize(
+        "error", [response_error(429), response_error(503), TimeoutError()]
+    )
+    def test_congestion_halves_the_limit_once(self, error):
+        limiter = AdaptiveLimiter(AIMDPolicy(initial_limit=8))
+        self.run_window(limiter, error=error, latency=0)
+        assert limiter.limit == 4
+        assert limiter.decreases == 1
+        self.run_window(limiter, error=error, latency=0)
+        assert limiter.limit == 2
+
+    def test_other_errors_are_ignored(self):
+        limiter = AdaptiveLimiter(AIMDPolicy(initial_limit=8))
+        self.run_window(limiter, error=response_error(404))
+        self.run_window(limiter, error=ValueError())
+        assert limiter.limit == 8
+
+    def test_latency_jump_decreases_the_limit(self):
+        limiter = AdaptiveLimiter(
+            AIMDPolicy(initial_limit=2, max_limit=2, min_samples=4)
+        )
+        for _ in range(4):
+            self.run_window(limiter, latency=0.01)
+        assert limiter.decreases == 0
+        self.run_window(limiter, latency=0.1)
+        assert limiter.limit == 1
+
+    def test_limit_is_bounded_below(self):
+        limiter = AdaptiveLimiter(AIMDPolicy(initial_limit=2, min_limit=2))
+        self.run_window(limiter, error=response_error(503), latency=0)
+        assert limiter.limit == 2
+
+    def test_scheduler_adapts_to_errors_in_slots(self):
+        scheduler = Scheduler(adaptive=AIMDPolicy(initial_limit=2))
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with scheduler.slot():
+                peak = max(peak, scheduler.stats().in_flight)
+                await asyncio.sleep(0.01)
+                raise response_error(503)
+
+        async def test():
+            results = await asyncio.gather(
+                *[request() for _ in range(4)], return_exceptions=True
+            )
+            assert all(isinstance(r, ClientResponseError) for r in results)
+
+        asyncio.run(test())
+        assert peak == 2
+        assert scheduler.stats().concurrency_limit == 1
+
+
+def test_client_backs_off_when_the_server_fails():
+    async def test():
+        faults = FaultProfile(error_rate=1.0, error_statuses=(503,))
+        async with FakeTDKServer(faults=faults) as server:
+            async with TDKClient(
+                transport=AiohttpTransport(base_url=server.url),
+                adaptive_concurrency=AIMDPolicy(initial_limit=8),
+                retry=None,
+                metrics=None,
+            ) as client:
+                with pytest.raises(ClientResponseError):
+                    await client.search_gts("kedi")
+                return client.scheduler.stats().concurrency_limit
+
+    assert asyncio.run(test()) == 4
+
+
+class TestPriority:
+    def test_interactive_requests_skip_the_bulk_queue(self):
+        scheduler = Scheduler(max_concurrency=2)
+        order = []
+
+        async def request(name):
+            async with scheduler.slot():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        async def test():
+            with priority("bulk"):
+                bulk = [
+                    asyncio.create_task(request(f"bulk {i}")) for i in range(6)
+                ]
+            await asyncio.sleep(0)
+            assert scheduler.stats().queued_by_priority == {
+                "interactive": 0,
+                "bulk": 4,
+            }
+            await request("interactive")
+            await asyncio.gather(*bulk)
+
+        asyncio.run(test())
+        assert order.index("interactive") == 2
+
+    def test_reserved_slots(self):
+        scheduler = Scheduler(max_concurrency=3, reserved=1)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with scheduler.slot():
+                peak = max(peak, scheduler.stats().in_flight)
+                await asyncio.sleep(0.05)
+
+        async def test():
+            with priority(Priority.BULK):
+                bulk = [asyncio.create_task(request()) for _ in range(6)]
+            await asyncio.sleep(0.01)
+            start = time.monotonic()
+            async with scheduler.slot():
+                wait = time.monotonic() - start
+            await asyncio.gather(*bulk)
+            return wait
+
+        assert asyncio.run(test()) < 0.02
+        assert peak == 2
+
+    def test_client_schedules_by_priority_by_default(self):
+        async def test():
+            faults = FaultProfile(latency=0.05)
+            async with FakeTDKServer(faults=faults) as server:
+                async with TDKClient(
+                    base_url=server.url, limit_per_host=2, metrics=None
+                ) as client:
+                    with priority(Priority.BULK):
+                        bulk = [
+                            asyncio.create_task(client.search_gts(f"kedi{i}"))
+                            for i in range(6)
+                        ]
+                    await asyncio.sleep(0.01)
+                    queued = client.scheduler.stats().queued_by_priority
+                    await client.search_gts("köpek")
+                    finished = sum(task.done() for task in bulk)
+                    await asyncio.gather(*bulk)
+                    return queued, finished
+
+        queued, finished = asyncio.run(test())
+        assert queued == {"interactive": 0, "bulk": 4}
+        assert finished < 6
+
+    def test_interactive_requests_skip_the_bulk_rate_limit_queue(self):
+        scheduler = Scheduler(max_concurrency=20, rate_limit=10, burst=10)
+
+        async def request():
+            async with scheduler.slot():
+                await asyncio.sleep(0.01)
+
+        async def test():
+            with priority(Priority.BULK):
+                bulk = [asyncio.create_task(request()) for _ in range(200)]
+            await asyncio.sleep(0.05)
+            assert scheduler.stats().queued_by_priority["bulk"] == 190
+            start = time.monotonic()
+            async with scheduler.slot():
+                wait = time.monotonic() - start
+            for task in bulk:
+                task.cancel()
+            await asyncio.gather(*bulk, return_exceptions=True)
+            return wait
+
+        assert asyncio.run(test()) < 0.15
+
+    def test_bulk_always_gets_a_slot(self):
+        scheduler = Scheduler(max_concurrency=1, reserved=5)
+
+        async def test():
+            async with scheduler.slot(Priority.BULK):
+                pass
+
+        asyncio.run(asyncio.wait_for(test(), 1))
+
+    def test_priority_is_scoped(self):
+        assert get_priority() is Priority.INTERACTIVE
+        with priority("bulk"):
+            assert get_priority() is Priority.BULK
+        assert get_priority() is Priority.INTERACTIVE
+
+    def test_cancelled_waiter_passes_its_turn_on(self):
+        scheduler = Scheduler(adaptive=AIMDPolicy(initial_limit=1))
+
+        async def test():
+            async with scheduler.slot():
+                waiter = asyncio.create_task(scheduler.slot().__aenter__())
+                await asyncio.sleep(0)
+                waiter.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await waiter
+            async with scheduler.slot():
+                return scheduler.stats().in_flight
+
+        assert asyncio.run(test()) == 1
@@ -0,0 +1,70 @@
+import logging
+
+import pytest
+from aiohttp import ClientResponseError
+
+from tdk.client import ResponseCache, RetryPolicy, SlowRequestLog
+from tdk.internal.fake_server import FaultProfile
+
+LATENCY = FaultProfile(latency=0.05)
+
+
+def test_slow_requests_are_recorded(caplog, run_against_server):
+    slow_log = SlowRequestLog(threshold=0.03)
+
+    async def test(client, server):
+        await client.search_gts("kedi")
+        await client.search_gts("kedi")
+
+    with caplog.at_level(logging.WARNING, logger="tdk.slow_requests"):
+        run_against_server(
+            test, faults=LATENCY, slow_log=slow_log, cache=ResponseCache()
+        )
+
+    # The second call is served from the cache, quickly.
+    assert slow_log.slow == 1
+    [record] = slow_log.records
+    assert record.dictionary == "gts"
+    assert record.request == "/gts?ara=kedi"
+    assert record.duration >= 0.05
+    assert record.cache == "miss"
+    assert record.retries == 0
+    assert record.response_size > 0
+    assert record.phases["ttfb"] >= 0.05
+    assert record.error is None
+    [log] = caplog.records
+    assert log.slow_request == record
+
+
+def test_failed_requests_are_recorded(run_against_server):
+    slow_log = SlowRequestLog(threshold=0)
+
+    async def test(client, server):
+        with pytest.raises(ClientResponseError):
+            await client.search_gts("kedi")
+
+    faults = FaultProfile(error_rate=1, error_statuses=(503,))
+    retry = RetryPolicy(max_attempts=3, backoff_base=0)
+    run_against_server(test, faults=faults, slow_log=slow_log, retry=retry)
+    [record] = slow_log.records
+    assert record.retries == 2
+    assert record.cache == "off"
+    assert "ClientResponseError" in record.error
+
+
+def test_sampling(run_against_server):
+    slow_log = SlowRequestLog(threshold=0, sample_rate=0)
+
+    async def test(client, server):
+        for query in ["kedi", "köpek", "kitap"]:
+            await client.search_gts(query)
+
+    run_against_server(test, slow_log=slow_log)
+    assert slow_log.slow == 3
+    assert not slow_log.records
+
+
+@pytest.mark.parametrize("options", [{"threshold": -1}, {"sample_rate": 1.5}])
+def test_invalid_options(options):
+    with pytest.raises(ValueError):
+        SlowRequestLog(**options)
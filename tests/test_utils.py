@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+import pytest
+
+from tdk.internal.utils import make_sync, get_background_loop
+
+
+async def current_loop_and_thread():
+    return asyncio.get_running_loop(), threading.current_thread()
+
+
+@make_sync(current_loop_and_thread)
+def current_loop_and_thread_sync(): ...
+
+
+class TestMakeSync:
+    def test_reuses_background_loop(self):
+        first_loop, thread = current_loop_and_thread_sync()
+        second_loop, _ = current_loop_and_thread_sync()
+        assert first_loop is second_loop is get_background_loop()
+        assert thread is not threading.current_thread()
+
+    def test_callable_from_running_loop(self):
+        async def main():
+            return current_loop_and_thread_sync()
+
+        loop, _ = asyncio.run(main())
+        assert loop is get_background_loop()
+
+    def test_refuses_to_deadlock(self):
+        async def call_sync_from_background_loop():
+            current_loop_and_thread_sync()
+
+        @make_sync(call_sync_from_background_loop)
+        def call_sync_from_background_loop_sync(): ...
+
+        with pytest.raises(RuntimeError):
+            call_sync_from_background_loop_sync()
+
+    def test_propagates_exceptions(self):
+        async def fail():
+            raise ValueError("oops")
+
+        @make_sync(fail)
+        def fail_sync(): ...
+
+        with pytest.raises(ValueError, match="oops"):
+            fail_sync()